@@ -0,0 +1,44 @@
+# app_pages/contacts.py
+# ---------------------------
+# Контакти та ресурси: статическая страница, данных не читает
+# ---------------------------
+
+import streamlit as st
+
+st.header("📞 Контакти та ресурси")
+st.subheader("👥 Наша команда")
+st.markdown("""
+### 🏢 OurTeam
+
+**Zhovtiuk Svitlana**  
+Керівник групи  
+📧 s.zhovtiuk@darnytsia.ua
+
+**Filatova Oleksandra**  
+Менеджер з бізнес аналітики  
+📧 oleksandra.filatova@darnytsia.ua
+
+**Bohdanyk Oleksandr**  
+Менеджер з бізнес аналітики  
+📧 o.bohdanyk@darnytsia.ua
+
+**Taranenko Oleksandr**  
+Менеджер з бізнес аналітики  
+📧 o.taranenko@darnytsia.ua
+""")
+st.subheader("🔗 Корисні посилання")
+c1, c2 = st.columns(2)
+with c1:
+    st.markdown("""
+    ### Внутрішні ресурси:
+    - [SharePoint команди](https://darnytsia.sharepoint.com)
+    - [Azure DevOps](https://dev.azure.com/darnitsa)
+    - [Power BI Service](https://app.powerbi.com)
+    """)
+with c2:
+    st.markdown("""
+    ### Зовнішні ресурси:
+    - [Microsoft Learn](https://learn.microsoft.com)
+    - [Power BI Community](https://community.powerbi.com)
+    - [Streamlit Docs](https://docs.streamlit.io)
+    """)
@@ -0,0 +1,241 @@
+# app_pages/edit.py
+# ---------------------------
+# Редагування даних: редактор среза (лейк / папка), экспорт, массовый импорт, история версий, новая запись
+# Запись: Google Sheets, иначе локальный Excel через писателя книги (local_writer.py)
+# Редактор — фрагмент (st.fragment): правка ячейки перезапускает только его; срез — в состоянии сессии
+# После записи записанная таблица сразу становится новой версией снапшота (ui_common.publish_written) —
+# rerun показывает её без паузы и без перечитывания источника
+# ---------------------------
+
+import streamlit as st
+import pandas as pd
+
+import app_state
+import knowledge_core as core
+from knowledge_core import EXCEL_FILE_PATH, missing_required_fields
+from federation import SOURCE_COLUMN, own_mask
+from compact_frame import editor_rows, merge_edited_rows
+from export_engine import EXPORT_FORMATS, ExportScope, available_formats
+from schema import normalize_lakes_frame
+from validation import has_errors, new_violations, validate_lakes_table
+from bulk_import import IMPORT_MODES, ImportLedger, import_file
+from ui_common import (append_row_to_google_sheets, append_row_to_local_store, credentials_hint,
+                       export_download_button, full_lakes_table, load_snapshot, record_appended_row, refresh_data,
+                       save_lakes_table, show_violations)
+
+# длинные тексты в редакторе — первые N символов (только чтение), пока не включены «Повні тексти»
+EDITOR_PREVIEW_CHARS = 120
+
+
+@st.fragment
+def table_editor(snapshot):
+    """Срез лейк / папка в редакторе и его запись — фрагмент: правка ячейки не перезапускает страницу."""
+    lakes_table, reports_table, lakes_text = snapshot.lakes_df, snapshot.reports_df, snapshot.lakes_text
+    # редактор получает только срез (лейк / папка): в браузер и в сессию уходит он, а не вся таблица
+    s1, s2, s3 = st.columns([2, 2, 1])
+    # строки таблиц отделов (federation.py) — только для чтения: в редактор не попадают
+    own = own_mask(lakes_table)
+    edit_lakes = list(lakes_table.loc[own, 'LakeHouse'].dropna().unique())
+    edit_lake = s1.selectbox("Лейк", edit_lakes, key="edit_lake")
+    edit_scope = own & (lakes_table['LakeHouse'] == edit_lake)
+    edit_folders = list(lakes_table.loc[edit_scope, 'Folder'].dropna().unique()) if 'Folder' in lakes_table.columns else []
+    edit_folder = s2.selectbox("Папка", [None] + edit_folders, format_func=lambda v: "Всі папки" if v is None else v,
+                               key="edit_folder")
+    if edit_folder is not None:
+        edit_scope &= lakes_table['Folder'] == edit_folder
+    full_texts = s3.checkbox("Повні тексти", key="edit_full_texts",
+                             help="Довгі тексти показуються скорочено й лише для читання, доки їх не розгорнуто")
+    editor_key = f"data_editor_{snapshot.version}_{edit_lake}_{edit_folder}_{full_texts}"
+    # срез строится один раз на (версия, лейк, папка, тексты): правка ячейки перезапускает фрагмент, а не срез
+    cached = st.session_state.get('editor_slice')
+    if cached is None or cached[0] != editor_key:
+        editor_slice, readonly = editor_rows(lakes_table, lakes_text, snapshot.lakes_columns, lakes_table.index[edit_scope],
+                                             None if full_texts else EDITOR_PREVIEW_CHARS)
+        if SOURCE_COLUMN in editor_slice.columns:
+            readonly = [*readonly, SOURCE_COLUMN]
+        st.session_state['editor_slice'] = cached = (editor_key, editor_slice, readonly)
+    _, editor_slice, readonly = cached
+    edited_df = st.data_editor(
+        editor_slice, use_container_width=True, num_rows="dynamic",
+        column_config={c: st.column_config.TextColumn(c, disabled=True) for c in readonly},
+        key=editor_key
+    )
+    st.caption(f"Рядків у редакторі: {len(editor_slice)} з {len(lakes_table)}")
+
+    # перед записью — проверка; старые огрехи таблицы запись не блокируют, новые ошибки — блокируют
+    if not edited_df.equals(editor_slice):
+        # полная таблица — только для записи: правки среза вливаются в неё по метке строки
+        editable_table = full_lakes_table(snapshot)
+        merged_table = merge_edited_rows(editable_table, editor_slice, edited_df, readonly)
+        edit_violations = new_violations(validate_lakes_table(merged_table), validate_lakes_table(editable_table))
+        if has_errors(edit_violations):
+            show_violations(edit_violations, "Зміни не збережено")
+        else:
+            if not edit_violations.empty:
+                show_violations(edit_violations, "Перевірка змін")
+            scope_note = edit_lake if edit_folder is None else f"{edit_lake} / {edit_folder}"
+            if save_lakes_table(merged_table, reports_table, editable_table, f"редагування: {scope_note}"):
+                st.rerun()
+
+
+credentials_hint()
+snapshot = load_snapshot()
+lakes_table, reports_table = snapshot.lakes_df, snapshot.reports_df
+lakes_text = snapshot.lakes_text   # длинные тексты — отдельно от lakes_table, тот же индекс
+
+st.header("✏️ Редагування даних")
+if lakes_table is not None and not lakes_table.empty:
+    if 'save_notice' in st.session_state:
+        st.success(st.session_state.pop('save_notice'))
+    st.subheader("📊 Поточні дані")
+    st.info("💡 Редагуйте дані прямо в таблиці. Зміни будуть записані у Google Sheets; якщо не вдасться — у локальний Excel (резерв).")
+    quota = core.sheets_scheduler().metrics()
+    st.caption(f"☁️ Google Sheets API: запас квоти {quota['headroom']}/{quota['budget']} запитів за хвилину · "
+               f"у черзі {quota['queue_depth']} · повторів {quota['retries']}")
+
+    table_editor(snapshot)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 Оновити дані"):
+            refresh_data()
+            st.rerun()
+    with col2:
+        export_download_button("📥 Завантажити CSV", snapshot, 'csv', ExportScope(), key="export_all_csv")
+
+    with st.expander("📥 Експорт (формат і фільтр)"):
+        e1, e2, e3, e4 = st.columns(4)
+        export_fmt = e1.selectbox("Формат", available_formats(), format_func=lambda f: EXPORT_FORMATS[f]['label'], key="export_fmt")
+        lake_options = list(lakes_table['LakeHouse'].dropna().unique()) if 'LakeHouse' in lakes_table.columns else []
+        export_lake = e2.selectbox("Лейк", [None] + lake_options, format_func=lambda v: "Всі лейки" if v is None else v, key="export_lake")
+        folder_options = []
+        if export_lake is not None and 'Folder' in lakes_table.columns:
+            folder_options = list(lakes_table.loc[lakes_table['LakeHouse'] == export_lake, 'Folder'].dropna().unique())
+        export_folder = e3.selectbox("Папка", [None] + folder_options, format_func=lambda v: "Всі папки" if v is None else v, key="export_folder")
+        export_search = e4.text_input("Пошук", key="export_search")
+        export_download_button(f"📥 Завантажити {EXPORT_FORMATS[export_fmt]['label']}", snapshot, export_fmt,
+                               ExportScope(lake=export_lake, folder=export_folder, search=export_search or None),
+                               key="export_filtered")
+
+    with st.expander("📦 Масовий імпорт (CSV / XLSX)"):
+        st.caption("Рядки зіставляються з наявними за LakeHouse / Folder / Element / Type (Type — якщо він є у файлі); "
+                   "порожні клітинки файлу значення не стирають.")
+        if 'bulk_import_summary' in st.session_state:
+            st.success(st.session_state.pop('bulk_import_summary'))
+        import_upload = st.file_uploader("Файл для імпорту", type=['csv', 'xlsx'], key="bulk_import_file")
+        i1, i2 = st.columns(2)
+        import_mode = i1.selectbox("Режим", list(IMPORT_MODES), format_func=IMPORT_MODES.get, key="bulk_import_mode")
+        import_force = i2.checkbox("Імпортувати повторно той самий файл", key="bulk_import_force")
+        if import_upload is not None and st.button("📦 Імпортувати", key="bulk_import_run"):
+            ledger = ImportLedger(core.IMPORT_LEDGER_PATH)
+            try:
+                editable_table = full_lakes_table(snapshot)
+                result = import_file(editable_table, import_upload, import_upload.name, import_mode,
+                                     ledger=ledger, force=import_force)
+            except ValueError as e:
+                # формат файлу або ключ зіставлення (bulk_import.import_key_columns)
+                result = None
+                st.error(f"❌ Імпорт не застосовано: {e}")
+            except Exception as e:
+                result = None
+                st.error(f"❌ Не вдалося прочитати файл: {e}")
+            if result is not None and result.already_imported:
+                st.info(f"ℹ️ Цей файл уже імпортовано ({ledger.get(result.checksum).get('at')}). "
+                        "Увімкніть «Імпортувати повторно», щоб застосувати його ще раз.")
+            elif result is not None and not result.changed:
+                st.info(f"ℹ️ Змін немає: без змін {result.unchanged}, пропущено {result.skipped}")
+            elif result is not None:
+                import_violations = new_violations(validate_lakes_table(result.table),
+                                                   validate_lakes_table(editable_table))
+                if has_errors(import_violations):
+                    show_violations(import_violations, "Імпорт не застосовано")
+                else:
+                    # один пакетний запис усієї таблиці
+                    if save_lakes_table(result.table, reports_table, editable_table,
+                                        f"імпорт {import_upload.name}"):
+                        ledger.record(result.checksum, {'name': import_upload.name, 'mode': import_mode,
+                                                        **result.summary()})
+                        st.session_state['bulk_import_summary'] = (
+                            f"✅ Імпорт: додано {result.inserted}, оновлено {result.updated}, "
+                            f"без змін {result.unchanged}, пропущено {result.skipped}, дублікатів у файлі {result.duplicates}")
+                        st.rerun()
+
+    with st.expander("🕓 Історія версій"):
+        history = core.version_history()
+        versions = history.versions()
+        if versions.empty:
+            st.info("Історія порожня: версії з'являються після першого збереження.")
+        else:
+            st.dataframe(versions, use_container_width=True, hide_index=True)
+            numbers = versions['version'].tolist()
+            h1, h2 = st.columns(2)
+            diff_from = h1.selectbox("Від версії", numbers, index=min(1, len(numbers) - 1), key="history_from")
+            diff_to = h2.selectbox("До версії", numbers, index=0, key="history_to")
+            if diff_from != diff_to:
+                changes = history.diff(diff_from, diff_to)
+                st.caption(f"Змін: {len(changes)}")
+                st.dataframe(changes, use_container_width=True, hide_index=True)
+            restore_version = st.selectbox("Версія для відновлення", numbers, key="history_restore")
+            if st.button(f"↩️ Відновити версію {restore_version}", key="history_restore_run"):
+                # відновлення — звичайний запис усієї таблиці, тож і воно стає новою версією
+                restored = normalize_lakes_frame(history.table(restore_version))
+                if save_lakes_table(restored, reports_table, full_lakes_table(snapshot), f"відновлено версію {restore_version}"):
+                    st.rerun()
+
+    st.subheader("➕ Додати новий запис")
+    # Визначаємо всі колонки з таблиці (крім тих, що додані автоматично: «Джерело» ставить federation.py)
+    all_columns = [c for c in (list(snapshot.lakes_columns) or list(lakes_table.columns)) if c != SOURCE_COLUMN]
+    form_columns = {}
+    
+    with st.form("add_new_record"):
+        c1, c2 = st.columns(2)
+        with c1:
+            for col in all_columns[:len(all_columns)//2 + 1]:
+                if col == 'LakeHouse':
+                    form_columns[col] = st.text_input("LakeHouse *", key=f"form_{col}")
+                elif col == 'Folder':
+                    form_columns[col] = st.text_input("Folder *", key=f"form_{col}")
+                elif col == 'Element':
+                    form_columns[col] = st.text_input("Element *", key=f"form_{col}")
+                elif col == 'URL':
+                    form_columns[col] = st.text_input("URL", key=f"form_{col}")
+                elif col not in ['Загальна інформація про лейк', 'Внесення змін']:
+                    form_columns[col] = st.text_input(col, key=f"form_{col}")
+        with c2:
+            for col in all_columns[len(all_columns)//2 + 1:]:
+                if col == 'Загальна інформація про лейк':
+                    form_columns[col] = st.text_area("Загальна інформація про лейк", key=f"form_{col}")
+                elif col == 'Внесення змін':
+                    form_columns[col] = st.text_area("Внесення змін", key=f"form_{col}")
+                elif col not in ['LakeHouse', 'Folder', 'Element', 'URL']:
+                    form_columns[col] = st.text_area(col, key=f"form_{col}")
+        
+        if st.form_submit_button("➕ Додати запис"):
+            # Перевірка обов'язкових полів
+            if not missing_required_fields(form_columns):
+                new_row = {}
+                for col in all_columns:
+                    new_row[col] = form_columns.get(col, '')
+
+                # дубликат ключа и ссылка — проверка новой строки против уже сохранённых:
+                # по хэшам ключей снапшота (Snapshot.known_keys), без развёрнутой полной таблицы
+                row_violations = validate_lakes_table(pd.DataFrame([new_row], index=[len(lakes_table)]),
+                                                      rules=['duplicate_key', 'url'], known_keys=snapshot.known_keys)
+                if has_errors(row_violations):
+                    show_violations(row_violations, "Запис не додано")
+                # дозапись одной строки: в источник, в историю и в общий снапшот, без копирования таблицы
+                elif append_row_to_google_sheets(new_row, all_columns):
+                    record_appended_row(new_row, 'google_sheets', snapshot)
+                    app_state.publish_append(new_row)
+                    st.rerun()
+                else:
+                    st.warning("⚠️ Google Sheets недоступний. Зберігаю локально як резервну копію.")
+                    ok, saved = append_row_to_local_store(new_row, EXCEL_FILE_PATH)
+                    if ok:
+                        record_appended_row(new_row, 'local', snapshot)
+                        app_state.publish_append(new_row)
+                        st.rerun()
+            else:
+                st.error("❌ Заповніть обов'язкові поля: LakeHouse, Folder, Element")
+else:
+    st.warning("⚠️ Немає даних для редагування. Завантажте Excel або увімкніть Google Sheets.")
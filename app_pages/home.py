@@ -0,0 +1,22 @@
+# app_pages/home.py
+# ---------------------------
+# Головна: сколько лейков и отчётов — из общего снапшота процесса (без разбора данных)
+# ---------------------------
+
+import streamlit as st
+
+from ui_common import load_snapshot
+
+snapshot = load_snapshot()
+lakes, reports = list(snapshot.lakes_names), list(snapshot.reports_names)
+
+st.header("Вітаємо! 👋")
+st.markdown("""
+Ця база знань містить інформацію для підтримки та оновлення наших LakeHouses та Power BI Reports.
+""")
+col1, col2 = st.columns(2)
+# Підраховуємо унікальні значення
+unique_lakes_count = len(set(lakes)) if lakes else 0
+unique_reports_count = len(set(reports)) if reports else 0
+with col1: st.metric("🏞️ Data Lakes", unique_lakes_count)
+with col2: st.metric("📊 Power BI звіти", unique_reports_count)
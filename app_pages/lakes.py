@@ -0,0 +1,176 @@
+# app_pages/lakes.py
+# ---------------------------
+# Оновлення LakeHouses: список лейков, лейк -> папки -> элементы, аналитика и графики
+# KT_PUSHDOWN: страница читает Google Sheets запросами (gviz_query.py) — только свои строки,
+# без загрузки всего листа; не вышло или запись ещё не сверена с листом — обычный общий снапшот
+# Папки лейка и элементы открытой папки — фрагмент (st.fragment): клик по папке перезапускает только его
+# Статусы ссылок не задерживают отрисовку: непроверенные дорисовывает фрагмент с опросом (run_every),
+# сам он страницу не перезапускает
+# ---------------------------
+
+import streamlit as st
+from datetime import datetime
+import pandas as pd
+
+import app_state
+from compact_frame import text_value
+from export_engine import ExportScope
+from link_checker import LINK_POLL_SECONDS, LINK_RENDER_WAIT, table_urls
+from schema import folder_view_columns
+from ui_common import export_download_button, get_link_checker, load_snapshot, process_text_with_images
+
+
+def link_table(elements_df_display, url_dict):
+    """Элементы папки со статусами ссылок — только из кэша проверок, без ожидания сети."""
+    link_statuses = get_link_checker().peek_many(url_dict.values())
+    table = elements_df_display.copy()
+    table['Стан посилання'] = [
+        link_statuses[url_dict[idx]].label() if url_dict.get(idx) in link_statuses
+        else ("⏳ перевіряється" if idx in url_dict else "—")
+        for idx in table.index]
+    st.markdown(table.to_html(escape=False), unsafe_allow_html=True)
+    alive = sum(1 for s in link_statuses.values() if s.alive)
+    dead = len(link_statuses) - alive
+    st.info(f"🔗 Посилань: {len(set(url_dict.values()))} · робочих: {alive} · недоступних: {dead}")
+
+
+# пока есть непроверенные ссылки, таблица перерисовывается сама раз в LINK_POLL_SECONDS;
+# когда все статусы есть, тик лишь повторяет ту же таблицу из кэша (без st.rerun — он перезапустил бы
+# всю страницу), а панель при следующем своём запуске берёт link_table и Streamlit снимает опрос
+link_table_polling = st.fragment(link_table, run_every=LINK_POLL_SECONDS)
+
+
+@st.fragment
+def folder_panel(lake_name, lake_data, lake_text, export_snapshot):
+    """Папки лейка и элементы открытой папки — фрагмент: клик по папке не перезапускает страницу."""
+    if 'Folder' in lake_data.columns:
+        st.subheader("📁 Структура лейка")
+        unique_folders = list(lake_data['Folder'].dropna().unique())
+        if len(unique_folders) > 0:
+            st.write("**Доступні папки:**")
+            cols = st.columns(min(3, len(unique_folders)))
+            # открытая папка — в состоянии сессии: клик по папке перезапускает только эту панель
+            state_key = f"open_folder_{lake_name}"
+            for i, folder in enumerate(unique_folders):
+                with cols[i % 3]:
+                    if st.button(f"📂 {folder}", key=f"folder_{i}"):
+                        st.session_state[state_key] = folder
+            selected_folder = st.session_state.get(state_key)
+            if selected_folder in unique_folders:
+                st.success(f"📂 Вибрано папку: **{selected_folder}**")
+                folder_data = lake_data[lake_data['Folder'] == selected_folder]
+                st.subheader("🧩 Елементи папки")
+                # колонки элементов папки — по схеме, а не по позиции в таблице
+                display_columns = folder_view_columns(folder_data.columns)
+                if 'URL' in display_columns:
+                    display_columns = [c for c in display_columns if c != 'URL']
+                if 'Element' in display_columns and 'URL' in folder_data.columns:
+                    elements_df_display = folder_data[display_columns].copy()
+                    url_dict = {idx: row.get('URL','').strip() for idx, row in folder_data.iterrows()
+                                if pd.notna(row.get('URL','')) and str(row.get('URL','')).strip()}
+                    def create_link(row_data):
+                        element_name = row_data['Element']
+                        row_idx = row_data.name
+                        if row_idx in url_dict:
+                            url = url_dict[row_idx]
+                            return f'<a href="{url}" target="_blank" style="color:#1f77b4;text-decoration:underline;">{element_name}</a>'
+                        return element_name
+                    elements_df_display['Element'] = elements_df_display.apply(create_link, axis=1)
+                    # не ждём медленные ссылки: что не успело — «перевіряється», таблицу дорисовывает опрос
+                    link_statuses = get_link_checker().check_many(url_dict.values(), wait=LINK_RENDER_WAIT)
+                    pending = len(link_statuses) < len(set(url_dict.values()))
+                    (link_table_polling if pending else link_table)(elements_df_display, url_dict)
+                else:
+                    st.dataframe(folder_data[display_columns], use_container_width=True, hide_index=True)
+                lake_value = folder_data['LakeHouse'].iloc[0] if 'LakeHouse' in folder_data.columns else None
+                export_download_button("📥 Завантажити папку (CSV)", export_snapshot, 'csv',
+                                       ExportScope(lake=lake_value, folder=selected_folder),
+                                       key=f"export_folder_{selected_folder}")
+                st.subheader("📝 Внесення змін")
+                changes_text = text_value(lake_text, folder_data.index[0], 'Внесення змін')
+                if changes_text is not None:
+                    with st.expander("Показати деталі змін", expanded=True):
+                        process_text_with_images(changes_text)
+                else:
+                    st.info("Немає інформації про внесення змін для цієї папки.")
+            else:
+                st.info("👆 Натисніть на папку вище, щоб побачити її елементи")
+        else:
+            st.warning("⚠️ Папки не знайдено в даних")
+    else:
+        st.warning("⚠️ Колонка 'Folder' не знайдена. Показую всі дані:")
+        st.dataframe(lake_data, use_container_width=True, hide_index=True)
+
+
+query_views = None
+lake_queries = app_state.lake_queries()
+# своя или чужая запись ещё не сверена с листом — gviz отдал бы прежние строки: пока читаем снапшот
+if lake_queries is not None and not app_state.data_store().get().unconfirmed:
+    try:
+        query_views = app_state.QueryViews(lake_queries)
+        query_views.lake_summary
+    except Exception as e:
+        query_views = None
+        st.sidebar.warning(f"⚠️ Запити до Google Sheets не вдалися ({type(e).__name__}: {e}) — читаю всю таблицю")
+if query_views is not None:
+    st.sidebar.success("🔎 Лейки читаються запитами до Google Sheets (лише потрібні рядки)")
+else:
+    snapshot = load_snapshot()
+
+st.header("💧 Інструкції по оновленню LakeHouses")
+# колонки уже приведены к схеме при загрузке (schema.py): лейк всегда в 'LakeHouse'
+# список, сводка, аналитика и графики — одни на версию данных для всех сессий (app_state.SnapshotViews)
+views = query_views or app_state.views(snapshot)
+unique_lakes = views.lake_names
+
+lake_select_options = ["Всі лейки"] + unique_lakes + ["📊 Аналітика та візуалізація"]
+lake_name = st.selectbox("Оберіть Data Lake:", lake_select_options)
+
+if lake_name == "Всі лейки":
+    st.info("👈 Оберіть конкретний лейк зі списку вище")
+    if views.has_lakes:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("🏞️ Унікальних лейків", len(unique_lakes))
+        st.subheader("📋 Список всіх Data Lakes")
+        st.dataframe(views.lake_summary, use_container_width=True, hide_index=True)
+    else:
+        st.warning("Список лейків порожній або відсутня колонка 'LakeHouse'.")
+elif lake_name == "📊 Аналітика та візуалізація":
+    st.subheader("📊 Аналітика та візуалізація лейків")
+    if views.has_lakes:
+        analysis = views.analysis
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("🏞️ Всього лейків", analysis['total_lakes'])
+        c2.metric("📊 Колонок даних", len(analysis['columns']))
+        c3.metric("⚠️ Пропущених значень", sum(analysis['missing_data'].values()))
+        c4.metric("📅 Останнє оновлення", datetime.now().strftime('%d.%m'))
+        charts = views.charts
+        if charts:
+            for chart in charts.values():
+                st.plotly_chart(chart, use_container_width=True)
+        st.subheader("🔍 Детальний аналіз")
+        missing_df = pd.DataFrame(list(analysis['missing_data'].items()), columns=['Колонка','Пропущено'])
+        missing_df = missing_df[missing_df['Пропущено'] > 0]
+        if not missing_df.empty: st.dataframe(missing_df, use_container_width=True)
+        else: st.success("✅ Пропущених даних немає!")
+    else:
+        st.warning("Немає даних для аналізу!")
+else:
+    if views.has_lakes:
+        lake_data, lake_text = views.lake(lake_name)
+        # экспорт строится из снапшота по нажатию — в режиме запросов снапшот читается только тогда
+        export_snapshot = app_state.data_store().get if query_views is not None else snapshot
+        if not lake_data.empty:
+            st.success(f"🏞️ Вибрано лейк: **{lake_name}**")
+            # ссылки лейка начинают проверяться в фоне — к открытию папки статусы уже в кэше
+            for url in table_urls(lake_data):
+                get_link_checker().submit(url)
+            lake_info = text_value(lake_text, lake_data.index[0], 'Загальна інформація про лейк')
+            if lake_info is not None:
+                st.subheader("ℹ️ Загальна інформація про лейк")
+                st.info(lake_info)
+            folder_panel(lake_name, lake_data, lake_text, export_snapshot)
+        else:
+            st.error(f"❌ Лейк '{lake_name}' не знайдено.")
+    else:
+        st.warning("⚠️ Дані лейків не завантажені.")
@@ -0,0 +1,8 @@
+# app_pages/powerbi.py
+# ---------------------------
+# Оновлення PowerBI Report: раздел пока без содержимого
+# ---------------------------
+
+import streamlit as st
+
+st.header("📊 Оновлення PowerBI Report")
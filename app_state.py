@@ -0,0 +1,315 @@
+# app_state.py
+# ---------------------------
+# Состояние процесса сервера — общее для всех сессий Streamlit, без st.*
+# - общий кэш снапшота (shared_cache.py), хранилище данных (data_store.py), JSON API — по одному на процесс
+# - SnapshotViews: то, что разделы приложения строят из снапшота (список и сводка лейков, аналитика, графики) —
+#   один раз на версию данных, а не на каждый rerun
+# - прогрев warm_up(): данные, снапшот, индексы, аналитика и графики строятся при старте процесса (serve.py),
+#   до первого пользователя; при обычном `streamlit run` — на первом rerun
+# - status() / ready() — готовность; JSON API отдаёт её на /ready (200 — готово, 503 — прогрев идёт)
+# - KT_PUSHDOWN=1: раздел LakeHouses читает Google Sheets запросами gviz tq (gviz_query.py, QueryViews) —
+#   список лейков, строки открытого лейка, колонки для графиков; весь лист — только для аналитики;
+#   пока записанное (publish_write / publish_append) не сверено с листом, раздел читает снапшот
+# - publish_write(): после успешной записи записанная таблица сразу становится новой версией снапшота
+#   (этого процесса и, через общий кэш, остальных) — без чтения источника, пауз и сброса кэшей;
+#   publish_append() — то же для одной строки формы (хвост снапшота, без перезаписи таблиц)
+# ---------------------------
+
+import ast
+import glob
+import importlib
+import os
+import threading
+import time
+from functools import cached_property
+
+import pandas as pd
+import plotly.express as px
+
+import json_api
+import knowledge_core as core
+from compact_frame import expand_lakes_table
+from data_store import SharedDataStore
+from federation import PRIMARY_SOURCE, SOURCE_COLUMN, own_rows, read_sources_config, with_other_sources
+from gviz_query import GvizLakeQueries
+from shared_cache import SharedSnapshotCache
+
+DATA_TTL = 300
+# после записи источник сверяется с записанным не раньше: Google Sheets отдаёт CSV с задержкой
+WRITE_CONFIRM_AFTER = 30
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_transfer.py")
+
+_lock = threading.RLock()
+_shared_cache = None
+_data_store = None
+_api_server = None
+_views = None
+_lake_queries = None
+_warmup_lock = threading.Lock()
+_status = {'state': 'idle', 'started_at': None, 'seconds': None, 'version': None, 'steps': {}, 'error': None}
+
+
+# ----------------- объекты процесса -----------------
+def shared_cache() -> SharedSnapshotCache:
+    # несколько процессов Streamlit на одном сервере читают источник по очереди и делят один снапшот
+    global _shared_cache
+    with _lock:
+        if _shared_cache is None:
+            _shared_cache = SharedSnapshotCache(os.path.join(core.LOCAL_DATA_DIR, "shared_cache"),
+                                                core.load_data_sources, ttl=DATA_TTL)
+        return _shared_cache
+
+
+def data_store() -> SharedDataStore:
+    global _data_store
+    with _lock:
+        if _data_store is None:
+            cache = shared_cache()
+            _data_store = SharedDataStore(cache.load, ttl=DATA_TTL, generation=cache.generation)
+        return _data_store
+
+
+def start_json_api():
+    """Read-only JSON API в том же процессе — отдаёт тот же снапшот (включается через KT_API_PORT)."""
+    global _api_server
+    port = os.environ.get("KT_API_PORT")
+    with _lock:
+        if _api_server is not None or not port:
+            return _api_server
+        try:
+            # наружу — только явно (KT_API_HOST=0.0.0.0): API без аутентификации
+            host = os.environ.get("KT_API_HOST") or json_api.DEFAULT_HOST
+            _api_server = json_api.start_in_background(data_store(), host=host, port=int(port), readiness=status)
+        except OSError as e:
+            print(f"JSON API не запущено (порт {port}): {e}")
+        return _api_server
+
+
+def publish_write(written, table, reports_df, source):
+    """
+    written — то, что записано (строки основной таблицы), table — таблица сессии (из неё — строки отделов).
+    Записанное сразу становится снапшотом: сессии видят свою правку, источник читается через WRITE_CONFIRM_AFTER.
+    """
+    data = core.written_data(with_other_sources(own_rows(written), table), reports_df, source)
+    data = shared_cache().publish(data, ttl=WRITE_CONFIRM_AFTER)
+    return data_store().publish(data, confirm_after=WRITE_CONFIRM_AFTER)
+
+
+def publish_append(row: dict):
+    """
+    Дописанная строка — сразу в снапшот этого процесса и в хвост общего кэша (таблицы не переписываются);
+    источник сверяется через WRITE_CONFIRM_AFTER, строка держится в хвосте, пока он её не вернёт.
+    С таблицами отделов строка помечается основной таблицей — как её пометит merge_sources после перечитывания.
+    """
+    if SOURCE_COLUMN in data_store().peek().lakes_columns:
+        row = {**row, SOURCE_COLUMN: PRIMARY_SOURCE}
+    generation = shared_cache().append(row, ttl=WRITE_CONFIRM_AFTER, keep=DATA_TTL)
+    return data_store().append_row(row, confirm_after=WRITE_CONFIRM_AFTER, generation=generation)
+
+
+def lake_queries() -> GvizLakeQueries | None:
+    """
+    Запросы к листу Lakes (KT_PUSHDOWN=1). None — режим выключен или подключены таблицы отделов:
+    их строки есть только в полном снапшоте (federation.py).
+    """
+    global _lake_queries
+    if os.environ.get("KT_PUSHDOWN", "") in ("", "0"):
+        return None
+    with _lock:
+        if _lake_queries is None:
+            if read_sources_config(core.SOURCES_CONFIG_PATH):
+                return None
+            # поколение общего кэша: запись в любом процессе сбрасывает кэш запросов
+            _lake_queries = GvizLakeQueries(core.GOOGLE_SHEETS_URL_LAKES, generation=shared_cache().generation,
+                                            ttl=DATA_TTL)
+        return _lake_queries
+
+
+def reset():
+    """Забыть объекты процесса и прогрев (load_test.py: каждый уровень нагрузки — с холодного старта)."""
+    global _shared_cache, _data_store, _views, _lake_queries
+    with _lock:
+        _shared_cache = _data_store = _views = _lake_queries = None
+        _status.update(state='idle', started_at=None, seconds=None, version=None, steps={}, error=None)
+
+
+# ----------------- представления снапшота -----------------
+def lakes_charts(lakes_df):
+    if lakes_df is None or lakes_df.empty:
+        return None
+    charts = {}
+    if 'Status' in lakes_df.columns:
+        status_counts = lakes_df['Status'].value_counts()
+        charts['status_pie'] = px.pie(values=status_counts.values, names=status_counts.index,
+                                      title="Розподіл лейків за статусом")
+    if 'Update_Frequency' in lakes_df.columns:
+        freq = lakes_df['Update_Frequency'].value_counts()
+        charts['frequency_bar'] = px.bar(x=freq.index, y=freq.values, title="Частота оновлень лейків")
+    if 'Workspace' in lakes_df.columns:
+        charts['workspace_treemap'] = px.treemap(lakes_df, path=['Workspace'], title="Розподіл лейків по робочих просторах")
+    return charts
+
+
+class SnapshotViews:
+    """Производные снапшота для разделов приложения. Общие для всех сессий — не мутировать."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    @property
+    def has_lakes(self) -> bool:
+        table = self.snapshot.lakes_df
+        return table is not None and not table.empty and 'LakeHouse' in table.columns
+
+    @cached_property
+    def lake_names(self) -> list:
+        return list(self.snapshot.lakes_df['LakeHouse'].dropna().unique()) if self.has_lakes else []
+
+    def lake(self, name) -> tuple:
+        """-> (строки лейка, длинные тексты с тем же индексом)."""
+        table = self.snapshot.lakes_df
+        return table[table['LakeHouse'] == name], self.snapshot.lakes_text
+
+    @cached_property
+    def lake_summary(self) -> pd.DataFrame | None:
+        # только короткие колонки: опис лейка читается, когда лейк открыт
+        if not self.has_lakes:
+            return None
+        table = self.snapshot.lakes_df
+        return table.groupby('LakeHouse', observed=True).agg(
+            **({'Папок': ('Folder', 'nunique')} if 'Folder' in table.columns else {}),
+            **{'Елементів': ('LakeHouse', 'size')}).reset_index()
+
+    @cached_property
+    def analysis(self) -> dict:
+        snap = self.snapshot
+        text_columns = list(snap.lakes_text.columns) if snap.lakes_text is not None else []
+        table = None if snap.lakes_df is None else expand_lakes_table(
+            snap.lakes_df, None, [c for c in snap.lakes_columns if c not in text_columns])
+        return core.analyze_lakes_data(table, text=snap.lakes_text)
+
+    @cached_property
+    def charts(self):
+        return lakes_charts(self.snapshot.lakes_df)
+
+
+class QueryViews:
+    """
+    То же, что SnapshotViews, но из запросов к листу (KT_PUSHDOWN): сводка — group by, лейк — where,
+    графики — три колонки; аналитике нужен весь лист — она берётся из общего снапшота.
+    """
+
+    def __init__(self, queries: GvizLakeQueries):
+        self.queries = queries
+
+    @property
+    def lake_summary(self) -> pd.DataFrame:
+        return self.queries.lake_summary()
+
+    @property
+    def has_lakes(self) -> bool:
+        return not self.lake_summary.empty
+
+    @property
+    def lake_names(self) -> list:
+        return self.queries.lake_names()
+
+    def lake(self, name) -> tuple:
+        # длинные тексты пришли в тех же строках — они же и «тексты» для text_value()
+        rows = self.queries.lake_rows(name)
+        return rows, rows
+
+    @property
+    def analysis(self) -> dict:
+        return views(data_store().get()).analysis
+
+    @property
+    def charts(self):
+        return lakes_charts(self.queries.columns(['Status', 'Update_Frequency', 'Workspace']))
+
+
+def views(snapshot) -> SnapshotViews:
+    """Представления текущего снапшота; новый снапшот — новые представления (старые уходят вместе с ним)."""
+    global _views
+    current = _views
+    if current is None or current.snapshot is not snapshot:
+        with _lock:
+            if _views is None or _views.snapshot is not snapshot:
+                _views = SnapshotViews(snapshot)
+            current = _views
+    return current
+
+
+# ----------------- прогрев -----------------
+def app_scripts(path=APP_PATH) -> list:
+    """Скрипт приложения и его страницы (app_pages/*.py)."""
+    pages = os.path.join(os.path.dirname(path), "app_pages")
+    return [path] + sorted(glob.glob(os.path.join(pages, "*.py")))
+
+
+def _import_app_modules(path=APP_PATH) -> int:
+    """Модули, которые импортируют скрипт и страницы (экспорт, импорт, pyarrow.parquet, ...) — до первого rerun."""
+    names = set()
+    for script in app_scripts(path):
+        with open(script, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=script)
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                names.update(a.name for a in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.add(node.module)
+    # таблица эмодзи Streamlit грузится при первом set_page_config(page_icon=...) — ~0.25 с первому пользователю
+    names.add('streamlit.emojis')
+    for name in sorted(names):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass   # необязательная зависимость: приложение обработает её отсутствие само
+    return len(names)
+
+
+def status() -> dict:
+    out = dict(_status, steps=dict(_status['steps']))
+    out['ready'] = out['state'] == 'ready'
+    return out
+
+
+def ready() -> bool:
+    return _status['state'] == 'ready'
+
+
+def warm_up() -> dict:
+    """Построить всё, что первый пользователь иначе ждал бы в своём rerun. Повторный вызов — ничего не делает."""
+    with _warmup_lock:
+        if _status['state'] == 'ready':
+            return status()
+        started = time.perf_counter()
+        _status.update(state='warming', started_at=time.time(), steps={}, error=None)
+
+        def step(name, fn):
+            t = time.perf_counter()
+            result = fn()
+            _status['steps'][name] = round(time.perf_counter() - t, 3)
+            return result
+
+        try:
+            step('imports', _import_app_modules)
+            snapshot = step('data', lambda: data_store().get())
+            v = views(snapshot)
+            step('lake_index', lambda: (v.lake_names, v.lake_summary))
+            step('analytics', lambda: v.analysis)
+            step('charts', lambda: v.charts)
+            api = start_json_api()
+            if api is not None:
+                step('json_api', lambda: api.api.respond('/lakes'))
+            _status.update(state='ready', version=snapshot.version)
+        except Exception as e:
+            _status.update(state='failed', error=f"{type(e).__name__}: {e}")
+        _status['seconds'] = round(time.perf_counter() - started, 3)
+        return status()
+
+
+def ensure_warm():
+    """На каждом rerun: дёшево, если прогрев уже был (serve.py); иначе первый rerun прогревает процесс."""
+    if _status['state'] != 'ready':
+        warm_up()
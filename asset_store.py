@@ -0,0 +1,158 @@
+# asset_store.py
+# ---------------------------
+# Картинки из текстов Lakes хранятся по хэшу содержимого, а не в ячейках таблицы
+# - при записи [IMAGE:data:image/png;base64,...] (или голый base64 картинки) заменяется на [IMAGE:asset:<sha256>]
+# - один и тот же скриншот в нескольких папках хранится один раз
+# - файлы: <папка>/<hash[:2]>/<hash>; запись атомарная, повторная запись того же хэша ничего не делает
+# - чтение — через LRU в памяти процесса (ограничен по байтам)
+# ---------------------------
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from shared_cache import _atomic_write
+from validation import ASSET_HASH_PATTERN, IMAGE_PATTERN, IMAGE_TEXT_COLUMNS, INLINE_BASE64_PATTERN
+
+ASSET_PREFIX = "asset:"
+ASSET_CACHE_BYTES = 64 * 1024 * 1024
+_SIGNATURES = ((b'\x89PNG\r\n\x1a\n', 'png'), (b'\xff\xd8\xff', 'jpeg'), (b'GIF87a', 'gif'), (b'GIF89a', 'gif'),
+               (b'BM', 'bmp'))
+
+
+def image_format(data: bytes) -> str | None:
+    for signature, fmt in _SIGNATURES:
+        if data.startswith(signature):
+            return fmt
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def decode_inline_image(ref: str) -> bytes | None:
+    """Байты картинки из data:image/...;base64,... или голого base64; None — ссылка не встроенная картинка."""
+    ref = ref.strip()
+    if ref.startswith('data:'):
+        header, _, payload = ref.partition(',')
+        if ';base64' not in header:
+            return None
+    elif INLINE_BASE64_PATTERN.match(ref):
+        payload = ref
+    else:
+        return None
+    try:
+        data = base64.b64decode(re.sub(r'\s+', '', payload), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return data if image_format(data) else None
+
+
+def asset_hash(ref: str) -> str | None:
+    """'asset:<sha256>' -> sha256; иначе None."""
+    ref = ref.strip()
+    if not ref.startswith(ASSET_PREFIX):
+        return None
+    digest = ref[len(ASSET_PREFIX):]
+    return digest if ASSET_HASH_PATTERN.match(digest) else None
+
+
+class AssetStore:
+    def __init__(self, directory, cache_bytes: int = ASSET_CACHE_BYTES):
+        self.directory = directory
+        self.cache_bytes = cache_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._lru_bytes = 0
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, data)
+        return digest
+
+    def get(self, digest: str) -> bytes | None:
+        with self._lock:
+            data = self._lru.get(digest)
+            if data is not None:
+                self._lru.move_to_end(digest)
+                return data
+        try:
+            with open(self.path(digest), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if digest not in self._lru and len(data) <= self.cache_bytes:
+                self._lru[digest] = data
+                self._lru_bytes += len(data)
+                while self._lru_bytes > self.cache_bytes:
+                    self._lru_bytes -= len(self._lru.popitem(last=False)[1])
+        return data
+
+    # ----------------- вынос картинок из текстов -----------------
+    def externalize(self, text: str) -> tuple:
+        """-> (текст со ссылками [IMAGE:asset:...], сколько картинок вынесено)."""
+        if not isinstance(text, str) or '[IMAGE:' not in text:
+            return text, 0
+        moved = 0
+
+        def replace(m):
+            nonlocal moved
+            data = decode_inline_image(m.group(1))
+            if data is None:
+                return m.group(0)
+            moved += 1
+            return f"[IMAGE:{ASSET_PREFIX}{self.put(data)}]"
+
+        return IMAGE_PATTERN.sub(replace, text), moved
+
+    def externalize_frame(self, df: pd.DataFrame | None, columns=IMAGE_TEXT_COLUMNS) -> tuple:
+        """-> (таблица без встроенных картинок, сколько картинок вынесено). Без картинок — та же таблица."""
+        if df is None:
+            return df, 0
+        out, moved = df, 0
+        for c in columns:
+            if c not in df.columns:
+                continue
+            # тексты повторяются на строках лейка/папки — каждый уникальный текст разбирается один раз
+            codes, uniques = pd.factorize(df[c], use_na_sentinel=True)
+            replaced = {}
+            for i, text in enumerate(uniques):
+                new_text, n = self.externalize(text)
+                if n:
+                    replaced[i] = new_text
+                    moved += n
+            if not replaced:
+                continue
+            values = np.array(uniques, dtype=object)
+            for i, new_text in replaced.items():
+                values[i] = new_text
+            changed = np.isin(codes, list(replaced))
+            if out is df:
+                out = df.copy()
+            # остальные ячейки (пустые в том числе) — как были
+            out[c] = df[c].astype(object).mask(changed, pd.Series(values[np.maximum(codes, 0)], index=df.index))
+        return out, moved
+
+    def externalize_row(self, row: dict, columns=IMAGE_TEXT_COLUMNS) -> dict:
+        out = dict(row)
+        for c in columns:
+            if c in out:
+                out[c] = self.externalize(out[c])[0]
+        return out
@@ -0,0 +1,477 @@
+# benchmarks.py
+# ---------------------------
+# Замеры производительности на синтетических данных (Streamlit не нужен)
+#   python benchmarks.py memory --rows 200000   — в т.ч. длинные тексты по запросу из общего кэша (LongTextStore)
+#   python benchmarks.py api --rows 50000 --seconds 5 --clients 4
+#   python benchmarks.py validate --rows 1000000
+#   python benchmarks.py links --links 200      — проверка ссылок на локальном сервере (медленные, редиректы, 404, обрывы)
+#   python benchmarks.py history --rows 20000 --saves 60   — размер истории версий и время восстановления
+#   python benchmarks.py editor --rows 200000   — данные редактора: вся таблица против среза лейк / папка
+#   python benchmarks.py xlsx --rows 100000     — запись локальной книги: pd.ExcelWriter против потоковой записи
+#   python benchmarks.py saves --rows 5000 --sessions 16   — одновременные правки книги: каждая сессия пишет
+#                                                свою таблицу целиком против очереди писателя (local_writer.py)
+#   python benchmarks.py append --rows 100 100000   — отправка формы «Додати запис» целиком (без st.*)
+# ---------------------------
+
+import argparse
+import http.client
+import io
+import multiprocessing
+import time
+
+import numpy as np
+import pandas as pd
+
+from compact_frame import compact_lakes_table, frame_memory_bytes
+
+
+def make_synthetic_lakes(n_rows: int, n_lakes: int = 40, folders_per_lake: int = 25, seed: int = 42,
+                         via_csv: bool = True) -> pd.DataFrame:
+    """Таблица Lakes той же формы, что в Google Sheets: длинные тексты повторяются на каждой строке лейка/папки."""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n_rows)
+    lake_ids = i % n_lakes
+    folder_ids = rng.integers(folders_per_lake, size=n_rows)
+    lakes = np.array([f"Lakehouse_{k:03d}" for k in range(n_lakes)], dtype=object)
+    folders = np.array([f"Folder_{k:02d}" for k in range(folders_per_lake)], dtype=object)
+    lake_info = [f"Lakehouse {k}: " + "опис джерел, розкладу та відповідальних. " * 40 for k in range(n_lakes)]
+    changes = [f"Кроки оновлення {lakes[k]}/{folders[f]}: " + "запустити ноутбук, перевірити таблиці. " * 25
+               for k in range(n_lakes) for f in range(folders_per_lake)]
+
+    def pick(options):
+        return np.array(options, dtype=object)[rng.integers(len(options), size=n_rows)]
+
+    numbers = pd.Series(i).astype(str).str.zfill(7)
+    df = pd.DataFrame({
+        'LakeHouse': lakes[lake_ids],
+        # длинные тексты — category: каждый текст в памяти один раз, иначе 1M строк не помещаются в RAM
+        'Загальна інформація про лейк': pd.Categorical.from_codes(lake_ids, lake_info),
+        'Folder': folders[folder_ids],
+        'Element': "element_" + numbers,
+        'URL': "https://app.fabric.microsoft.com/groups/" + pd.Series(lakes[lake_ids]) + "/items/" + numbers,
+        'Type': pick(['Notebook', 'Pipeline', 'Dataflow', 'Semantic model']),
+        'Status': pick(['Active', 'Deprecated', 'In progress']),
+        'Workspace': np.array([f"WS_{k}" for k in range(7)], dtype=object)[i % 7],
+        'Update_Frequency': pick(['Daily', 'Weekly', 'Monthly']),
+        'Опис': "Елемент " + pd.Series(i).astype(str),
+        'Особливості': None,
+        'Внесення змін': pd.Categorical.from_codes(lake_ids * folders_per_lake + folder_ids, changes),
+    })
+    if not via_csv:
+        return df
+    # через CSV, как это делает загрузка из Google Sheets — те же dtypes, что в приложении
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    return pd.read_csv(buf)
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1024 / 1024:,.1f} MB"
+
+
+def bench_memory(rows: int):
+    raw = make_synthetic_lakes(rows)
+    compact = compact_lakes_table(raw)
+    raw_bytes = frame_memory_bytes(raw)
+    main_bytes = frame_memory_bytes(compact.main)
+    text_bytes = frame_memory_bytes(compact.text)
+
+    print(f"rows={rows:,} columns={raw.shape[1]} (compact main={compact.main.shape[1]}, text={compact.text.shape[1]})")
+    print(f"{'':28}{'before':>14}{'after':>14}")
+    print(f"{'table (main + text)':28}{_mb(raw_bytes):>14}{_mb(main_bytes + text_bytes):>14}")
+    print(f"{'list views (main only)':28}{_mb(raw_bytes):>14}{_mb(main_bytes):>14}")
+    print("dtypes after:", ", ".join(f"{c}={t}" for c, t in compact.main.dtypes.astype(str).items()))
+
+    # снапшот из общего кэша: тексты в памяти процесса — только строки открытого лейка / папки
+    import tempfile
+
+    from compact_frame import LongTextStore
+    from shared_cache import SharedSnapshotCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SharedSnapshotCache(tmp, lambda: {'lakes_df': compact.main, 'lakes_columns': compact.columns,
+                                                  'lakes_text': LongTextStore.from_frame(compact.text)})
+        data = cache.load()
+        main, store = data['lakes_df'], data['lakes_text']
+        lake = main.index[main['LakeHouse'] == main['LakeHouse'].iloc[0]]
+        folder = lake[main.loc[lake, 'Folder'] == main.at[lake[0], 'Folder']]
+        print(f"{'snapshot (main, texts on demand)':34}{_mb(frame_memory_bytes(main)):>8}")
+        for label, rows in (("open lake", lake), ("open lake, again (LRU)", lake), ("open folder", folder)):
+            t = time.perf_counter()
+            part = store.rows(rows)
+            print(f"{label:34}{_mb(frame_memory_bytes(part)):>8}{(time.perf_counter() - t) * 1000:>9.1f} ms  rows={len(part):,}")
+        del main, store, data, part
+
+
+def bench_validate(rows: int):
+    from validation import RULES, validate_lakes_table
+
+    df = make_synthetic_lakes(rows, via_csv=False)
+    # несколько заведомо плохих строк, чтобы правила находили нарушения
+    bad = df.index[::max(1, rows // 10)]
+    df.loc[bad, 'URL'] = "not a url"
+    key = ['LakeHouse', 'Folder', 'Element', 'Type']
+    df.loc[bad[1:], key] = df.loc[bad[:-1], key].to_numpy()
+
+    print(f"rows={rows:,} columns={df.shape[1]}")
+    for name, rule in RULES.items():
+        t = time.perf_counter()
+        found = sum(len(p) for p in rule(df))
+        print(f"{name:16}{time.perf_counter() - t:>8.2f} s  violations={found}")
+    t = time.perf_counter()
+    violations = validate_lakes_table(df)
+    print(f"{'total':16}{time.perf_counter() - t:>8.2f} s  violations={len(violations)}")
+
+
+def bench_history(rows: int, saves: int) -> bool:
+    import gzip
+    import tempfile
+
+    from version_history import VersionHistory, history_text
+
+    df = make_synthetic_lakes(rows)
+    rng = np.random.default_rng(7)
+    expected = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        history = VersionHistory(tmp)
+        t = time.perf_counter()
+        for k in range(saves):
+            op = k % 4
+            if op == 0:      # правка нескольких ячеек
+                df = df.copy()
+                df.loc[rng.choice(len(df), 5, replace=False), 'Опис'] = f"правка {k}"
+            elif op == 1:    # удаление строк
+                df = df.drop(index=df.index[rng.choice(len(df), 3, replace=False)]).reset_index(drop=True)
+            elif op == 2:    # вставка строк в середину
+                new = df.iloc[:2].copy()
+                new['Element'] = [f"new_{k}_a", f"new_{k}_b"]
+                df = pd.concat([df.iloc[:len(df) // 2], new, df.iloc[len(df) // 2:]], ignore_index=True)
+            else:            # переименование элемента (меняется ключ строки)
+                df = df.copy()
+                df.loc[int(rng.integers(len(df))), 'Element'] = f"renamed_{k}"
+            entry = history.record(df, 'bench', f"op{op}")
+            expected[entry['version']] = history_text(df).reset_index(drop=True)
+        record_time = (time.perf_counter() - t) / saves
+
+        full = len(gzip.compress(history_text(df).to_csv().encode("utf-8")))
+        versions = history.versions()
+        print(f"rows={rows:,} saves={saves} checkpoints={int((versions['kind'] == 'checkpoint').sum())}")
+        print(f"history on disk      {_mb(history.storage_bytes()):>12}")
+        print(f"full copy per save   {_mb(full * saves):>12}  ({_mb(full)} x {saves}, gzip)")
+        print(f"record               {record_time * 1000:>9.0f} ms/save")
+
+        ok = True
+        cold = VersionHistory(tmp)   # без кэша головы — честное восстановление с диска
+        for v in sorted({1, saves // 3, saves // 2, saves - 1, saves}):
+            t = time.perf_counter()
+            same = cold.table(v).equals(expected[v])
+            ok &= same
+            print(f"restore v{v:<5}        {(time.perf_counter() - t) * 1000:>9.0f} ms  {'ok' if same else 'MISMATCH'}")
+    return ok
+
+
+def bench_editor(rows: int):
+    from compact_frame import editor_rows, expand_lakes_table
+
+    compact = compact_lakes_table(make_synthetic_lakes(rows))
+    main, text, columns = compact.main, compact.text, compact.columns
+    lake = main['LakeHouse'].iloc[0]
+    in_lake = main['LakeHouse'] == lake
+    folder = main.loc[in_lake, 'Folder'].iloc[0]
+
+    def measure(label, build):
+        t = time.perf_counter()
+        frame = build()
+        elapsed = time.perf_counter() - t
+        # то, что уходит в браузер: st.data_editor сериализует таблицу в Arrow
+        payload = len(frame.to_csv(index=False).encode("utf-8"))
+        print(f"{label:28}{len(frame):>10,}{elapsed * 1000:>10.0f} ms{_mb(frame_memory_bytes(frame)):>12}{_mb(payload):>12}")
+
+    print(f"rows={rows:,}")
+    print(f"{'':28}{'rows':>10}{'build':>13}{'memory':>12}{'payload':>12}")
+    measure("full table", lambda: expand_lakes_table(main, text, columns))
+    measure("lake", lambda: editor_rows(main, text, columns, main.index[in_lake], 120)[0])
+    measure("lake / folder", lambda: editor_rows(main, text, columns, main.index[in_lake & (main['Folder'] == folder)], 120)[0])
+    measure("lake / folder, full texts", lambda: editor_rows(main, text, columns, main.index[in_lake & (main['Folder'] == folder)])[0])
+
+
+def bench_links(links: int):
+    from link_checker import LinkChecker
+    from link_test_server import start_link_test_server
+
+    server = start_link_test_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    expected = {"redirect": "ok", "loop": "error", "dead": "broken", "gone": "broken", "nohead": "ok",
+                "login": "auth", "drop": "error", "slow": "timeout"}
+    urls = {f"{base}/{kind}": state for kind, state in expected.items()}
+    urls.update({f"{base}/ok/{i}": "ok" for i in range(links)})
+    urls["not a url"] = "invalid"
+    urls["http://127.0.0.1:1/closed"] = "error"
+
+    checker = LinkChecker(timeout=1.0, workers=32, per_host=8, rate_per_host=1000)
+    t = time.perf_counter()
+    results = checker.check_many(urls)
+    cold = time.perf_counter() - t
+    t = time.perf_counter()
+    checker.check_many(urls)
+    warm = time.perf_counter() - t
+
+    wrong = {u: (s.state, urls[u]) for u, s in results.items() if s.state != urls[u]}
+    print(f"links={len(urls)} cold={cold:.2f} s warm (TTL cache)={warm * 1000:.1f} ms "
+          f"(послідовно ~{links * 0.02 + 3:.1f} s)")
+    for u, s in results.items():
+        if not u.startswith(f"{base}/ok/"):
+            print(f"  {u.replace(base, ''):28} {s.label():28} {s.state}")
+    print("mismatches:", wrong or "none")
+    checker.close()
+    server.shutdown()
+    return not wrong
+
+
+def _api_client(port, paths, seconds, headers, out):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    done, statuses = 0, {}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        conn.request("GET", paths[done % len(paths)], headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        done += 1
+    out.put((done, statuses))
+
+
+def bench_api(rows: int, seconds: float, clients: int):
+    from data_store import SharedDataStore
+    from json_api import start_in_background
+    from knowledge_core import snapshot_data
+
+    df = make_synthetic_lakes(rows)
+    store = SharedDataStore(lambda: snapshot_data(list(df['LakeHouse'].unique()), [], df, None, 'local'), ttl=3600)
+    store.get()
+    server = start_in_background(store, host="127.0.0.1", port=0)
+    port = server.server_address[1]
+    lake = df['LakeHouse'].iloc[0]
+    folder = df.loc[df['LakeHouse'] == lake, 'Folder'].iloc[0]
+    paths = ["/lakes", f"/lakes/{lake}/folders", f"/lakes/{lake}/folders/{folder}", "/search?q=element_00001&limit=20"]
+
+    # сервер — один процесс (один core под GIL), клиенты — отдельные процессы
+    for label, headers in (("200 + gzip", {"Accept-Encoding": "gzip"}), ("304 (If-None-Match)", None)):
+        if headers is None:
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            conn.request("GET", "/lakes")
+            resp = conn.getresponse()
+            resp.read()
+            headers = {"If-None-Match": resp.getheader("ETag")}
+            paths_run = ["/lakes"]
+        else:
+            paths_run = paths
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_api_client, args=(port, paths_run, seconds, headers, out))
+                 for _ in range(clients)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+        total = sum(r[0] for r in results)
+        statuses = {}
+        for _, st in results:
+            for k, v in st.items():
+                statuses[k] = statuses.get(k, 0) + v
+        print(f"{label:22} {total / seconds:>10,.0f} req/s  statuses={statuses}")
+    server.shutdown()
+
+
+def _xlsx_writer_run(writer: str, rows: int, path: str, out):
+    # отдельный процесс на каждый способ записи: пик RSS одного не маскирует другой
+    import gc
+    import knowledge_core as core
+    from load_test import rss_bytes
+
+    df = make_synthetic_lakes(rows)
+    gc.collect()
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")   # сбросить VmHWM: пик считается только для записи
+        reset = True
+    except OSError:
+        reset = False
+    before, _ = rss_bytes()
+    start = time.perf_counter()
+    if writer == "ExcelWriter":
+        with pd.ExcelWriter(path, engine='openpyxl', mode='w') as xw:
+            df.to_excel(xw, sheet_name='Lakes', index=False)
+    else:
+        core.write_workbook(path, {'Lakes': df})
+    elapsed = time.perf_counter() - start
+    _, peak = rss_bytes()
+    out.put((elapsed, (peak - before) if reset and peak and before else None, peak))
+
+
+def bench_xlsx(rows: int):
+    import os
+    import tempfile
+
+    print(f"rows={rows:,}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for writer in ("ExcelWriter", "write_workbook"):
+            path = os.path.join(tmp, f"{writer}.xlsx")
+            out = multiprocessing.Queue()
+            proc = multiprocessing.Process(target=_xlsx_writer_run, args=(writer, rows, path, out))
+            proc.start()
+            elapsed, extra, peak = out.get()
+            proc.join()
+            memory = f"+{_mb(extra)} RSS на запис" if extra is not None else f"пік RSS {_mb(peak or 0)}"
+            print(f"{writer:15} {elapsed:>7.2f} s  {memory:>26}  файл {_mb(os.path.getsize(path))}")
+            check = pd.read_excel(path, sheet_name='Lakes', engine='openpyxl', nrows=5)
+            assert list(check.columns)[:3] == ['LakeHouse', 'Загальна інформація про лейк', 'Folder'], check.columns
+
+
+def bench_saves(rows: int, sessions: int) -> bool:
+    """Все сессии правят разные строки одной и той же (устаревшей) таблицы одновременно."""
+    import os
+    import tempfile
+    import threading
+    import knowledge_core as core
+
+    base = make_synthetic_lakes(rows, via_csv=False).astype(object)
+    print(f"rows={rows:,} sessions={sessions}")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("write_excel", "local_writer"):
+            path = os.path.join(tmp, f"{mode}.xlsx")
+            core.write_excel(base, path)
+            core.local_writer(path).on_flush = None   # без записи в историю версий пользователя
+
+            def session(i):
+                table = base.copy()
+                table.loc[i, 'Опис'] = f"edit-{i}"
+                if mode == "write_excel":
+                    core.write_excel(table, path)
+                else:
+                    core.save_excel(table, path, base=base, note=f"сесія {i}")
+
+            threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            saved = pd.read_excel(path, sheet_name='Lakes', engine='openpyxl', usecols=['Опис'])['Опис']
+            kept = int(saved.astype(str).str.startswith("edit-").sum())
+            writes = core.local_writer(path).metrics()['flushes'] if mode == "local_writer" else sessions
+            print(f"{mode:13} {elapsed:>7.2f} s  записів книги {writes:>3}  збережено правок {kept}/{sessions}")
+            ok &= mode == "write_excel" or kept == sessions
+    return ok
+
+
+def bench_append(sizes, appends: int):
+    """
+    Отправка формы «Додати запис» целиком, без st.*: проверка строки, строка в журнал книги, версия в истории,
+    хвост снапшота (этого процесса и общего кэша). Для сравнения — первое чтение lakes_df после дозаписи
+    (rerun страницы: хвост вливается в таблицу, одна копия на версию).
+    """
+    import os
+    import tempfile
+
+    import app_state
+    import knowledge_core as core
+    from data_store import SharedDataStore
+    from shared_cache import SharedSnapshotCache
+    from validation import validate_lakes_table
+
+    print(f"appends={appends}")
+    print(f"{'rows':>10}{'first':>10}{'median':>10}{'max':>10}{'checkpoints':>13}{'lakes_df read':>15}")
+    history_dir = core.HISTORY_DIR
+    for rows in sizes:
+        df = make_synthetic_lakes(rows)
+        data = core.snapshot_data(list(df['LakeHouse'].unique()), [], df, None, 'local')
+        with tempfile.TemporaryDirectory() as tmp:
+            core.HISTORY_DIR = os.path.join(tmp, "history")
+            book = os.path.join(tmp, "LakeHouse.xlsx")
+            core.write_excel(df.head(0), book)
+            cache = SharedSnapshotCache(os.path.join(tmp, "cache"), lambda: data, ttl=300)
+            app_state._shared_cache = cache
+            app_state._data_store = store = SharedDataStore(cache.load, ttl=300, generation=cache.generation)
+            core.version_history().record(df, 'local', "бенчмарк")   # історія вже є — як після збереження
+            snap = store.get()
+            times, reads = [], []
+            for k in range(appends):
+                row = {c: '' for c in snap.lakes_columns}
+                row.update(LakeHouse="Lakehouse_new", Folder="Folder_new", Element=f"new_{k}", Type="Notebook",
+                           URL=f"https://example.com/new/{k}")
+                t = time.perf_counter()
+                violations = validate_lakes_table(pd.DataFrame([row], index=[len(snap.lakes_df)]),
+                                                  rules=['duplicate_key', 'url'], known_keys=snap.known_keys)
+                assert violations.empty, violations
+                core.append_row_to_journal(row, book)
+                core.record_appended_row(row, 'local', f"додано {k}")
+                snap = app_state.publish_append(row)
+                times.append(time.perf_counter() - t)
+                t = time.perf_counter()
+                snap.lakes_df
+                reads.append(time.perf_counter() - t)
+            checkpoints = int((core.version_history().versions()['kind'] == 'checkpoint').sum()) - 1
+            ms = np.array(times) * 1000
+            print(f"{rows:>10,}{ms[0]:>8.1f}ms{np.median(ms[1:]):>8.1f}ms{ms.max():>8.1f}ms{checkpoints:>13}"
+                  f"{np.median(reads) * 1000:>13.1f}ms")
+    core.HISTORY_DIR = history_dir
+    app_state.reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Knowledge Transfer App benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("memory", help="память таблицы Lakes до/после компактного представления")
+    p.add_argument("--rows", type=int, default=200_000)
+    p = sub.add_parser("api", help="пропускна здатність JSON API (json_api.py) на одному процесі")
+    p.add_argument("--rows", type=int, default=50_000)
+    p.add_argument("--seconds", type=float, default=5)
+    p.add_argument("--clients", type=int, default=4)
+    p = sub.add_parser("validate", help="час повної перевірки таблиці Lakes (validation.py)")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p = sub.add_parser("links", help="перевірка посилань (link_checker.py) на локальному тестовому сервері")
+    p.add_argument("--links", type=int, default=200)
+    p = sub.add_parser("history", help="історія версій (version_history.py): розмір на диску та відновлення")
+    p.add_argument("--rows", type=int, default=20_000)
+    p.add_argument("--saves", type=int, default=60)
+    p = sub.add_parser("editor", help="дані редактора: вся таблиця проти зрізу лейк / папка")
+    p.add_argument("--rows", type=int, default=200_000)
+    p = sub.add_parser("xlsx", help="запис локальної книги: pd.ExcelWriter проти потокового write_workbook")
+    p.add_argument("--rows", type=int, default=100_000)
+    p = sub.add_parser("saves", help="одночасні збереження локальної книги: запис цілком проти черги писаря")
+    p.add_argument("--rows", type=int, default=5_000)
+    p.add_argument("--sessions", type=int, default=16)
+    p = sub.add_parser("append", help="відправка форми «Додати запис» цілком: 100 рядків проти 100 000")
+    p.add_argument("--rows", type=int, nargs="+", default=[100, 100_000])
+    p.add_argument("--appends", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    if args.bench == "memory":
+        bench_memory(args.rows)
+    elif args.bench == "api":
+        bench_api(args.rows, args.seconds, args.clients)
+    elif args.bench == "validate":
+        bench_validate(args.rows)
+    elif args.bench == "links":
+        if not bench_links(args.links):
+            raise SystemExit(1)
+    elif args.bench == "editor":
+        bench_editor(args.rows)
+    elif args.bench == "xlsx":
+        bench_xlsx(args.rows)
+    elif args.bench == "saves":
+        if not bench_saves(args.rows, args.sessions):
+            raise SystemExit(1)
+    elif args.bench == "append":
+        bench_append(args.rows, args.appends)
+    elif args.bench == "history":
+        if not bench_history(args.rows, args.saves):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# bulk_import.py
+# ---------------------------
+# Массовый импорт CSV/XLSX в таблицу Lakes со слиянием по ключу
+# - файл читается чанками (CSV — read_csv(chunksize), XLSX — openpyxl read_only), целиком в память не грузится
+# - строки сопоставляются с уже сохранёнными по хэшу ключа (LakeHouse, Folder, Element, Type);
+#   Type — только если он есть и в таблице, и в файле (upsert без него отклоняется, см. import_key_columns)
+# - режим: upsert — новые добавить, изменённые обновить; insert — только новые; update — только обновить
+# - одинаковые строки пропускаются; повтор того же файла (та же контрольная сумма) не импортируется
+# - результат — одна итоговая таблица: её записывают одним вызовом (Google Sheets или Excel)
+# ---------------------------
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from schema import normalize_lakes_frame
+from validation import KEY_COLUMNS, REQUIRED_COLUMNS, key_hashes
+
+IMPORT_CHUNK_ROWS = 10_000
+CHECKSUM_BLOCK = 1024 * 1024
+
+IMPORT_MODES = {
+    'upsert': 'Додати нові й оновити наявні',
+    'insert': 'Лише нові рядки',
+    'update': 'Лише оновити наявні',
+}
+
+
+@dataclass
+class ImportResult:
+    table: pd.DataFrame | None = None   # итоговая таблица для записи (None — писать нечего)
+    checksum: str = ""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0                    # не подходят под режим или без обязательных полей
+    duplicates: int = 0                 # повтор ключа внутри самого файла (берётся последняя строка)
+    already_imported: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return self.inserted > 0 or self.updated > 0
+
+    def summary(self) -> dict:
+        return {'inserted': self.inserted, 'updated': self.updated, 'unchanged': self.unchanged,
+                'skipped': self.skipped, 'duplicates': self.duplicates,
+                'already_imported': self.already_imported, 'checksum': self.checksum[:12]}
+
+
+# ----------------- чтение файла -----------------
+def file_checksum(fileobj) -> str:
+    """sha256 содержимого; fileobj — путь или файловый объект (позиция возвращается в начало)."""
+    h = hashlib.sha256()
+    if isinstance(fileobj, (str, os.PathLike)):
+        with open(fileobj, "rb") as f:
+            for block in iter(lambda: f.read(CHECKSUM_BLOCK), b""):
+                h.update(block)
+        return h.hexdigest()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(CHECKSUM_BLOCK), b""):
+        h.update(block)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+
+def detect_format(name: str) -> str:
+    ext = os.path.splitext(str(name))[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.xlsx', '.xlsm'):
+        return 'xlsx'
+    raise ValueError(f"Непідтримуваний формат файлу: {ext or name}")
+
+
+def _xlsx_chunks(fileobj, chunk_rows, sheet='Lakes'):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet in wb.sheetnames else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        buf = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buf.append(row[:len(columns)])
+            if len(buf) >= chunk_rows:
+                yield pd.DataFrame(buf, columns=columns)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=columns)
+    finally:
+        wb.close()
+
+
+def iter_import_chunks(fileobj, fmt: str, chunk_rows: int = IMPORT_CHUNK_ROWS):
+    """Чанки входного файла как DataFrame (значения — строки/числа как в файле)."""
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    if fmt == 'csv':
+        # как при чтении Google Sheets — тот же pd.read_csv, только чанками
+        yield from pd.read_csv(fileobj, chunksize=chunk_rows, encoding='utf-8-sig')
+    elif fmt == 'xlsx':
+        yield from _xlsx_chunks(fileobj, chunk_rows)
+    else:
+        raise ValueError(f"Непідтримуваний формат: {fmt}")
+
+
+# ----------------- журнал импортов -----------------
+class ImportLedger:
+    """Контрольные суммы уже применённых файлов (JSON рядом с локальными данными)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, checksum: str):
+        return self._read().get(checksum)
+
+    def record(self, checksum: str, meta: dict):
+        entries = self._read()
+        entries[checksum] = {'at': time.strftime('%Y-%m-%d %H:%M:%S'), **meta}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+
+# ----------------- слияние -----------------
+def _as_text(df: pd.DataFrame) -> pd.DataFrame:
+    # сравнение значений без учёта типа ячейки: 1 == '1', NaN == ''
+    df = df.astype(object)
+    return df.where(df.notna(), '').astype(str).apply(lambda s: s.str.strip())
+
+
+def _last_per_key(parts, columns) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    keys = np.concatenate([k for k, _ in parts])
+    rows = pd.concat([r for _, r in parts], ignore_index=True).reindex(columns=columns).astype(object)
+    rows.index = keys
+    return rows[~rows.index.duplicated(keep='last')]
+
+
+def import_key_columns(base_columns, file_columns, mode: str = 'upsert') -> list:
+    """
+    Ключ слияния: LakeHouse / Folder / Element и колонки KEY_COLUMNS сверх них, которые есть и в таблице, и в файле.
+    Колонки, которой нет в файле, в ключе нет: её '' не совпал бы ни с одной строкой таблицы.
+    upsert с файлом без такой колонки отклоняется — по неполному ключу он обновил бы не ту строку или добавил дубль.
+    """
+    missing = [c for c in KEY_COLUMNS[3:] if c in base_columns and c not in file_columns]
+    if missing and mode == 'upsert':
+        raise ValueError(f"У файлі немає колонки ключа {', '.join(missing)}: додайте її або імпортуйте в режимі "
+                         f"«{IMPORT_MODES['update']}» / «{IMPORT_MODES['insert']}» (зіставлення за LakeHouse / Folder / Element)")
+    return list(KEY_COLUMNS[:3]) + [c for c in KEY_COLUMNS[3:] if c in base_columns and c in file_columns]
+
+
+def merge_import(existing: pd.DataFrame | None, chunks, mode: str = 'upsert', checksum: str = "",
+                 ledger: ImportLedger | None = None, force: bool = False) -> ImportResult:
+    """
+    Слить чанки импорта с existing (полная таблица Lakes в исходном виде).
+    Ничего не пишет: результат — ImportResult.table, её сохраняют одним вызовом.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Невідомий режим імпорту: {mode}")
+    result = ImportResult(checksum=checksum)
+    if ledger is not None and checksum and not force and ledger.get(checksum):
+        result.already_imported = True
+        return result
+
+    existing = existing if existing is not None else pd.DataFrame(columns=list(KEY_COLUMNS[:3]))
+    base = existing.reset_index(drop=True)
+    key_cols = None
+
+    update_parts, insert_parts = [], []   # части чанков: (позиции в base | хэши ключей, строки)
+    columns = list(base.columns)
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        # те же синонимы колонок и типы, что и при загрузке таблицы
+        chunk = normalize_lakes_frame(chunk)
+        if key_cols is None:
+            # колонки у всех чанков одного файла одни — ключ определяет первый
+            key_cols = import_key_columns(base.columns, chunk.columns, mode)
+            base_hashes = key_hashes(base, key_cols)
+            # если в таблице уже есть повторы ключа — обновляется первая из строк
+            first = ~pd.Index(base_hashes).duplicated()
+            base_index = pd.Index(base_hashes[first])
+            base_pos = np.flatnonzero(first)
+        for c in chunk.columns:
+            if c not in columns:
+                columns.append(c)
+        complete = np.logical_and.reduce([
+            chunk[c].notna().to_numpy() & (chunk[c].astype(str).str.strip() != '').to_numpy()
+            if c in chunk.columns else np.zeros(len(chunk), dtype=bool)
+            for c in REQUIRED_COLUMNS])
+        result.skipped += int((~complete).sum())
+        chunk = chunk[complete]
+        if chunk.empty:
+            continue
+
+        hashes = key_hashes(chunk, key_cols)
+        loc = base_index.get_indexer(hashes)
+        known = loc >= 0
+
+        if mode in ('upsert', 'update') and known.any():
+            incoming = chunk[known]
+            positions = base_pos[loc[known]]
+            shared = [c for c in incoming.columns if c in base.columns]
+            before = _as_text(base.loc[positions, shared]).to_numpy()
+            after = _as_text(incoming[shared]).to_numpy()
+            # пустая ячейка импорта значение не стирает; новая колонка — всегда изменение
+            differs = ((after != '') & (before != after)).any(axis=1)
+            new_cols = [c for c in incoming.columns if c not in base.columns]
+            if new_cols:
+                differs |= (_as_text(incoming[new_cols]).to_numpy() != '').any(axis=1)
+            result.unchanged += int((~differs).sum())
+            if differs.any():
+                update_parts.append((positions[differs], incoming[differs]))
+        elif known.any():
+            result.skipped += int(known.sum())
+
+        if mode in ('upsert', 'insert') and (~known).any():
+            insert_parts.append((hashes[~known], chunk[~known]))
+        elif (~known).any():
+            result.skipped += int((~known).sum())
+
+    # повтор ключа внутри файла: побеждает последняя строка
+    updates = _last_per_key(update_parts, columns)
+    inserts = _last_per_key(insert_parts, columns)
+    result.updated, result.inserted = len(updates), len(inserts)
+    result.duplicates = sum(len(rows) for _, rows in update_parts + insert_parts) - len(updates) - len(inserts)
+    if not result.changed:
+        return result
+
+    table = base.reindex(columns=columns).astype(object)
+    if len(updates):
+        # пустая ячейка импорта значение не стирает
+        filled = _as_text(updates).to_numpy() != ''
+        current = table.loc[updates.index, columns].to_numpy()
+        table.loc[updates.index, columns] = np.where(filled, updates.to_numpy(), current)
+    if len(inserts):
+        table = pd.concat([table, inserts.reset_index(drop=True)], ignore_index=True)
+    result.table = table
+    return result
+
+
+def import_file(existing, fileobj, name: str, mode: str = 'upsert', ledger: ImportLedger | None = None,
+                force: bool = False, chunk_rows: int = IMPORT_CHUNK_ROWS) -> ImportResult:
+    """Контрольная сумма -> чанки -> слияние. fileobj — путь или файловый объект (UploadedFile)."""
+    checksum = file_checksum(fileobj)
+    fmt = detect_format(name)
+    if isinstance(fileobj, (str, os.PathLike)):
+        with open(fileobj, "rb") as f:
+            return merge_import(existing, iter_import_chunks(f, fmt, chunk_rows), mode, checksum, ledger, force)
+    return merge_import(existing, iter_import_chunks(fileobj, fmt, chunk_rows), mode, checksum, ledger, force)
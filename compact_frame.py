@@ -0,0 +1,316 @@
+# compact_frame.py
+# ---------------------------
+# Компактное представление таблицы Lakes в памяти
+# - низкокардинальные колонки (LakeHouse, Folder, Status, ...) -> category
+# - полностью пустые колонки выбрасываются (имена сохраняются, чтобы не потерять их при записи)
+# - длинные тексты ('Загальна інформація про лейк', 'Внесення змін') живут отдельно от основной таблицы;
+#   в снапшоте — LongTextStore: строки читаются по запросу (лейк / папка), перед чтением LRU
+# ---------------------------
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+from schema import CATEGORY, CATEGORY_MAX_RATIO, LONG_TEXT, columns_of_kind
+
+LOW_CARDINALITY_COLUMNS = columns_of_kind(CATEGORY)
+LONG_TEXT_COLUMNS = columns_of_kind(LONG_TEXT)
+
+# средняя длина строки, начиная с которой колонка считается "длинным текстом"
+LONG_TEXT_MIN_AVG_LEN = 200
+# LRU длинных текстов: число запомненных срезов и наибольший срез, который запоминается (экспорт — мимо кэша)
+LONG_TEXT_CACHE_SIZE = 128
+LONG_TEXT_CACHE_MAX_ROWS = 10_000
+
+
+@dataclass(frozen=True)
+class CompactTable:
+    main: pd.DataFrame      # короткие колонки, category где выгодно
+    text: pd.DataFrame      # длинные тексты, тот же индекс что и main
+    columns: tuple          # исходный порядок колонок, включая выброшенные пустые
+
+
+def _is_text(s: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)
+
+
+def _should_categorize(s: pd.Series, force: bool) -> bool:
+    if not _is_text(s):
+        return False
+    n = s.notna().sum()
+    if n == 0:
+        return False
+    return force or s.nunique(dropna=True) / n <= CATEGORY_MAX_RATIO
+
+
+def _is_long_text(name, s: pd.Series) -> bool:
+    if name in LONG_TEXT_COLUMNS:
+        return True
+    if not _is_text(s):
+        return False
+    values = s.dropna()
+    return not values.empty and values.astype(str).str.len().mean() >= LONG_TEXT_MIN_AVG_LEN
+
+
+def compact_lakes_table(df: pd.DataFrame | None) -> CompactTable | None:
+    if df is None:
+        return None
+    columns = tuple(df.columns)
+    non_empty = [c for c in columns if df[c].notna().any()]
+    long_cols = [c for c in non_empty if _is_long_text(c, df[c])]
+    short_cols = [c for c in non_empty if c not in long_cols]
+
+    main = pd.DataFrame(index=df.index)
+    for c in short_cols:
+        s = df[c]
+        main[c] = s.astype('category') if _should_categorize(s, c in LOW_CARDINALITY_COLUMNS) else s
+
+    text = pd.DataFrame(index=df.index)
+    for c in long_cols:
+        # один и тот же текст повторяется на каждой строке лейка/папки — category хранит его один раз
+        s = df[c]
+        text[c] = s.astype('category') if _should_categorize(s, False) else s
+    return CompactTable(main=main, text=text, columns=columns)
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Отпечаток содержимого (значения + индекс + имена колонок) — сравнение без хранения второй копии."""
+    h = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class LongTextStore:
+    """
+    Длинные тексты Lakes отдельно от основной таблицы (тот же индекс строк).
+    read(positions, columns) -> DataFrame читает только нужные строки: из DataFrame в памяти или из Arrow-файла
+    общего кэша (shared_cache.py) — тогда тексты не грузятся вместе с таблицей, а читаются при открытии лейка / папки.
+    Строки, дописанные после загрузки (append_row), лежат в памяти, в tail.
+    """
+
+    def __init__(self, index, columns, read, digest: str | None = None, missing: dict | None = None, tail=None):
+        self.index = pd.Index(index)
+        self.base_columns = list(columns)
+        self._read = read
+        self._digest = digest
+        self._missing = dict(missing or {})
+        self.tail = tail if tail is not None else pd.DataFrame(columns=self.base_columns)
+        self.columns = self.base_columns + [c for c in self.tail.columns if c not in self.base_columns]
+        self._frame = None    # DataFrame-источник (from_frame) — для отпечатка
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "LongTextStore":
+        store = cls(df.index, df.columns, lambda positions, columns: df[columns].iloc[positions],
+                    missing=df.isna().sum().to_dict())
+        store._frame = df
+        return store
+
+    @property
+    def digest(self) -> str:
+        # для базовых строк; считается из DataFrame один раз, у Arrow-файла — записан в meta кэша
+        if self._digest is None:
+            self._digest = frame_digest(self._frame)
+        return self._digest
+
+    def __len__(self):
+        return len(self.index) + len(self.tail)
+
+    def rows(self, index, columns=None) -> pd.DataFrame:
+        """Тексты строк index (метки основной таблицы)."""
+        columns = [c for c in (self.columns if columns is None else columns) if c in self.columns]
+        index = pd.Index(index)
+        key = (tuple(index), tuple(columns)) if len(index) <= LONG_TEXT_CACHE_MAX_ROWS else None
+        if key is not None:
+            with self._lock:
+                hit = self._lru.get(key)
+                if hit is not None:
+                    self._lru.move_to_end(key)
+                    return hit.copy(deep=False)   # CoW: изменения у вызывающего не попадут в кэш
+        positions = self.index.get_indexer(index)
+        in_base = positions >= 0
+        base_cols = [c for c in columns if c in self.base_columns]
+        base = self._read(positions[in_base], base_cols) if base_cols else pd.DataFrame(index=range(int(in_base.sum())))
+        base = base.set_axis(index[in_base], axis=0).reindex(columns=columns)
+        if (~in_base).any():
+            base = pd.concat([base, self.tail.loc[index[~in_base]].reindex(columns=columns)]).loc[index]
+        for c in base.columns:
+            if isinstance(base[c].dtype, pd.CategoricalDtype):
+                # из файла приходит весь словарь текстов — оставляем только тексты этих строк
+                base[c] = base[c].cat.remove_unused_categories()
+        if key is not None:
+            with self._lock:
+                self._lru[key] = base
+                if len(self._lru) > LONG_TEXT_CACHE_SIZE:
+                    self._lru.popitem(last=False)
+        return base.copy(deep=False)
+
+    def value(self, index, column):
+        if column not in self.columns:
+            return None
+        value = self.rows([index], [column]).iat[0, 0]
+        return value if pd.notna(value) else None
+
+    def frame(self) -> pd.DataFrame:
+        """Все строки — для записи, экспорта и редактора всей таблицы."""
+        return self.rows(self.index.append(self.tail.index))
+
+    def missing_counts(self) -> dict:
+        """Пустые значения по колонкам без чтения текстов (для базовых строк счётчик известен заранее)."""
+        out = {c: int(self._missing.get(c, len(self.index) if c not in self.base_columns else 0)) for c in self.columns}
+        for c in self.tail.columns:
+            out[c] += int(self.tail[c].isna().sum())
+        return out
+
+    def append(self, tail: pd.DataFrame) -> "LongTextStore":
+        """Новый store с дописанными строками; базовые строки и их источник общие."""
+        store = LongTextStore(self.index, self.base_columns, self._read, self._digest, self._missing,
+                              pd.concat([self.tail.astype(object), tail.astype(object)]))
+        store._frame = self._frame
+        return store
+
+
+def text_rows(text, index, columns=None) -> pd.DataFrame | None:
+    """Длинные тексты строк index; text — LongTextStore или DataFrame."""
+    if text is None:
+        return None
+    if isinstance(text, LongTextStore):
+        return text.rows(index, columns)
+    cols = list(text.columns) if columns is None else [c for c in columns if c in text.columns]
+    return text.loc[index, cols]
+
+
+def expand_lakes_table(main: pd.DataFrame | None, text: pd.DataFrame | None = None, columns=()) -> pd.DataFrame | None:
+    """Полная таблица в исходном виде (object/str, все колонки по порядку) — для редактора, экспорта и записи."""
+    if main is None:
+        return None
+    full = pd.concat([main, text_rows(text, main.index)], axis=1) if text is not None and len(text.columns) else main.copy()
+    for c in full.columns:
+        if isinstance(full[c].dtype, pd.CategoricalDtype):
+            full[c] = full[c].astype(object)
+    order = list(columns) if columns else list(full.columns)
+    for c in order:
+        if c not in full.columns:
+            full[c] = None
+    return full[order]
+
+
+def text_value(text: pd.DataFrame | None, index, column):
+    """Длинный текст для одной строки основной таблицы (None, если колонки нет или значение пустое)."""
+    if isinstance(text, LongTextStore):
+        return text.value(index, column)
+    if text is None or column not in text.columns or index not in text.index:
+        return None
+    value = text.at[index, column]
+    return value if pd.notna(value) else None
+
+
+def with_text_columns(main_slice: pd.DataFrame, text: pd.DataFrame | None, columns) -> pd.DataFrame:
+    """Срез основной таблицы + нужные длинные колонки (только для строк среза)."""
+    cols = [c for c in columns if text is not None and c in text.columns]
+    if not cols:
+        return main_slice
+    return main_slice.join(text_rows(text, main_slice.index, cols))
+
+
+def _preview(s: pd.Series, chars: int) -> pd.Series:
+    # по уникальным значениям: текст лейка повторяется на каждой его строке
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    short = [v if len(str(v)) <= chars else str(v)[:chars].rstrip() + "…" for v in uniques]
+    return pd.Series(pd.Categorical.from_codes(codes, short), index=s.index).astype(object)
+
+
+def editor_rows(main: pd.DataFrame, text: pd.DataFrame | None, columns, index, preview_chars: int | None = None):
+    """
+    Строки index в исходном виде — для редактора (полная таблица не разворачивается).
+    preview_chars: длинные тексты обрезаются и возвращаются в readonly — редактировать их нельзя, пока не развёрнуты.
+    -> (DataFrame, readonly columns)
+    """
+    frame = expand_lakes_table(main.loc[index], text_rows(text, index), columns)
+    if preview_chars is None or text is None:
+        return frame, []
+    readonly = [c for c in frame.columns if c in text.columns]
+    for c in readonly:
+        frame[c] = _preview(frame[c], preview_chars)
+    return frame, readonly
+
+
+def merge_edited_rows(full: pd.DataFrame, original: pd.DataFrame, edited: pd.DataFrame, readonly=()) -> pd.DataFrame:
+    """
+    Правки среза -> полная таблица. Строки сопоставляются по метке строки снапшота (индексу):
+    метки из original нет в edited — строка удалена; метки нет в original — новая строка (встаёт после последней строки среза).
+    readonly-колонки (обрезанные тексты) берутся из full. Результат — с индексом 0..n-1.
+    """
+    edited = edited.reindex(columns=full.columns)
+    kept = edited.index.isin(original.index)
+    writable = [c for c in full.columns if c not in readonly]
+
+    out = full.astype(object)
+    updates = edited[kept]
+    if len(updates) and writable:
+        out.loc[updates.index, writable] = updates[writable].astype(object).to_numpy()
+    keep = ~full.index.isin(original.index.difference(edited.index))
+    inserts = edited[~kept].astype(object)
+    for c in readonly:
+        inserts[c] = None
+    if not len(inserts):
+        return out[keep].reset_index(drop=True)
+    last = full.index.get_indexer(original.index[-1:])
+    at = int(keep[:last[0] + 1].sum()) if len(last) and last[0] >= 0 else int(keep.sum())
+    out = out[keep]
+    return pd.concat([out.iloc[:at], inserts, out.iloc[at:]], ignore_index=True)
+
+
+def frame_memory_bytes(df: pd.DataFrame | None) -> int:
+    return 0 if df is None else int(df.memory_usage(deep=True).sum())
+
+
+def append_compact_rows(main: pd.DataFrame, text: pd.DataFrame | None, rows, columns=()):
+    """
+    Дописать строки (dict) в компактную таблицу, сохранив category и разбиение main/text.
+    Индекс продолжает индекс main. Возвращает новые (main, text).
+    """
+    rows = list(rows)
+    text = text if text is not None else pd.DataFrame(index=main.index)
+    start = int(main.index.max()) + 1 if len(main) else 0
+    tail = pd.DataFrame(rows, index=pd.RangeIndex(start, start + len(rows)))
+
+    def _extend(frame: pd.DataFrame) -> pd.DataFrame:
+        out = {}
+        for c in frame.columns:
+            base = frame[c]
+            add = tail[c] if c in tail.columns else pd.Series([None] * len(tail), index=tail.index)
+            if isinstance(base.dtype, pd.CategoricalDtype):
+                # новые значения дописываются в конец категорий — коды существующих строк не меняются
+                new_values = [v for v in add.dropna().unique() if v not in base.cat.categories]
+                if new_values:
+                    base = base.cat.add_categories(new_values)
+                add = pd.Series(pd.Categorical(add, dtype=base.dtype), index=tail.index)
+            elif add.dtype != base.dtype:
+                try:
+                    add = add.astype(base.dtype)
+                except (TypeError, ValueError):
+                    pass
+            out[c] = pd.concat([base, add])
+        return pd.DataFrame(out, index=frame.index.append(tail.index))
+
+    if isinstance(text, LongTextStore):
+        # тексты новых строк — в tail store: базовые строки остаются в своём источнике
+        text_cols = [c for c in tail.columns if c in text.columns or (c in LONG_TEXT_COLUMNS and c not in main.columns)]
+        new_main, new_text = _extend(main), text.append(tail[text_cols])
+    else:
+        new_main, new_text = _extend(main), _extend(text)
+    # колонки, которых не было в компактной таблице (например, раньше полностью пустые)
+    for c in tail.columns:
+        if c not in new_main.columns and c not in new_text.columns and tail[c].notna().any():
+            target = new_text if c in LONG_TEXT_COLUMNS else new_main
+            target[c] = tail[c].reindex(target.index)
+    if columns:
+        order = [c for c in columns if c in new_main.columns]
+        new_main = new_main[order + [c for c in new_main.columns if c not in order]]
+    return new_main, new_text
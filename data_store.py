@@ -0,0 +1,319 @@
+# data_store.py
+# ---------------------------
+# Общее (на процесс) версионированное хранилище данных Lakes/Reports
+# - один неизменяемый снапшот для всех сессий Streamlit
+# - stale-while-revalidate: устаревший снапшот отдаётся сразу, обновление идёт в одном фоновом потоке
+# - номер версии растёт только при изменении данных, сессии сравнивают его и не перечитывают источник
+# - число запросов к источнику не зависит от числа активных пользователей
+# - между процессами сервера снапшот делится через shared_cache.py (loader + generation)
+# - publish(): write-through после записи — записанные данные сразу становятся новой версией,
+#   источник сверяется с ними фоновой проверкой позже (read-your-writes без перечитывания и пауз);
+#   Snapshot.unconfirmed — записанное или дописанное ещё не сверено: читать сам источник (gviz) рано
+# - append_row(): строка — в хвост снапшота; хвост живёт, пока источник не вернёт строку (не дольше ttl),
+#   хвосты других процессов приходят от loader() (shared_cache.py, ключ lakes_tail)
+# ---------------------------
+
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from compact_frame import LongTextStore, append_compact_rows
+from validation import KEY_COLUMNS, key_hashes
+
+
+@dataclass(frozen=True, eq=False)
+class Snapshot:
+    """Неизменяемый срез данных. Датафреймы общие для всех сессий — не мутировать, только копировать."""
+    version: int
+    base_lakes_names: tuple
+    reports_names: tuple
+    base_lakes_df: pd.DataFrame | None
+    reports_df: pd.DataFrame | None
+    source: str = "empty"            # 'google_sheets' | 'local' | 'empty'
+    loaded_at: float = 0.0           # time.monotonic() последней успешной проверки источника
+    errors: tuple = field(default_factory=tuple)
+    base_lakes_text: LongTextStore | None = None  # длинные тексты Lakes (см. compact_frame), тот же индекс
+    lakes_columns: tuple = ()                     # исходный порядок колонок Lakes
+    lakes_tail: tuple = ()           # строки, дописанные append_row после загрузки (dict), ещё не в base_*
+    tail_until: float = 0.0          # time.time(): не подтверждённый источником хвост после этого отбрасывается
+    written_until: float = 0.0       # time.time(): до этого base_* — записанное publish(), источник его ещё не вернул
+    # производные базы (base_*), общие для всех версий с той же базой: replace() передаёт тот же dict
+    base_cache: dict = field(default_factory=dict, repr=False)
+
+    # Дописанные строки вливаются в таблицу лениво: один раз на версию, при первом чтении lakes_df,
+    # и результат общий для всех сессий. Сам append_row — O(1), но это первое чтение после него — O(n):
+    # append_compact_rows копирует все колонки (и хвост store текстов). Одна копия на версию, а не на сессию.
+    @cached_property
+    def _lakes_frames(self):
+        if not self.lakes_tail or self.base_lakes_df is None:
+            return self.base_lakes_df, self.base_lakes_text
+        return append_compact_rows(self.base_lakes_df, self.base_lakes_text, self.lakes_tail, self.lakes_columns)
+
+    @property
+    def lakes_df(self) -> pd.DataFrame | None:
+        return self._lakes_frames[0]
+
+    @property
+    def lakes_text(self) -> LongTextStore | None:
+        return self._lakes_frames[1]
+
+    @cached_property
+    def lakes_names(self) -> tuple:
+        if not self.lakes_tail:
+            return self.base_lakes_names
+        return self.base_lakes_names + tuple(r.get('LakeHouse') for r in self.lakes_tail if r.get('LakeHouse'))
+
+    @property
+    def unconfirmed(self) -> bool:
+        """Записанное или дописанное ещё не сверено с источником — он может отдавать прежние строки."""
+        now = time.time()
+        return now < self.written_until or (bool(self.lakes_tail) and now < self.tail_until)
+
+    def known_keys(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Ключ (KEY_COLUMNS) какой строки df уже есть в снапшоте. Хэши ключей базы — один раз на базу
+        (множество переживает дозаписи), хвост — каждый раз: он короткий. Таблица не разворачивается.
+        """
+        keys = self.base_cache.get('keys')
+        if keys is None:
+            base = self.base_lakes_df
+            keys = frozenset() if base is None else frozenset(key_hashes(base, KEY_COLUMNS).tolist())
+            self.base_cache['keys'] = keys
+        tail = set(key_hashes(pd.DataFrame(list(self.lakes_tail)), KEY_COLUMNS).tolist()) if self.lakes_tail else set()
+        return np.array([h in keys or h in tail for h in key_hashes(df, KEY_COLUMNS).tolist()], dtype=bool)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.lakes_df is None or self.lakes_df.empty
+
+
+EMPTY_SNAPSHOT = Snapshot(version=0, base_lakes_names=(), reports_names=(), base_lakes_df=None, reports_df=None)
+
+
+def _frames_equal(a: pd.DataFrame | None, b: pd.DataFrame | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, LongTextStore) or isinstance(b, LongTextStore):
+        # тексты не читаем: сравниваем отпечатки содержимого
+        return (isinstance(a, LongTextStore) and isinstance(b, LongTextStore) and not len(a.tail) and not len(b.tail)
+                and a.digest == b.digest)
+    return a.shape == b.shape and list(a.columns) == list(b.columns) and a.equals(b)
+
+
+def unconfirmed_rows(rows, lakes_df: pd.DataFrame | None) -> tuple:
+    """Дописанные строки, которых источник ещё не вернул (сравнение по ключу LakeHouse / Folder / Element / Type)."""
+    rows = tuple(rows)
+    if not rows or lakes_df is None or lakes_df.empty:
+        return rows
+    loaded = set(key_hashes(lakes_df, KEY_COLUMNS).tolist())
+    keys = key_hashes(pd.DataFrame(list(rows)), KEY_COLUMNS).tolist()
+    return tuple(r for r, k in zip(rows, keys) if k not in loaded)
+
+
+def merge_rows(rows, more) -> tuple:
+    """rows + строки more с ключами, которых в rows нет (хвост кэша и свой хвост процесса)."""
+    rows, more = tuple(rows), tuple(more)
+    if not rows or not more:
+        return rows or more
+    seen = set(key_hashes(pd.DataFrame(list(rows)), KEY_COLUMNS).tolist())
+    keys = key_hashes(pd.DataFrame(list(more)), KEY_COLUMNS).tolist()
+    return rows + tuple(r for r, k in zip(more, keys) if k not in seen)
+
+
+def _snapshot_from(data: dict, version: int, loaded_at: float, errors: tuple) -> Snapshot:
+    return Snapshot(
+        version=version,
+        base_lakes_names=tuple(data.get("lakes_names", ())),
+        reports_names=tuple(data.get("reports_names", ())),
+        base_lakes_df=data.get("lakes_df"),
+        reports_df=data.get("reports_df"),
+        source=data.get("source", "empty"),
+        loaded_at=loaded_at,
+        errors=errors,
+        base_lakes_text=data.get("lakes_text"),
+        lakes_columns=tuple(data.get("lakes_columns", ())),
+        written_until=data.get("written_until", 0.0),
+    )
+
+
+class SharedDataStore:
+    """
+    loader() -> dict с ключами lakes_names, reports_names, lakes_df, reports_df, source, errors
+    (и необязательно lakes_text, lakes_columns — компактное представление Lakes).
+    loader не должен обращаться к st.* — он выполняется и в фоновом потоке.
+    generation() — необязательный счётчик поколений общего кэша (shared_cache.py): если он изменился
+    с последней загрузки (запись в другом процессе), снапшот считается устаревшим.
+    """
+
+    def __init__(self, loader, ttl: float = 300, generation=None):
+        self._loader = loader
+        self.ttl = ttl
+        self._generation = generation
+        self._seen_generation = None
+        self._snapshot = EMPTY_SNAPSHOT
+        self._state_lock = threading.Lock()    # защищает _snapshot/_stale/_refreshing
+        self._load_lock = threading.Lock()     # single-flight: одновременно идёт только одна загрузка
+        self._last_load_started = float("-inf")
+        self._stale = True
+        self._refreshing = False
+        self._check_at = float("inf")          # publish(): когда сверить записанное с источником
+        self._published_at = float("-inf")
+        self._confirm_after = None             # append_row(confirm_after=...): как часто сверять хвост с источником
+        self.fetch_count = 0                   # сколько раз реально вызывали источник
+
+    # ----------------- чтение -----------------
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def peek(self) -> Snapshot:
+        """Текущий снапшот без проверки свежести и без загрузки."""
+        return self._snapshot
+
+    def get(self) -> Snapshot:
+        snap = self._snapshot
+        if snap.loaded_at == 0.0:
+            # первая загрузка — синхронно; остальные сессии ждут её на _load_lock и берут готовый результат
+            with self._load_lock:
+                if self._snapshot.loaded_at == 0.0:
+                    self._last_load_started = time.monotonic()
+                    return self._load()
+            return self._snapshot
+        if self._is_stale(snap):
+            self._revalidate_in_background()
+        return snap
+
+    def _is_stale(self, snap: Snapshot) -> bool:
+        now = time.monotonic()
+        if self._stale or (now - snap.loaded_at) > self.ttl or now > self._check_at:
+            return True
+        return self._generation is not None and self._generation() != self._seen_generation
+
+    # ----------------- обновление -----------------
+    def invalidate(self):
+        """Пометить снапшот устаревшим: следующий get() отдаст текущий и запустит одно фоновое обновление."""
+        with self._state_lock:
+            self._stale = True
+
+    def refresh(self) -> Snapshot:
+        """
+        Синхронно перечитать источник. Если пока мы ждали блокировку, другой поток уже начал
+        загрузку после нашего вызова — просто возвращаем её результат (без повторного запроса).
+        """
+        requested_at = time.monotonic()
+        with self._load_lock:
+            if self._last_load_started >= requested_at:
+                return self._snapshot
+            self._last_load_started = time.monotonic()
+            return self._load()
+
+    def append_row(self, row: dict, confirm_after: float | None = None, generation: int | None = None) -> Snapshot:
+        """
+        Добавить одну строку в текущий снапшот без перезагрузки и без копирования таблицы:
+        новая версия ссылается на те же датафреймы + короткий хвост строк.
+        Строка остаётся в хвосте, пока загрузка из источника не вернёт её (см. unconfirmed_rows), но не дольше ttl.
+        confirm_after — через сколько секунд сверить хвост с источником; generation — поколение общего кэша
+        после этой же дозаписи в нём (своя запись не считается чужим изменением).
+        """
+        with self._state_lock:
+            current = self._snapshot
+            new = replace(current, version=current.version + 1, lakes_tail=current.lakes_tail + (dict(row),),
+                          tail_until=time.time() + self.ttl)
+            self._snapshot = new
+            if confirm_after is not None:
+                self._confirm_after = confirm_after
+                self._check_at = min(self._check_at, time.monotonic() + confirm_after)
+            if generation is not None and self._seen_generation == generation - 1:
+                self._seen_generation = generation
+        return new
+
+    def publish(self, data: dict, confirm_after: float | None = None) -> Snapshot:
+        """
+        Write-through после успешной записи: data (как от loader()) — то, что записано, — сразу становится
+        новой версией, без чтения источника. Источник (он может ещё отдавать старые данные) сверяется
+        фоновой проверкой через confirm_after секунд (по умолчанию — через ttl); совпадёт — версия та же.
+        """
+        now = time.monotonic()
+        confirm_after = self.ttl if confirm_after is None else confirm_after
+        with self._state_lock:
+            current = self._snapshot
+            new = _snapshot_from(data, current.version + 1, now, tuple(data.get("errors", ())))
+            new = replace(new, written_until=max(new.written_until, time.time() + confirm_after))
+            self._snapshot = new
+            self._stale = False
+            self._check_at = now + confirm_after
+            self._published_at = now
+            if "generation" in data:
+                self._seen_generation = data["generation"]
+        return new
+
+    def _revalidate_in_background(self):
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            finally:
+                with self._state_lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="data-store-revalidate", daemon=True).start()
+
+    def _load(self) -> Snapshot:
+        started = self._last_load_started
+        self.fetch_count += 1
+        try:
+            data = self._loader()
+        except Exception as e:
+            data = {"lakes_df": None, "errors": (f"{type(e).__name__}: {e}",)}
+
+        current = self._snapshot
+        now = time.monotonic()
+        lakes_df = data.get("lakes_df")
+        errors = tuple(data.get("errors", ()))
+
+        if lakes_df is None and current.loaded_at:
+            # источник недоступен — продолжаем отдавать последний удачный снапшот
+            new = replace(current, loaded_at=now, errors=errors)
+        else:
+            # дописанные строки держим, пока источник их не вернёт: чтение могло опередить запись
+            # (но не дольше tail_until — строку могла стереть полная запись таблицы)
+            tail_until = max(data.get("tail_until", 0.0), current.tail_until)
+            tail = ()
+            if time.time() < tail_until:
+                tail = unconfirmed_rows(merge_rows(data.get("lakes_tail", ()), current.lakes_tail), lakes_df)
+            if (current.loaded_at and tail == current.lakes_tail and data.get("source") == current.source
+                    and _frames_equal(lakes_df, current.base_lakes_df)
+                    and _frames_equal(data.get("lakes_text"), current.base_lakes_text)
+                    and _frames_equal(data.get("reports_df"), current.reports_df)):
+                # данные не изменились — версия та же, сессиям нечего перестраивать
+                new = replace(current, loaded_at=now, errors=errors, written_until=data.get("written_until", 0.0))
+            else:
+                new = replace(_snapshot_from(data, current.version + 1, now, errors), lakes_tail=tail,
+                              tail_until=tail_until)
+
+        with self._state_lock:
+            if self._published_at >= started:
+                # пока шло чтение, снапшот заменила запись (publish) — она новее прочитанного
+                return self._snapshot
+            latest = self._snapshot
+            if latest is not current:
+                # append_row во время чтения: его строки переходят в хвост новой версии
+                appended = unconfirmed_rows(latest.lakes_tail[len(current.lakes_tail):], lakes_df)
+                new = replace(new, version=latest.version + 1, lakes_tail=merge_rows(new.lakes_tail, appended),
+                              tail_until=max(new.tail_until, latest.tail_until))
+            self._snapshot = new
+            self._stale = False
+            # хвост ещё не подтверждён — следующая сверка через confirm_after, а не через ttl
+            self._check_at = (now + self._confirm_after if new.lakes_tail and self._confirm_after is not None
+                              else float("inf"))
+            if "generation" in data:
+                self._seen_generation = data["generation"]
+        return new
@@ -0,0 +1,181 @@
+# export_engine.py
+# ---------------------------
+# Потоковый экспорт таблицы Lakes в CSV / XLSX / Parquet
+# - файл строится только по запросу (download_button с callable), а не на каждом rerun
+# - строки идут чанками: полная (расширенная) копия таблицы в памяти не собирается
+# - фильтр: один лейк, одна папка или результат поиска
+# - готовые файлы кэшируются на диске по (версия данных, формат, фильтр)
+# ---------------------------
+
+import hashlib
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from compact_frame import expand_lakes_table, text_rows
+
+try:
+    from openpyxl import Workbook
+    XLSX_AVAILABLE = True
+except ImportError:
+    XLSX_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_CHUNK_ROWS = 20_000
+
+EXPORT_FORMATS = {
+    'csv': {'label': 'CSV', 'ext': 'csv', 'mime': 'text/csv'},
+    'xlsx': {'label': 'Excel (xlsx)', 'ext': 'xlsx',
+             'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+    'parquet': {'label': 'Parquet', 'ext': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+
+def available_formats():
+    return [f for f in EXPORT_FORMATS
+            if (f != 'xlsx' or XLSX_AVAILABLE) and (f != 'parquet' or PARQUET_AVAILABLE)]
+
+
+@dataclass(frozen=True)
+class ExportScope:
+    lake: str | None = None
+    folder: str | None = None
+    search: str | None = None
+
+    def key(self) -> str:
+        raw = f"{self.lake}\x1f{self.folder}\x1f{(self.search or '').strip().lower()}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+    def file_stem(self) -> str:
+        parts = ["lakes_data"] + [p for p in (self.lake, self.folder) if p]
+        if self.search and self.search.strip():
+            parts.append("search")
+        return "_".join(str(p).replace(" ", "_").replace("/", "_") for p in parts)
+
+
+def select_rows(main: pd.DataFrame, scope: ExportScope) -> pd.Index:
+    """Индекс строк, попадающих в фильтр (векторно, по основной таблице без длинных текстов)."""
+    mask = pd.Series(True, index=main.index)
+    if scope.lake is not None and 'LakeHouse' in main.columns:
+        mask &= main['LakeHouse'] == scope.lake
+    if scope.folder is not None and 'Folder' in main.columns:
+        mask &= main['Folder'] == scope.folder
+    query = (scope.search or '').strip()
+    if query:
+        hit = pd.Series(False, index=main.index)
+        for c in main.columns:
+            hit |= main[c].astype(str).str.contains(query, case=False, regex=False, na=False)
+        mask &= hit
+    return main.index[mask.to_numpy()]
+
+
+def iter_export_chunks(main, text, columns, index, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Чанки в исходном виде таблицы (все колонки, без category) — по chunk_rows строк."""
+    for start in range(0, len(index), chunk_rows):
+        idx = index[start:start + chunk_rows]
+        yield expand_lakes_table(main.loc[idx], text_rows(text, idx), columns)
+
+
+def _write_csv(chunks, path, columns):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+        if header:
+            pd.DataFrame(columns=list(columns)).to_csv(f, index=False)
+
+
+def _write_xlsx(chunks, path, columns):
+    # write_only: строки сразу уходят в файл, объектная модель книги в памяти не строится
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Lakes")
+    ws.append(list(columns))
+    for chunk in chunks:
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append([None if (v is None or (isinstance(v, float) and pd.isna(v))) else v for v in row])
+    wb.save(path)
+
+
+def _write_parquet(chunks, path, columns):
+    schema = pa.schema([(str(c), pa.string()) for c in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            chunk = chunk.astype("string")
+            chunk.columns = [str(c) for c in chunk.columns]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+_WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'parquet': _write_parquet}
+
+
+def write_export(main, text, columns, fmt: str, path, scope: ExportScope = ExportScope(),
+                 chunk_rows: int = EXPORT_CHUNK_ROWS):
+    if fmt not in available_formats():
+        raise ValueError(f"Формат недоступний: {fmt}")
+    columns = list(columns) or list(main.columns) + ([] if text is None else list(text.columns))
+    index = select_rows(main, scope)
+    _WRITERS[fmt](iter_export_chunks(main, text, columns, index, chunk_rows), path, columns)
+    return len(index)
+
+
+class ExportCache:
+    """
+    Готовые файлы экспорта на диске: <версия>-<фильтр>.<ext>.
+    Один и тот же файл строится один раз, даже если его одновременно запросили несколько сессий.
+    """
+
+    def __init__(self, directory, keep_versions: int = 2):
+        self.directory = directory
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+        self._building = {}   # path -> Lock
+        os.makedirs(directory, exist_ok=True)
+        # номера версий начинаются заново в каждом процессе — старые файлы не переиспользуем
+        for name in os.listdir(directory):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    def path_for(self, version: int, fmt: str, scope: ExportScope) -> str:
+        return os.path.join(self.directory, f"{version}-{scope.key()}.{EXPORT_FORMATS[fmt]['ext']}")
+
+    def build(self, version: int, fmt: str, scope: ExportScope, main, text, columns) -> str:
+        path = self.path_for(version, fmt, scope)
+        with self._lock:
+            lock = self._building.setdefault(path, threading.Lock())
+        with lock:
+            if not os.path.exists(path):
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                os.close(fd)
+                try:
+                    write_export(main, text, columns, fmt, tmp, scope)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                self._prune(version)
+        return path
+
+    def read(self, version: int, fmt: str, scope: ExportScope, main, text, columns) -> bytes:
+        with open(self.build(version, fmt, scope, main, text, columns), "rb") as f:
+            return f.read()
+
+    def _prune(self, current_version: int):
+        for name in os.listdir(self.directory):
+            head = name.split("-", 1)[0]
+            if head.isdigit() and int(head) <= current_version - self.keep_versions:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
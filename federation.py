@@ -0,0 +1,169 @@
+# federation.py
+# ---------------------------
+# Таблицы Lakes отделов (другие Google Sheets, локальные книги) — рядом с основной таблицей
+# - список источников: JSON [{"name": "Фінанси", "sheets_id": "..."}, {"name": "HR", "excel": "D:/hr.xlsx", "ttl": 3600}]
+# - источники читаются параллельно (пул потоков), каждый — со своим кэшем на ttl секунд
+# - медленный источник не держит загрузку дольше timeout: берутся его прошлые данные (или он пропускается),
+#   а чтение продолжается в фоне и попадёт в следующую загрузку
+# - ошибка одного источника — строка в errors, остальные источники не затрагивает
+# - строки помечаются колонкой «Джерело»; строки отделов только для чтения — при записи отбрасываются
+# ---------------------------
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+
+import pandas as pd
+
+SOURCE_COLUMN = 'Джерело'
+PRIMARY_SOURCE = 'Основна таблиця'
+SOURCE_TTL = 300.0
+SOURCE_TIMEOUT = 15.0
+SOURCE_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    kind: str                 # 'sheets' | 'excel'
+    location: str             # ID таблицы Google Sheets или путь к книге
+    ttl: float = SOURCE_TTL
+
+
+@dataclass(frozen=True)
+class SourceResult:
+    source: Source
+    lakes_df: pd.DataFrame | None
+    loaded_at: float = 0.0    # time.time() последнего успешного чтения
+    error: str | None = None
+
+
+def read_sources_config(path) -> list:
+    """Источники отделов из JSON-файла. Нет файла — пустой список (только основная таблица)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return []
+    sources = []
+    for e in entries:
+        if e.get('sheets_id'):
+            kind, location = 'sheets', e['sheets_id']
+        elif e.get('excel'):
+            kind, location = 'excel', e['excel']
+        else:
+            raise ValueError(f"Джерело без sheets_id / excel: {e}")
+        name = str(e.get('name') or location)
+        if name == PRIMARY_SOURCE:
+            raise ValueError(f"Назва '{PRIMARY_SOURCE}' зарезервована за основною таблицею")
+        sources.append(Source(name, kind, location, float(e.get('ttl', SOURCE_TTL))))
+    return sources
+
+
+class FederatedLoader:
+    """
+    fetch(source) -> таблица Lakes источника. Один загрузчик на процесс:
+    кэш и незавершённые чтения общие для всех загрузок.
+    """
+
+    def __init__(self, fetch, max_workers: int = SOURCE_WORKERS, timeout: float = SOURCE_TIMEOUT):
+        self.fetch = fetch
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kt-source")
+        self._lock = threading.Lock()
+        self._cache = {}      # source -> SourceResult последнего успешного чтения
+        self._inflight = {}   # source -> Future
+
+    def _fetch(self, source: Source) -> SourceResult:
+        try:
+            result = SourceResult(source, self.fetch(source), time.time())
+            with self._lock:
+                self._cache[source] = result
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(source, None)
+
+    def submit(self, sources) -> dict:
+        """Запустить чтение устаревших источников; свежие берутся из кэша. -> {source: SourceResult | Future}."""
+        pending = {}
+        now = time.time()
+        with self._lock:
+            for source in sources:
+                cached = self._cache.get(source)
+                if cached is not None and now - cached.loaded_at < source.ttl:
+                    pending[source] = cached
+                elif source in self._inflight:
+                    pending[source] = self._inflight[source]
+                else:
+                    pending[source] = self._inflight[source] = self._pool.submit(self._fetch, source)
+        return pending
+
+    def collect(self, pending: dict) -> list:
+        """Результаты в порядке источников; общий срок ожидания — timeout на все источники сразу."""
+        deadline = time.monotonic() + self.timeout
+        results = []
+        for source, item in pending.items():
+            if isinstance(item, SourceResult):
+                results.append(item)
+                continue
+            try:
+                results.append(item.result(timeout=max(0.0, deadline - time.monotonic())))
+                continue
+            except FutureTimeout:
+                error = f"не відповіло за {self.timeout:.0f} с"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                cached = self._cache.get(source)
+            if cached is not None:
+                at = time.strftime('%H:%M', time.localtime(cached.loaded_at))
+                error += f" — показано дані від {at}"
+            results.append(SourceResult(source, cached.lakes_df if cached else None,
+                                        cached.loaded_at if cached else 0.0, error))
+        return results
+
+    def load(self, sources) -> list:
+        return self.collect(self.submit(sources))
+
+
+def tag_source(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    out = df.copy(deep=False)
+    out[SOURCE_COLUMN] = name
+    return out
+
+
+def merge_sources(primary: pd.DataFrame, results) -> pd.DataFrame:
+    """Основная таблица + таблицы отделов одной таблицей; колонки основной — первыми."""
+    frames = [tag_source(primary, PRIMARY_SOURCE)]
+    frames += [tag_source(r.lakes_df, r.source.name) for r in results if r.lakes_df is not None and not r.lakes_df.empty]
+    if len(frames) == 1:
+        return primary
+    return pd.concat(frames, ignore_index=True, sort=False)
+
+
+def own_mask(df: pd.DataFrame) -> pd.Series:
+    """Строки основной таблицы: метка PRIMARY_SOURCE или её нет (новые строки — пусто / NaN)."""
+    if SOURCE_COLUMN not in df.columns:
+        return pd.Series(True, index=df.index)
+    source = df[SOURCE_COLUMN].astype(object)
+    return source.isna() | (source == '') | (source == PRIMARY_SOURCE)
+
+
+def own_rows(df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Только строки основной таблицы (и новые, без метки), без колонки «Джерело» — то, что можно записать."""
+    if df is None or SOURCE_COLUMN not in df.columns:
+        return df
+    return df.loc[own_mask(df).to_numpy(dtype=bool)].drop(columns=SOURCE_COLUMN)
+
+
+def with_other_sources(own: pd.DataFrame, df: pd.DataFrame | None) -> pd.DataFrame:
+    """own — строки основной таблицы (например, только что записанные); строки отделов — из df, как в merge_sources."""
+    if df is None or SOURCE_COLUMN not in df.columns:
+        return own
+    others = df.loc[~own_mask(df).to_numpy(dtype=bool)]
+    if others.empty:
+        return own
+    return pd.concat([tag_source(own, PRIMARY_SOURCE), others], ignore_index=True, sort=False)
@@ -0,0 +1,182 @@
+# gviz_query.py
+# ---------------------------
+# Запросы к листу Lakes в Google Sheets через gviz tq — вид приложения читает только свои строки и колонки,
+# а не весь лист
+# - lake_summary(): select B, C, count(B) group by B, C — список лейков, папок и элементов (выбор лейка, «Всі лейки»)
+# - lake_rows(name): select * where B = '<лейк>' — строки одного открытого лейка
+# - columns(names): select <буквы> — подмножество колонок
+# - буквы колонок — из заголовка листа (select * limit 0), имена — через синонимы schema.py
+# - результат кэшируется по (поколение данных, запрос) на ttl секунд: после записи поколение общего кэша
+#   (shared_cache.py) меняется, и запросы читаются заново
+# - одинаковые запросы из разных сессий — одно чтение (single-flight по тексту запроса)
+# - после ошибки чтения тот же запрос RETRY_AFTER секунд сразу получает ту же ошибку (другие запросы — нет)
+# - stats(): сколько запросов реально ушло в Sheets и сколько байт скачано
+# ---------------------------
+
+import io
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+from schema import LAKE_COLUMN, coerce_frame, normalize_lakes_frame, resolve_columns
+
+QUERY_TTL = 300.0
+QUERY_TIMEOUT = 15.0
+# после ошибки чтения запрос не повторяется столько секунд — каждый rerun не ждёт таймаут заново
+RETRY_AFTER = 60.0
+FOLDER_COLUMN = 'Folder'
+
+
+def column_letter(i: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA."""
+    letters = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        letters = chr(ord('A') + r) + letters
+    return letters
+
+
+def quote_literal(value: str) -> str | None:
+    """Строковый литерал tq. В языке запросов нет экранирования: значение с обоими видами кавычек — None."""
+    value = str(value)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return None
+
+
+def _urlopen(url: str, timeout: float) -> bytes:
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return resp.read()
+
+
+class GvizLakeQueries:
+    """
+    base_url — CSV-адрес листа (knowledge_core.sheets_csv_url). generation() — поколение данных общего кэша:
+    пока оно то же, ответы на запросы берутся из кэша (не дольше ttl).
+    """
+
+    def __init__(self, base_url: str, generation=None, ttl: float = QUERY_TTL, timeout: float = QUERY_TIMEOUT,
+                 fetch=None):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self._generation = generation
+        self._fetch = fetch or _urlopen
+        self._lock = threading.Lock()
+        self._cache = {}          # tq -> (time.monotonic(), DataFrame)
+        self._cache_generation = None
+        self._inflight = {}       # tq -> threading.Lock — одно чтение на запрос
+        self._failures = {}       # tq -> (time.monotonic(), исключение) последней ошибки его чтения
+        self.queries = 0
+        self.bytes_fetched = 0
+
+    def url(self, tq: str) -> str:
+        # headers=1: первая строка — заголовок, даже если gviz решит иначе по типам значений
+        return f"{self.base_url}&headers=1&tq={urllib.parse.quote(tq)}"
+
+    # ----------------- кэш запросов -----------------
+    def _cached(self, tq: str):
+        generation = self._generation() if self._generation is not None else None
+        with self._lock:
+            if generation != self._cache_generation:
+                self._cache.clear()
+                self._cache_generation = generation
+            entry = self._cache.get(tq)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1], generation
+            return None, generation
+
+    def query(self, tq: str) -> pd.DataFrame:
+        """Ответ на запрос как таблица (колонки — подписи листа). Общий для сессий — не мутировать."""
+        df, _ = self._cached(tq)
+        if df is not None:
+            return df
+        with self._lock:
+            flight = self._inflight.setdefault(tq, threading.Lock())
+        with flight:
+            df, generation = self._cached(tq)
+            if df is not None:
+                return df
+            failure = self._failures.get(tq)
+            if failure is not None and time.monotonic() - failure[0] < RETRY_AFTER:
+                raise failure[1]
+            try:
+                data = self._fetch(self.url(tq), self.timeout)
+            except Exception as e:
+                self._failures[tq] = (time.monotonic(), e)
+                raise
+            self._failures.pop(tq, None)
+            df = pd.read_csv(io.BytesIO(data))
+            with self._lock:
+                self.queries += 1
+                self.bytes_fetched += len(data)
+                if generation == self._cache_generation:
+                    self._cache[tq] = (time.monotonic(), df)
+                self._inflight.pop(tq, None)
+            return df
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'queries': self.queries, 'bytes_fetched': self.bytes_fetched, 'cached': len(self._cache)}
+
+    # ----------------- колонки листа -----------------
+    def letters(self) -> dict:
+        """{каноническое имя колонки: буква в листе}."""
+        labels = list(self.query("select * limit 0").columns)
+        mapping = resolve_columns(labels)
+        out = {}
+        for i, label in enumerate(labels):
+            out.setdefault(mapping.get(label, label), column_letter(i))
+        return out
+
+    def _letter(self, column: str) -> str:
+        letter = self.letters().get(column)
+        if letter is None:
+            raise KeyError(f"Колонку '{column}' не знайдено на аркуші")
+        return letter
+
+    # ----------------- запросы видов -----------------
+    def lake_summary(self) -> pd.DataFrame:
+        """LakeHouse, Папок, Елементів — по строке на лейк, по алфавиту (group by в Sheets сортирует)."""
+        lake = self._letter(LAKE_COLUMN)
+        folder = self.letters().get(FOLDER_COLUMN)
+        if folder is None:
+            df = self.query(f"select {lake}, count({lake}) where {lake} is not null group by {lake}")
+            return df.set_axis([LAKE_COLUMN, 'Елементів'], axis=1).astype({LAKE_COLUMN: str})
+        df = self.query(f"select {lake}, {folder}, count({lake}) where {lake} is not null group by {lake}, {folder}")
+        df = df.set_axis([LAKE_COLUMN, FOLDER_COLUMN, 'n'], axis=1).astype({LAKE_COLUMN: str})
+        return df.groupby(LAKE_COLUMN, sort=True).agg(
+            Папок=(FOLDER_COLUMN, 'nunique'), Елементів=('n', 'sum')).reset_index()
+
+    def lake_names(self) -> list:
+        return list(self.lake_summary()[LAKE_COLUMN])
+
+    def lake_rows(self, name: str) -> pd.DataFrame:
+        """Все колонки строк одного лейка — приведённые к схеме, как при полной загрузке."""
+        lake = self._letter(LAKE_COLUMN)
+        literal = quote_literal(name)
+        if literal is None:
+            # имя не записать литералом tq — весь лист и фильтр на месте
+            df = normalize_lakes_frame(self.query("select *"))
+            return df[df[LAKE_COLUMN] == name]
+        return normalize_lakes_frame(self.query(f"select * where {lake} = {literal}"))
+
+    def columns(self, names) -> pd.DataFrame:
+        """Только колонки names (канонические имена; которых нет на листе — пропускаются)."""
+        letters = self.letters()
+        present = [n for n in names if n in letters]
+        if not present:
+            return pd.DataFrame(columns=[])
+        # имена известны — не через normalize_lakes_frame: без колонки LakeHouse он назвал бы так первую
+        df = self.query("select " + ", ".join(letters[n] for n in present))
+        return coerce_frame(df.set_axis(present, axis=1))
@@ -0,0 +1,246 @@
+# json_api.py
+# ---------------------------
+# Лёгкий read-only JSON API по метаданным лейков (для Teams-бота, Power BI, скриптов)
+#   GET /lakes                              — лейки: число папок/элементов
+#   GET /lakes/{name}/folders               — папки лейка + общая информация о лейке
+#   GET /lakes/{name}/folders/{folder}      — элементы папки + "Внесення змін"
+#   GET /search?q=...&limit=50              — поиск по элементам
+#   GET /version                            — текущая версия данных
+#   GET /ready                              — прогрев процесса закончен (200) или ещё идёт (503), см. app_state.py
+# Отдаёт тот же снапшот, что и приложение (SharedDataStore); ответы кэшируются по версии,
+# поддерживаются ETag/If-None-Match (304) и gzip.
+#   python json_api.py --port 8765          — отдельный процесс
+#   KT_API_PORT=8765 streamlit run knowledge_transfer.py — рядом с приложением, в том же процессе
+# Аутентификации нет — по умолчанию слушает только 127.0.0.1; наружу — явно: --host 0.0.0.0 / KT_API_HOST=0.0.0.0
+# ---------------------------
+
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from compact_frame import text_value
+
+RESPONSE_CACHE_SIZE = 2048
+SEARCH_LIMIT_MAX = 500
+GZIP_MIN_BYTES = 512
+# данные без аутентификации — только локально, если адрес не задан явно
+DEFAULT_HOST = "127.0.0.1"
+
+
+def _records(df: pd.DataFrame) -> list:
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict('records')
+
+
+class LakeIndex:
+    """Группировки снапшота (лейк -> папка -> строки), строятся один раз на версию."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        main = snapshot.lakes_df
+        self.main = main if main is not None else pd.DataFrame()
+        self.groups = {}
+        if {'LakeHouse', 'Folder'} <= set(self.main.columns):
+            for (lake, folder), idx in self.main.groupby(['LakeHouse', 'Folder'], observed=True, sort=False).groups.items():
+                self.groups.setdefault(str(lake), {})[str(folder)] = idx
+        elif 'LakeHouse' in self.main.columns:
+            for lake, idx in self.main.groupby('LakeHouse', observed=True, sort=False).groups.items():
+                self.groups.setdefault(str(lake), {})
+        self._haystack = None   # строка для поиска, строится при первом /search
+
+    def lakes(self):
+        return [{'name': lake,
+                 'folders': len(folders),
+                 'elements': int(sum(len(idx) for idx in folders.values()))}
+                for lake, folders in self.groups.items()]
+
+    def folders(self, lake):
+        folders = self.groups.get(lake)
+        if folders is None:
+            return None
+        first = next((idx[0] for idx in folders.values() if len(idx)), None)
+        info = text_value(self.snapshot.lakes_text, first, 'Загальна інформація про лейк') if first is not None else None
+        return {'lake': lake, 'info': info,
+                'folders': [{'name': f, 'elements': len(idx)} for f, idx in folders.items()]}
+
+    def folder(self, lake, folder):
+        idx = self.groups.get(lake, {}).get(folder)
+        if idx is None:
+            return None
+        rows = self.main.loc[idx]
+        changes = text_value(self.snapshot.lakes_text, idx[0], 'Внесення змін') if len(idx) else None
+        return {'lake': lake, 'folder': folder, 'changes': changes, 'elements': _records(rows)}
+
+    def search(self, query, limit):
+        if self._haystack is None:
+            # все короткие колонки через пробел, в нижнем регистре
+            parts = [self.main[c].astype(object).fillna('').astype(str) for c in self.main.columns]
+            self._haystack = pd.Series(
+                [' '.join(vals) for vals in zip(*parts)] if parts else [], index=self.main.index
+            ).str.lower()
+        hits = self._haystack[self._haystack.str.contains(query.lower(), regex=False)]
+        return {'query': query, 'total': int(len(hits)), 'results': _records(self.main.loc[hits.index[:limit]])}
+
+
+class JsonApi:
+    """Маршрутизация и кэш готовых ответов (тело, gzip-тело, ETag) по версии данных."""
+
+    def __init__(self, store, readiness=None):
+        self.store = store
+        self.readiness = readiness
+        self._lock = threading.Lock()
+        self._index = None
+        self._cache = OrderedDict()
+
+    def _current_index(self):
+        snap = self.store.get()
+        index = self._index
+        if index is None or index.snapshot is not snap:
+            with self._lock:
+                if self._index is None or self._index.snapshot is not snap:
+                    self._index = LakeIndex(snap)
+                    self._cache.clear()
+                index = self._index
+        return index
+
+    def _route(self, index, path, query):
+        parts = [unquote(p) for p in path.strip('/').split('/') if p]
+        if parts == ['version']:
+            return 200, {'version': index.snapshot.version, 'source': index.snapshot.source}
+        if parts == ['lakes']:
+            return 200, {'version': index.snapshot.version, 'lakes': index.lakes()}
+        if len(parts) == 3 and parts[0] == 'lakes' and parts[2] == 'folders':
+            body = index.folders(parts[1])
+            return (404, {'error': f"lake not found: {parts[1]}"}) if body is None else (200, body)
+        if len(parts) == 4 and parts[0] == 'lakes' and parts[2] == 'folders':
+            body = index.folder(parts[1], parts[3])
+            return (404, {'error': f"folder not found: {parts[1]}/{parts[3]}"}) if body is None else (200, body)
+        if parts == ['search']:
+            q = (query.get('q') or [''])[0].strip()
+            if not q:
+                return 400, {'error': "missing query parameter 'q'"}
+            try:
+                limit = min(int((query.get('limit') or ['50'])[0]), SEARCH_LIMIT_MAX)
+            except ValueError:
+                return 400, {'error': "invalid 'limit'"}
+            return 200, index.search(q, limit)
+        return 404, {'error': f"not found: {path}"}
+
+    def ready(self):
+        """-> (status, body_bytes). Без readiness (отдельный процесс) — готов, как только есть снапшот."""
+        state = self.readiness() if self.readiness is not None else {'ready': True, 'version': self.store.version}
+        return (200 if state.get('ready') else 503), json.dumps(state, ensure_ascii=False, default=str).encode('utf-8')
+
+    def respond(self, raw_path):
+        """-> (status, body_bytes, gzip_bytes | None, etag)"""
+        index = self._current_index()
+        key = (index.snapshot.version, raw_path)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        url = urlsplit(raw_path)
+        status, payload = self._route(index, url.path, parse_qs(url.query))
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        gz = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+        # ETag по содержимому: если ответ не изменился между версиями, клиент всё равно получит 304
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        entry = (status, body, gz, etag)
+        with self._lock:
+            self._cache[key] = entry
+            if len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return entry
+
+
+def _make_handler(api: JsonApi):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive
+        # заголовки и тело уходят одним сегментом, без задержки Nagle/delayed ACK
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            try:
+                if urlsplit(self.path).path.rstrip('/') == '/ready':
+                    # мимо кэша ответов и снапшота: во время прогрева store.get() ещё ждёт источник
+                    (status, body), gz, etag = api.ready(), None, None
+                else:
+                    status, body, gz, etag = api.respond(self.path)
+            except Exception as e:
+                status, body, gz, etag = 500, json.dumps({'error': str(e)}).encode('utf-8'), None, None
+
+            if etag and status == 200 and etag in self.headers.get('If-None-Match', ''):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            use_gzip = gz is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+            payload = gz if use_gzip else body
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            if etag:
+                self.send_header('ETag', etag)
+            if use_gzip:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_server(store, host=DEFAULT_HOST, port=8765, readiness=None) -> ThreadingHTTPServer:
+    api = JsonApi(store, readiness)
+    server = ThreadingHTTPServer((host, port), _make_handler(api))
+    server.daemon_threads = True
+    server.api = api
+    return server
+
+
+def start_in_background(store, host=DEFAULT_HOST, port=8765, readiness=None) -> ThreadingHTTPServer:
+    server = make_server(store, host, port, readiness)
+    threading.Thread(target=server.serve_forever, name="json-api", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    import os
+
+    import knowledge_core as core
+    from data_store import SharedDataStore
+    from shared_cache import SharedSnapshotCache
+
+    parser = argparse.ArgumentParser(description="Knowledge Transfer read-only JSON API")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="адреса для прослуховування; 0.0.0.0 — усі інтерфейси (API без автентифікації)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttl", type=float, default=300, help="секунд до фонового обновления данных")
+    args = parser.parse_args(argv)
+
+    # тот же снапшот на диске, что и у процессов Streamlit: источник не читается лишний раз
+    cache = SharedSnapshotCache(os.path.join(core.LOCAL_DATA_DIR, "shared_cache"), core.load_data_sources, ttl=args.ttl)
+    store = SharedDataStore(cache.load, ttl=args.ttl, generation=cache.generation)
+    store.get()
+    server = make_server(store, args.host, args.port)
+    print(f"JSON API: http://{args.host}:{args.port}/lakes (версія даних {store.version})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+# knowledge_core.py
+# ---------------------------
+# Ядро Knowledge Transfer App без Streamlit:
+# - конфиг (локальная папка, ID Google Sheets)
+# - чтение: Google Sheets (CSV через gviz) и локальный Excel (+ журнал дозаписи);
+#   таблицы отделов (federation.py) читаются параллельно с основной и добавляются к Lakes только для чтения
+# - запись: Google Sheets (gspread, через планировщик квоты sheets_scheduler.py) и локальный Excel; каждая запись — версия в истории (version_history.py)
+# - локальный Excel пишется потоково (openpyxl write_only) во временный файл и атомарно подменяет книгу;
+#   правки сессий идут через одного писателя книги (local_writer.py) и накладываются на её последнее состояние
+# - аналитика и проверка обязательных полей
+# Функции здесь ничего не показывают — при ошибке бросают исключение, UI/CLI решают, что с ним делать.
+# ---------------------------
+
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+from openpyxl import Workbook
+
+from asset_store import AssetStore
+from compact_frame import LongTextStore, compact_lakes_table
+from federation import SOURCE_COLUMN, FederatedLoader, merge_sources, own_rows, read_sources_config
+from local_writer import LocalWriter, LocalWriteResult
+from sheets_scheduler import SheetsScheduler
+from schema import DATE, LAKE_COLUMN, columns_of_kind, normalize_lakes_frame
+from validation import REQUIRED_COLUMNS
+from version_history import VersionHistory
+
+# ===== Google Sheets (запись) =====
+try:
+    import gspread
+    from google.oauth2.service_account import Credentials
+    GOOGLE_SHEETS_AVAILABLE = True
+    GS_IMPORT_ERROR = ""
+    SheetsAPIError = gspread.exceptions.APIError
+except Exception as e:
+    GOOGLE_SHEETS_AVAILABLE = False
+    GS_IMPORT_ERROR = str(e)
+
+    class SheetsAPIError(Exception):
+        pass
+
+# ==== CONFIG SECTION ====
+# Локальная папка для резервных сохранений
+LOCAL_DATA_DIR = os.path.join(os.path.expanduser("~"), "AppData", "Local", "StreamlitData")
+os.makedirs(LOCAL_DATA_DIR, exist_ok=True)
+EXCEL_FILE_PATH = os.path.join(LOCAL_DATA_DIR, "LakeHouse.xlsx")
+# контрольные суммы уже импортированных файлов (bulk_import.py)
+IMPORT_LEDGER_PATH = os.path.join(LOCAL_DATA_DIR, "imports.json")
+# история версий таблицы Lakes (version_history.py)
+HISTORY_DIR = os.path.join(LOCAL_DATA_DIR, "history")
+_version_histories = {}
+_version_histories_lock = threading.Lock()
+# картинки из текстов по хэшу содержимого (asset_store.py); у нескольких серверов — общая папка
+ASSETS_DIR = os.environ.get("KT_ASSETS_DIR") or os.path.join(LOCAL_DATA_DIR, "assets")
+_asset_store = None
+_asset_store_lock = threading.Lock()
+
+# Google Sheets ID (замени на свой при необходимости)
+GOOGLE_SHEETS_ID = "19Ge1PiHdeWt0mofW5YkxmectUchGcbclaHNim_XvmFM"
+
+
+def sheets_csv_url(sheets_id, sheet):
+    return f"https://docs.google.com/spreadsheets/d/{sheets_id}/gviz/tq?tqx=out:csv&sheet={sheet}"
+
+
+# Чтение из Google Sheets (CSV через gviz) — листы Lakes/Reports
+GOOGLE_SHEETS_URL_LAKES = sheets_csv_url(GOOGLE_SHEETS_ID, "Lakes")
+GOOGLE_SHEETS_URL_REPORTS = sheets_csv_url(GOOGLE_SHEETS_ID, "Reports")
+# таблицы отделов (federation.py): JSON-список источников; нет файла — только основная таблица
+SOURCES_CONFIG_PATH = os.environ.get("KT_SOURCES") or os.path.join(LOCAL_DATA_DIR, "sources.json")
+_federated_loader = None
+_federated_loader_lock = threading.Lock()
+
+CREDENTIALS_FILE_NAME = "service_account_credentials.json"
+# отметки времени запросов к Sheets API за последнюю минуту (sheets_scheduler.py)
+SHEETS_QUOTA_PATH = os.path.join(LOCAL_DATA_DIR, "sheets_quota.json")
+_sheets_scheduler = None
+_sheets_scheduler_lock = threading.Lock()
+_local_writers = {}
+_local_writers_lock = threading.Lock()
+
+
+# ----------------- Картинки -----------------
+def asset_store() -> AssetStore:
+    """Одно хранилище на процесс (общий LRU прочитанных картинок)."""
+    global _asset_store
+    with _asset_store_lock:
+        if _asset_store is None:
+            _asset_store = AssetStore(ASSETS_DIR)
+        return _asset_store
+
+
+def externalize_images(df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Встроенные base64-картинки -> [IMAGE:asset:<hash>]; вызывается перед каждой записью и при загрузке."""
+    return asset_store().externalize_frame(df)[0]
+
+
+# ----------------- Локальный Excel -----------------
+def append_journal_path(excel_path):
+    return os.path.splitext(excel_path)[0] + ".appends.jsonl"
+
+
+def read_append_journal(excel_path):
+    path = append_journal_path(excel_path)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_lakes_and_reports(excel_path):
+    xl = pd.ExcelFile(excel_path, engine='openpyxl')
+    available_sheets = xl.sheet_names
+
+    lakes_df = pd.read_excel(xl, 'Lakes', engine='openpyxl') if 'Lakes' in available_sheets else \
+               pd.read_excel(xl, available_sheets[0], engine='openpyxl')
+
+    reports_df = pd.read_excel(xl, 'Reports', engine='openpyxl') if 'Reports' in available_sheets else \
+                 pd.DataFrame()
+
+    # строки, добавленные формой после последней полной записи (журнал дозаписи)
+    journal_rows = read_append_journal(excel_path)
+    if journal_rows:
+        lakes_df = pd.concat([lakes_df, pd.DataFrame(journal_rows)], ignore_index=True)
+    lakes_df = normalize_lakes_frame(lakes_df)
+
+    # названия (уникальные)
+    lakes_names = list(lakes_df[LAKE_COLUMN].dropna().unique()) if LAKE_COLUMN in lakes_df.columns else []
+    reports_names = list(reports_df.iloc[:,0].dropna().unique()) if not reports_df.empty else []
+    return lakes_names, reports_names, lakes_df, reports_df
+
+
+def _xlsx_cell(v):
+    # NaN / NaT / pd.NA -> пустая ячейка
+    return None if v is None or (not isinstance(v, str) and pd.isna(v)) else v
+
+
+def write_workbook(filename, sheets: dict):
+    """
+    Книга xlsx из {лист: таблица}. write_only: строки сразу уходят в файл, объектная модель книги
+    в памяти не строится. Пишется во временный файл рядом, fsync, затем os.replace — прерванная запись
+    оставляет прежнюю книгу целой.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix=".xlsx.tmp")
+    os.close(fd)
+    try:
+        wb = Workbook(write_only=True)
+        for name, df in sheets.items():
+            ws = wb.create_sheet(name)
+            ws.append([str(c) for c in df.columns])
+            for row in df.itertuples(index=False, name=None):
+                ws.append([_xlsx_cell(v) for v in row])
+        wb.save(tmp)
+        with open(tmp, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return filename
+
+
+def write_default_excel(local_path):
+    default_data = {
+        'LakeHouse': [], 'Folder': [], 'Element': [], 'URL': [],
+        'Загальна інформація про лейк': [], 'Внесення змін': []
+    }
+    df = pd.DataFrame(default_data)
+    write_workbook(local_path, {'Lakes': df, 'Reports': df})
+
+
+def _write_excel(df, filename, reports_table=None):
+    sheets = {'Lakes': externalize_images(own_rows(df))}
+    if reports_table is not None and not reports_table.empty:
+        sheets['Reports'] = reports_table
+    write_workbook(filename, sheets)
+    # строки из журнала дозаписи уже вошли в df — журнал больше не нужен
+    journal = append_journal_path(filename)
+    if os.path.exists(journal):
+        os.remove(journal)
+    return filename
+
+
+def write_excel(df, filename, reports_table=None):
+    """Полная запись книги (df — вся таблица). Под блокировкой книги: не пересекается с очередью и журналом."""
+    with local_writer(filename).locked():
+        return _write_excel(df, filename, reports_table)
+
+
+def append_row_to_journal(row: dict, filename):
+    """Одна строка в локальное хранилище за O(1): дозапись в журнал рядом с Excel, без перезаписи книги."""
+    row = asset_store().externalize_row({k: v for k, v in row.items() if k != SOURCE_COLUMN})
+    journal = append_journal_path(filename)
+    # под блокировкой книги: полная запись не удалит журнал между чтением книги и этой строкой
+    with local_writer(filename).locked():
+        if not os.path.exists(filename):
+            write_default_excel(filename)
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    return journal
+
+
+# ----------------- Один писатель локальной книги (local_writer.py) -----------------
+def _read_workbook(filename) -> tuple:
+    if not os.path.exists(filename):
+        return pd.DataFrame(), pd.DataFrame()
+    return load_lakes_and_reports(filename)[2:]
+
+
+def local_writer(filename=EXCEL_FILE_PATH) -> LocalWriter:
+    """Один писатель на книгу в процессе; между процессами книгу делят через её файловую блокировку."""
+    key = os.path.abspath(filename)
+    with _local_writers_lock:
+        writer = _local_writers.get(key)
+        if writer is None:
+            writer = _local_writers[key] = LocalWriter(
+                filename,
+                load=lambda: _read_workbook(filename),
+                write=lambda df, reports: _write_excel(df, filename, reports),
+                on_flush=lambda df, previous, notes: record_version(df, 'local', "; ".join(notes), previous=previous))
+        return writer
+
+
+def save_excel(df, filename=EXCEL_FILE_PATH, reports_table=None, base=None, note="") -> LocalWriteResult:
+    """
+    Правка сессии -> книга. base — таблица, от которой шла правка: в книгу попадает только разница
+    (поверх правок других сессий); base=None — df заменяет таблицу целиком. Запись — через очередь писателя,
+    версия в истории — одна на пачку правок.
+    """
+    return local_writer(filename).save(own_rows(df), reports_table, base=own_rows(base), note=note)
+
+
+# ----------------- Чтение из Google Sheets (CSV) -----------------
+def load_from_google_sheets():
+    lakes_df = normalize_lakes_frame(pd.read_csv(GOOGLE_SHEETS_URL_LAKES))
+    try:
+        reports_df = pd.read_csv(GOOGLE_SHEETS_URL_REPORTS)
+    except Exception:
+        reports_df = pd.DataFrame()
+    lakes_names = list(lakes_df[LAKE_COLUMN].dropna()) if LAKE_COLUMN in lakes_df.columns else []
+    reports_names = list(reports_df.iloc[:,0].dropna()) if not reports_df.empty else []
+    return lakes_names, reports_names, lakes_df, reports_df
+
+
+# ----------------- Таблицы отделов (federation.py) -----------------
+def fetch_source(source) -> pd.DataFrame:
+    """Lakes одного источника отдела: Google Sheets (CSV через gviz) или локальная книга."""
+    if source.kind == 'sheets':
+        return normalize_lakes_frame(pd.read_csv(sheets_csv_url(source.location, "Lakes")))
+    return load_lakes_and_reports(source.location)[2]
+
+
+def federated_loader() -> FederatedLoader:
+    """Один загрузчик на процесс: кэш источников и их незавершённые чтения — общие."""
+    global _federated_loader
+    with _federated_loader_lock:
+        if _federated_loader is None:
+            _federated_loader = FederatedLoader(fetch_source)
+        return _federated_loader
+
+
+# ----------------- ЗАПИС в Google Sheets -----------------
+def sheets_scheduler() -> SheetsScheduler:
+    """Один планировщик на процесс; бюджет запросов в минуту — общий для всех процессов сервера."""
+    global _sheets_scheduler
+    with _sheets_scheduler_lock:
+        if _sheets_scheduler is None:
+            _sheets_scheduler = SheetsScheduler(state_path=SHEETS_QUOTA_PATH)
+        return _sheets_scheduler
+
+
+def get_gspread_client(service_account_info=None):
+    """
+    1) service_account_info (dict или JSON-строка; в приложении — st.secrets['gcp_service_account'])
+    2) иначе файл service_account_credentials.json (рядом со скриптом или в домашней папке)
+    """
+    if not GOOGLE_SHEETS_AVAILABLE:
+        raise RuntimeError(f"gspread/google-auth недоступны: {GS_IMPORT_ERROR}")
+
+    scopes = ["https://www.googleapis.com/auth/spreadsheets",
+              "https://www.googleapis.com/auth/drive"]
+
+    if service_account_info:
+        if isinstance(service_account_info, str):
+            service_account_info = json.loads(service_account_info)
+        creds = Credentials.from_service_account_info(dict(service_account_info), scopes=scopes)
+        return gspread.authorize(creds)
+
+    # файл JSON
+    here = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.path.join(here, CREDENTIALS_FILE_NAME),
+        os.path.join(os.path.expanduser("~"), CREDENTIALS_FILE_NAME)
+    ]
+    for path in candidates:
+        if os.path.exists(path):
+            creds = Credentials.from_service_account_file(path, scopes=scopes)
+            return gspread.authorize(creds)
+
+    raise FileNotFoundError("Не найден ключ сервис-аккаунта: положи JSON в st.secrets['gcp_service_account'] "
+                            "или файл service_account_credentials.json рядом со скриптом/в домашней папке.")
+
+
+def ensure_worksheet(sh, title, rows=1000, cols=50):
+    try:
+        return sh.worksheet(title)
+    except gspread.WorksheetNotFound:
+        return sh.add_worksheet(title=title, rows=rows, cols=cols)
+
+
+def sheet_values(df: pd.DataFrame | None) -> list:
+    """Заголовки + строки как текст: NaN -> '', даты — без времени (так таблица хранится в Google Sheets)."""
+    if df is None or df.empty:
+        return []
+    df = df.copy()
+    for c in columns_of_kind(DATE):
+        if c in df.columns and pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = df[c].dt.strftime('%Y-%m-%d')
+    return [[str(c) for c in df.columns]] + df.astype(object).fillna("").astype(str).values.tolist()
+
+
+def _replace_cells_request(sheet_id, values) -> dict:
+    # range без границ — весь лист: ячейки вне values очищаются (как clear + update, но одним действием)
+    return {'updateCells': {
+        'range': {'sheetId': sheet_id},
+        'rows': [{'values': [{'userEnteredValue': {'stringValue': v}} if v != "" else {} for v in row]}
+                 for row in values],
+        'fields': 'userEnteredValue'}}
+
+
+def write_google_sheets(df: pd.DataFrame, reports_table: pd.DataFrame | None = None, service_account_info=None):
+    """Lakes (и Reports) — одним spreadsheets.batchUpdate: 3 запроса к API вместо clear/update на каждый лист."""
+    df = externalize_images(own_rows(df))
+    gc = get_gspread_client(service_account_info)
+    scheduler = sheets_scheduler()
+    # ВАЖНО: поделись таблицей с client_email сервис-аккаунта (Editor)!
+    sh = scheduler.call(gc.open_by_key, GOOGLE_SHEETS_ID)
+    existing = {ws.title: ws for ws in scheduler.call(sh.worksheets)}
+    next_id = max((ws.id for ws in existing.values()), default=0) + 1
+
+    tables = [("Lakes", df)]
+    if reports_table is not None and not reports_table.empty:
+        tables.append(("Reports", reports_table))
+    requests = []
+    for title, table in tables:
+        values = sheet_values(table)
+        rows, cols = len(values), len(values[0]) if values else 0
+        ws = existing.get(title)
+        if ws is None:
+            sheet_id, next_id = next_id, next_id + 1
+            requests.append({'addSheet': {'properties': {
+                'sheetId': sheet_id, 'title': title,
+                'gridProperties': {'rowCount': max(1000, rows + 10), 'columnCount': max(20, cols + 2)}}}})
+        else:
+            sheet_id = ws.id
+            if rows > ws.row_count or cols > ws.col_count:
+                requests.append({'updateSheetProperties': {
+                    'properties': {'sheetId': sheet_id, 'gridProperties': {
+                        'rowCount': max(ws.row_count, rows + 10), 'columnCount': max(ws.col_count, cols + 2)}},
+                    'fields': 'gridProperties.rowCount,gridProperties.columnCount'}})
+        requests.append(_replace_cells_request(sheet_id, values))
+    scheduler.call(sh.batch_update, {'requests': requests})
+
+
+def append_row_google_sheets(row: dict, columns, service_account_info=None):
+    """Одна строка в конец листа Lakes (values.append) — без очистки и перезаписи всей таблицы."""
+    row = asset_store().externalize_row({k: v for k, v in row.items() if k != SOURCE_COLUMN})
+    columns = [c for c in columns if c != SOURCE_COLUMN]
+    gc = get_gspread_client(service_account_info)
+    scheduler = sheets_scheduler()
+    sh = scheduler.call(gc.open_by_key, GOOGLE_SHEETS_ID)
+    lakes_ws = scheduler.call(ensure_worksheet, sh, "Lakes", cols=max(20, len(columns)+2))
+
+    header = scheduler.call(lakes_ws.row_values, 1)
+    values = []
+    for col in (header or list(columns)):
+        v = row.get(col, "")
+        values.append("" if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+    rows = [values] if header else [list(columns), values]
+    scheduler.call(lakes_ws.append_rows, rows, value_input_option="RAW", table_range="A1")
+
+
+# ----------------- История версий -----------------
+def version_history(directory=None) -> VersionHistory:
+    """Одна история на папку в процессе: голова истории запоминается между записями (record_rows её не восстанавливает)."""
+    key = os.path.abspath(directory or HISTORY_DIR)
+    with _version_histories_lock:
+        history = _version_histories.get(key)
+        if history is None:
+            history = _version_histories[key] = VersionHistory(key)
+        return history
+
+
+def record_version(df: pd.DataFrame, source: str, note: str = "", previous: pd.DataFrame | None = None):
+    """Записать сохранённую таблицу в историю. previous — таблица до записи: станет первой версией, если истории ещё нет."""
+    history = version_history()
+    if previous is not None and history.head() is None:
+        history.record(externalize_images(own_rows(previous)), source, "до першого збереження")
+    return history.record(externalize_images(own_rows(df)), source, note)
+
+
+def record_appended_row(row: dict, source: str, note: str = "", previous=None):
+    """
+    Дописанная строка -> версия в истории (одна вставка поверх головы истории), как и любое сохранение.
+    previous — таблица до дозаписи или функция, которая её вернёт: нужна, только если истории ещё нет.
+    """
+    history = version_history()
+    if previous is not None and history.head() is None:
+        previous = previous() if callable(previous) else previous
+        history.record(externalize_images(own_rows(previous)), source, "до першого збереження")
+    # в том виде, в каком строка ушла в источник (append_row_google_sheets / append_row_to_journal)
+    row = asset_store().externalize_row({k: v for k, v in row.items() if k != SOURCE_COLUMN})
+    return history.record_rows([row], source, note)
+
+
+# ----------------- Загрузка для общего снапшота -----------------
+def snapshot_data(lakes_names, reports_names, lakes_df, reports_df, source, errors=()):
+    # Lakes храним компактно: category для повторяющихся строк, длинные тексты — отдельно;
+    # картинки, ещё встроенные в ячейки источника, — ссылками на хранилище (до следующей записи)
+    compact = compact_lakes_table(externalize_images(lakes_df))
+    return {'lakes_names': lakes_names, 'reports_names': reports_names,
+            'lakes_df': compact.main, 'lakes_text': LongTextStore.from_frame(compact.text), 'lakes_columns': compact.columns,
+            'reports_df': reports_df, 'source': source, 'errors': list(errors)}
+
+
+def written_data(lakes_df, reports_df, source):
+    """Снапшот сразу после записи lakes_df — как его вернул бы load_data_sources(), но без чтения источника."""
+    lakes_df = normalize_lakes_frame(lakes_df.reset_index(drop=True))
+    lakes_names = list(lakes_df[LAKE_COLUMN].dropna()) if LAKE_COLUMN in lakes_df.columns else []
+    reports_names = list(reports_df.iloc[:,0].dropna()) if reports_df is not None and not reports_df.empty else []
+    return snapshot_data(lakes_names, reports_names, lakes_df, reports_df, source)
+
+
+def _load_primary(excel_path, use_sheets, use_local, errors):
+    if use_sheets:
+        try:
+            lakes_names, reports_names, lakes_df, reports_df = load_from_google_sheets()
+            if lakes_df is not None and not lakes_df.empty:
+                return (lakes_names, reports_names, lakes_df, reports_df), 'google_sheets'
+        except Exception as e:
+            errors.append(f"Помилка завантаження з Google Sheets (читання): {e}")
+
+    if use_local and os.path.exists(excel_path):
+        try:
+            return load_lakes_and_reports(excel_path), 'local'
+        except Exception as e:
+            errors.append(f"Помилка при завантаженні файлу: {e}")
+    return None, 'empty'
+
+
+def load_data_sources(excel_path=EXCEL_FILE_PATH, use_sheets=True, use_local=True, sources=None):
+    """
+    Основная таблица: Google Sheets (CSV), иначе локальный Excel. Таблицы отделов (sources, по умолчанию —
+    SOURCES_CONFIG_PATH) читаются параллельно с ней и добавляются к Lakes. Ошибки возвращаем в 'errors', а не бросаем.
+    """
+    errors = []
+    try:
+        sources = read_sources_config(SOURCES_CONFIG_PATH) if sources is None else sources
+    except (OSError, ValueError) as e:
+        errors.append(f"Список джерел ({SOURCES_CONFIG_PATH}): {e}")
+        sources = []
+    pending = federated_loader().submit(sources) if sources else {}
+
+    loaded, source = _load_primary(excel_path, use_sheets, use_local, errors)
+    if loaded is None:
+        return {'lakes_df': None, 'source': 'empty', 'errors': errors}
+    lakes_names, reports_names, lakes_df, reports_df = loaded
+    if pending:
+        # основная таблица уже прочитана — ждём отделы не дольше их общего timeout
+        results = federated_loader().collect(pending)
+        errors += [f"Джерело '{r.source.name}': {r.error}" for r in results if r.error]
+        lakes_df = merge_sources(lakes_df, results)
+        lakes_names = list(lakes_names) + [n for r in results if r.lakes_df is not None and LAKE_COLUMN in r.lakes_df.columns
+                                           for n in r.lakes_df[LAKE_COLUMN].dropna().unique()]
+    return snapshot_data(lakes_names, reports_names, lakes_df, reports_df, source, errors)
+
+
+# ----------------- Аналитика и проверки (полная проверка таблицы — validation.py) -----------------
+def analyze_lakes_data(lakes_df: pd.DataFrame, text: LongTextStore | None = None):
+    """text — длинные тексты снапшота: для них только пропуски (счётчики store), сами тексты не читаются."""
+    if lakes_df is None or lakes_df.empty:
+        return {'total_lakes': 0, 'columns': [], 'missing_data': {}, 'unique_values': {}}
+    text_missing = text.missing_counts() if text is not None else {}
+    analysis = {
+        'total_lakes': len(lakes_df),
+        'columns': list(lakes_df.columns) + [c for c in text_missing if c not in lakes_df.columns],
+        'missing_data': {**{c: lakes_df[c].isna().sum() for c in lakes_df.columns}, **text_missing},
+        'unique_values': {}
+    }
+    for c in lakes_df.columns:
+        dtype = lakes_df[c].dtype
+        if dtype == 'object' or isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype):
+            analysis['unique_values'][c] = lakes_df[c].value_counts().to_dict()
+    return analysis
+
+
+def missing_required_fields(row: dict) -> list:
+    """Обязательные поля новой записи (LakeHouse, Folder, Element), которые не заполнены."""
+    return [c for c in REQUIRED_COLUMNS if not str(row.get(c) or '').strip()]
@@ -0,0 +1,260 @@
+# kt_cli.py
+# ---------------------------
+# CLI для базы знаний без запуска Streamlit (ночные задачи, скрипты)
+#   python kt_cli.py load [--source auto|sheets|local] [--json]
+#   python kt_cli.py analyze
+#   python kt_cli.py validate
+#   python kt_cli.py export --format csv|xlsx|parquet --out FILE [--lake L] [--folder F] [--search S]
+#   python kt_cli.py save --to local|sheets [--out FILE]
+#   python kt_cli.py links [--workers N] [--timeout S]
+#   python kt_cli.py import FILE [--mode upsert|insert|update] [--to local|sheets] [--force] [--dry-run]
+#   python kt_cli.py history [--diff A B] [--restore N --to local|sheets]
+# Код возврата: 0 — ок (предупреждения не считаются), 1 — найдены ошибки/нет данных, 2 — ошибка записи
+# ---------------------------
+
+import argparse
+import json
+import os
+import sys
+
+import knowledge_core as core
+from compact_frame import expand_lakes_table
+from bulk_import import IMPORT_MODES, ImportLedger, import_file
+from export_engine import ExportScope, available_formats, write_export
+from link_checker import LinkChecker, table_urls
+from schema import normalize_lakes_frame
+from version_history import VersionHistory
+from validation import has_errors, new_violations, validate_lakes_table
+
+
+def _load(args):
+    data = core.load_data_sources(excel_path=args.excel,
+                                  use_sheets=args.source in ('auto', 'sheets'),
+                                  use_local=args.source in ('auto', 'local'))
+    for err in data.get('errors', ()):
+        print(f"warning: {err}", file=sys.stderr)
+    if data.get('lakes_df') is None:
+        print("error: дані не завантажено", file=sys.stderr)
+        sys.exit(1)
+    return data
+
+
+def _full_table(data):
+    return expand_lakes_table(data['lakes_df'], data['lakes_text'], data['lakes_columns'])
+
+
+def _print(obj, as_json):
+    if as_json:
+        print(json.dumps(obj, ensure_ascii=False, indent=2, default=str))
+    else:
+        for k, v in obj.items():
+            print(f"{k}: {v}")
+
+
+def cmd_load(args):
+    data = _load(args)
+    _print({
+        'source': data['source'],
+        'rows': len(data['lakes_df']),
+        'columns': list(data['lakes_columns']),
+        'lakes': len(set(data['lakes_names'])),
+        'reports': len(set(data['reports_names'])),
+    }, args.json)
+
+
+def cmd_analyze(args):
+    analysis = core.analyze_lakes_data(_full_table(_load(args)))
+    _print({
+        'total_lakes': analysis['total_lakes'],
+        'columns': len(analysis['columns']),
+        'missing_data': {c: int(n) for c, n in analysis['missing_data'].items() if n},
+    }, args.json)
+
+
+def cmd_validate(args):
+    violations = validate_lakes_table(_full_table(_load(args)), image_base_dir=os.path.dirname(args.excel),
+                                      asset_dir=core.ASSETS_DIR)
+    if violations.empty:
+        print("ok: порушень не знайдено")
+        return
+    if args.json:
+        print(violations.to_json(orient='records', force_ascii=False, indent=2))
+    else:
+        counts = violations.groupby(['severity', 'rule']).size()
+        for (severity, rule), n in counts.items():
+            print(f"{severity}: {rule} — {n}", file=sys.stderr)
+        print(violations.head(50).to_string(index=False), file=sys.stderr)
+    if has_errors(violations):
+        sys.exit(1)
+
+
+def cmd_links(args):
+    table = _full_table(_load(args))
+    urls = table_urls(table)
+    checker = LinkChecker(timeout=args.timeout, workers=args.workers)
+    results = checker.check_many(urls)
+    checker.close()
+    broken = [s for s in results.values() if not s.alive]
+    if args.json:
+        print(json.dumps([{'url': s.url, 'state': s.state, 'status': s.status, 'error': s.error} for s in broken],
+                         ensure_ascii=False, indent=2))
+    else:
+        print(f"посилань: {len(urls)}, робочих: {len(urls) - len(broken)}, недоступних: {len(broken)}")
+        for s in broken:
+            print(f"{s.label()}  {s.url}", file=sys.stderr)
+    if broken:
+        sys.exit(1)
+
+
+def cmd_export(args):
+    data = _load(args)
+    scope = ExportScope(lake=args.lake, folder=args.folder, search=args.search)
+    n = write_export(data['lakes_df'], data['lakes_text'], data['lakes_columns'], args.format, args.out, scope)
+    print(f"ok: {n} рядків -> {args.out}")
+
+
+def cmd_save(args):
+    data = _load(args)
+    df = _full_table(data)
+    try:
+        if args.to == 'sheets':
+            core.write_google_sheets(df, data['reports_df'])
+            print(f"ok: {len(df)} рядків -> Google Sheets {core.GOOGLE_SHEETS_ID}")
+        else:
+            path = core.write_excel(df, args.out, data['reports_df'])
+            print(f"ok: {len(df)} рядків -> {path}")
+    except Exception as e:
+        print(f"error: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(2)
+    _record(df, args, "kt_cli save")
+
+
+def _record(df, args, note, previous=None):
+    # запись уже прошла — ошибка истории не должна менять код возврата
+    try:
+        entry = core.record_version(df, 'google_sheets' if args.to == 'sheets' else 'local', note, previous=previous)
+        if entry is not None:
+            print(f"історія: версія {entry['version']} ({entry['kind']}, {entry['bytes']} байт)", file=sys.stderr)
+    except Exception as e:
+        print(f"warning: версію в історію не записано: {e}", file=sys.stderr)
+
+
+def cmd_import(args):
+    data = _load(args)
+    ledger = ImportLedger(core.IMPORT_LEDGER_PATH)
+    try:
+        result = import_file(_full_table(data), args.file, args.file, args.mode, ledger=ledger, force=args.force)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    _print(result.summary(), args.json)
+    if result.already_imported:
+        print("ok: файл уже імпортовано (--force, щоб застосувати ще раз)", file=sys.stderr)
+        return
+    if not result.changed or args.dry_run:
+        return
+    violations = new_violations(validate_lakes_table(result.table), validate_lakes_table(_full_table(data)))
+    if has_errors(violations):
+        print(violations.head(50).to_string(index=False), file=sys.stderr)
+        sys.exit(1)
+    try:
+        if args.to == 'sheets':
+            core.write_google_sheets(result.table, data['reports_df'])
+        else:
+            core.write_excel(result.table, args.out, data['reports_df'])
+    except Exception as e:
+        print(f"error: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(2)
+    ledger.record(result.checksum, {'name': os.path.basename(args.file), 'mode': args.mode, **result.summary()})
+    _record(result.table, args, f"kt_cli import {os.path.basename(args.file)}", previous=_full_table(data))
+    print(f"ok: {len(result.table)} рядків -> {'Google Sheets' if args.to == 'sheets' else args.out}")
+
+
+def cmd_history(args):
+    history = VersionHistory(core.HISTORY_DIR)
+    if args.diff:
+        changes = history.diff(*args.diff)
+        if args.json:
+            print(changes.to_json(orient='records', force_ascii=False))
+        else:
+            print(changes.to_string(index=False) if not changes.empty else "змін немає")
+        return
+    if args.restore is not None:
+        df = normalize_lakes_frame(history.table(args.restore))
+        reports = core.load_data_sources(excel_path=args.excel).get('reports_df')
+        try:
+            if args.to == 'sheets':
+                core.write_google_sheets(df, reports)
+            else:
+                core.write_excel(df, args.out, reports)
+        except Exception as e:
+            print(f"error: {type(e).__name__}: {e}", file=sys.stderr)
+            sys.exit(2)
+        _record(df, args, f"відновлено версію {args.restore}")
+        print(f"ok: версію {args.restore} відновлено ({len(df)} рядків)")
+        return
+    versions = history.versions()
+    if args.json:
+        print(versions.to_json(orient='records', force_ascii=False))
+    else:
+        print(versions.to_string(index=False) if not versions.empty else "історія порожня")
+        print(f"на диску: {history.storage_bytes():,} байт")
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--source", choices=["auto", "sheets", "local"], default="auto",
+                        help="звідки читати: Google Sheets, локальний Excel або спершу Sheets, потім Excel")
+    common.add_argument("--excel", default=core.EXCEL_FILE_PATH, help="шлях до локального Excel")
+    common.add_argument("--json", action="store_true", help="вивід у JSON")
+
+    parser = argparse.ArgumentParser(prog="kt_cli", description="Knowledge Transfer: завантаження, перевірка, експорт")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("load", parents=[common], help="завантажити дані та показати підсумок").set_defaults(func=cmd_load)
+    sub.add_parser("analyze", parents=[common], help="аналітика: пропущені значення по колонках").set_defaults(func=cmd_analyze)
+    sub.add_parser("validate", parents=[common], help="перевірити таблицю: обов'язкові поля, дублікати, посилання, зображення").set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("links", parents=[common], help="перевірити доступність усіх URL")
+    p.add_argument("--workers", type=int, default=16)
+    p.add_argument("--timeout", type=float, default=5.0)
+    p.set_defaults(func=cmd_links)
+
+    p = sub.add_parser("export", parents=[common], help="експорт у файл")
+    p.add_argument("--format", choices=available_formats(), default="csv")
+    p.add_argument("--out", required=True)
+    p.add_argument("--lake")
+    p.add_argument("--folder")
+    p.add_argument("--search")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("save", parents=[common], help="записати завантажені дані у локальний Excel або Google Sheets")
+    p.add_argument("--to", choices=["local", "sheets"], required=True)
+    p.add_argument("--out", default=core.EXCEL_FILE_PATH, help="файл для --to local")
+    p.set_defaults(func=cmd_save)
+
+    p = sub.add_parser("import", parents=[common], help="масовий імпорт CSV/XLSX зі злиттям за ключем")
+    p.add_argument("file")
+    p.add_argument("--mode", choices=list(IMPORT_MODES), default="upsert")
+    p.add_argument("--to", choices=["local", "sheets"], default="local")
+    p.add_argument("--out", default=core.EXCEL_FILE_PATH, help="файл для --to local")
+    p.add_argument("--force", action="store_true", help="імпортувати, навіть якщо цей файл уже імпортовано")
+    p.add_argument("--dry-run", action="store_true", help="лише показати, що зміниться")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("history", parents=[common], help="історія версій: список, різниця, відновлення")
+    p.add_argument("--diff", nargs=2, type=int, metavar=("A", "B"), help="що змінилося від версії A до B")
+    p.add_argument("--restore", type=int, metavar="N", help="записати версію N як поточну")
+    p.add_argument("--to", choices=["local", "sheets"], default="local")
+    p.add_argument("--out", default=core.EXCEL_FILE_PATH, help="файл для --to local")
+    p.set_defaults(func=cmd_history)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
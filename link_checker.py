@@ -0,0 +1,214 @@
+# link_checker.py
+# ---------------------------
+# Проверка ссылок (колонка URL) на доступность
+# - параллельно: ограниченный пул потоков, общий пул соединений urllib3 (keep-alive по хосту)
+# - на каждый хост — не больше per_host одновременных запросов и не чаще rate_per_host в секунду
+# - HEAD, если сервер его не поддерживает (405/501/...) — GET без чтения тела
+# - результаты кэшируются по URL с TTL; один и тот же URL одновременно проверяется один раз
+# Ссылки Fabric / Power BI без входа отвечают 401/403 или редиректом на логин — это «живая» ссылка.
+# ---------------------------
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import urllib3
+
+LINK_TIMEOUT = 5.0
+# столько отрисовка папки ждёт статусы; остальные дорисовывает опрос (LINK_POLL_SECONDS)
+LINK_RENDER_WAIT = 0.3
+LINK_POLL_SECONDS = 1.0
+LINK_WORKERS = 16
+LINK_PER_HOST = 4
+LINK_RATE_PER_HOST = 10.0      # запросов в секунду на хост
+LINK_TTL = 3600
+MAX_REDIRECTS = 5
+HEAD_FALLBACK_STATUSES = (400, 403, 404, 405, 501)   # часть серверов отвечает на HEAD иначе, чем на GET
+USER_AGENT = "KnowledgeTransferLinkChecker/1.0"
+
+
+@dataclass(frozen=True)
+class LinkStatus:
+    url: str
+    state: str                      # ok | auth | broken | timeout | error | invalid
+    status: int | None = None
+    final_url: str | None = None
+    redirects: int = 0
+    error: str | None = None
+    elapsed: float = 0.0
+    checked_at: float = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return self.state in ('ok', 'auth')
+
+    def label(self) -> str:
+        icon = {'ok': '✅', 'auth': '🔒', 'broken': '❌', 'timeout': '⏱️', 'error': '⚠️', 'invalid': '🚫'}[self.state]
+        if self.status is None:
+            return f"{icon} {self.error or self.state}"
+        return f"{icon} {self.status}" + (f" (↪ {self.redirects})" if self.redirects else "")
+
+
+class _HostLimiter:
+    """Не больше per_host одновременных запросов и не чаще rate в секунду на один хост."""
+
+    def __init__(self, per_host: int, rate: float):
+        self.per_host = per_host
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._slots = {}       # host -> Semaphore
+        self._next_at = {}     # host -> time.monotonic(), раньше которого новый запрос не начинать
+
+    def acquire(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        slot.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(host, now))
+            self._next_at[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return slot
+
+
+class LinkChecker:
+    def __init__(self, timeout: float = LINK_TIMEOUT, workers: int = LINK_WORKERS, per_host: int = LINK_PER_HOST,
+                 rate_per_host: float = LINK_RATE_PER_HOST, ttl: float = LINK_TTL):
+        self.timeout = timeout
+        self.ttl = ttl
+        self._http = urllib3.PoolManager(num_pools=64, maxsize=per_host, block=False,
+                                         headers={'User-Agent': USER_AGENT},
+                                         timeout=urllib3.Timeout(connect=timeout, read=timeout))
+        self._limiter = _HostLimiter(per_host, rate_per_host)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="link-check")
+        self._lock = threading.Lock()
+        self._cache = {}       # url -> LinkStatus
+        self._inflight = {}    # url -> Future
+
+    # ----------------- кэш -----------------
+    def cached(self, url: str) -> LinkStatus | None:
+        status = self._cache.get(url)
+        if status is not None and time.time() - status.checked_at < self.ttl:
+            return status
+        return None
+
+    def peek_many(self, urls) -> dict:
+        """Только то, что уже проверено (без сети) — для отрисовки без ожидания."""
+        return {u: s for u in set(urls) if (s := self.cached(u)) is not None}
+
+    def invalidate(self, url: str | None = None):
+        with self._lock:
+            if url is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(url, None)
+
+    # ----------------- проверка -----------------
+    def submit(self, url: str) -> Future:
+        with self._lock:
+            status = self.cached(url)
+            if status is not None:
+                done = Future()
+                done.set_result(status)
+                return done
+            future = self._inflight.get(url)
+            if future is None:
+                future = self._pool.submit(self._check_and_store, url)
+                self._inflight[url] = future
+            return future
+
+    def check(self, url: str) -> LinkStatus:
+        return self.submit(url).result()
+
+    def check_many(self, urls, wait: float | None = None) -> dict:
+        """url -> LinkStatus. wait — сколько ждать в сумме; не успевшие ссылки в результат не попадут."""
+        futures = {u: self.submit(u) for u in dict.fromkeys(urls)}
+        deadline = None if wait is None else time.monotonic() + wait
+        out = {}
+        for url, future in futures.items():
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                out[url] = future.result(timeout=timeout)
+            except FutureTimeout:   # до 3.11 — не встроенный TimeoutError
+                continue
+        return out
+
+    def _check_and_store(self, url: str) -> LinkStatus:
+        try:
+            status = self._check(url)
+        except Exception as e:   # проверка ссылки не должна ронять приложение
+            status = LinkStatus(url, 'error', error=f"{type(e).__name__}: {e}", checked_at=time.time())
+        with self._lock:
+            self._cache[url] = status
+            self._inflight.pop(url, None)
+        return status
+
+    def _check(self, url: str) -> LinkStatus:
+        parts = urlsplit(url.strip())
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            return LinkStatus(url, 'invalid', error="не http(s) посилання", checked_at=time.time())
+
+        started = time.monotonic()
+        slot = self._limiter.acquire(parts.netloc.lower())
+        try:
+            resp = self._request('HEAD', url)
+            if resp.status in HEAD_FALLBACK_STATUSES:
+                resp = self._request('GET', url)
+        except urllib3.exceptions.MaxRetryError as e:
+            return self._failure(url, e.reason, started)
+        except urllib3.exceptions.HTTPError as e:
+            return self._failure(url, e, started)
+        finally:
+            slot.release()
+
+        history = resp.retries.history if resp.retries is not None else ()
+        if 300 <= resp.status < 400:
+            return LinkStatus(url, 'error', status=resp.status, final_url=resp.geturl() or url, redirects=len(history),
+                              error="забагато редиректів", elapsed=time.monotonic() - started, checked_at=time.time())
+        if resp.status < 400:
+            state = 'ok'
+        elif resp.status in (401, 403):
+            state = 'auth'
+        else:
+            state = 'broken'
+        return LinkStatus(url, state, status=resp.status, final_url=resp.geturl() or url,
+                          redirects=len(history), elapsed=time.monotonic() - started, checked_at=time.time())
+
+    def _request(self, method: str, url: str):
+        resp = self._http.request(method, url, preload_content=False, redirect=True,
+                                  retries=urllib3.Retry(total=MAX_REDIRECTS, connect=0, read=0, status=0,
+                                                        redirect=MAX_REDIRECTS, raise_on_redirect=False))
+        # тело не нужно: соединение сразу возвращается в пул
+        resp.drain_conn()
+        resp.release_conn()
+        return resp
+
+    def _failure(self, url, reason, started) -> LinkStatus:
+        elapsed = time.monotonic() - started
+        # NewConnectionError в urllib3 — подкласс ConnectTimeoutError, поэтому проверяется первым
+        if isinstance(reason, urllib3.exceptions.NameResolutionError):
+            text = "хост не знайдено"
+        elif isinstance(reason, urllib3.exceptions.NewConnectionError):
+            text = "з'єднання не встановлено"
+        elif isinstance(reason, (urllib3.exceptions.TimeoutError, TimeoutError)):
+            return LinkStatus(url, 'timeout', error="timeout", elapsed=elapsed, checked_at=time.time())
+        elif isinstance(reason, urllib3.exceptions.ProtocolError):
+            text = "з'єднання розірвано"
+        else:
+            text = str(reason)
+        return LinkStatus(url, 'error', error=text, elapsed=elapsed, checked_at=time.time())
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._http.clear()
+
+
+def table_urls(df) -> list:
+    """Непустые URL таблицы (уникальные, в порядке появления)."""
+    if df is None or 'URL' not in df.columns:
+        return []
+    s = df['URL'].astype(object).dropna().astype(str).str.strip()
+    return list(dict.fromkeys(s[s != '']))
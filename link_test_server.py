@@ -0,0 +1,62 @@
+# link_test_server.py
+# ---------------------------
+# Локальный HTTP-сервер для проверки ссылок: тесты (tests/test_link_checker.py) и python benchmarks.py links
+# ---------------------------
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_link_test_server():
+    """Локальный сервер: /ok, /slow (дольше таймаута), /redirect -> /ok, /loop (бесконечный редирект),
+    /dead (404), /gone (410), /nohead (405 на HEAD, 200 на GET), /login (401), /drop (обрыв соединения)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, headers=()):
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _route(self, method):
+            path = self.path.split("?")[0].rstrip("/").split("/")[-1]
+            if path == "slow":
+                time.sleep(3)
+                self._reply(200)
+            elif path == "redirect":
+                self._reply(301, [("Location", "/ok")])
+            elif path == "loop":
+                self._reply(302, [("Location", self.path)])
+            elif path == "dead":
+                self._reply(404)
+            elif path == "gone":
+                self._reply(410)
+            elif path == "nohead":
+                self._reply(405 if method == "HEAD" else 200)
+            elif path == "login":
+                self._reply(401)
+            elif path == "drop":
+                self.close_connection = True
+                self.wfile.flush()
+                self.connection.shutdown(2)
+            else:
+                time.sleep(0.02)   # «сеть»
+                self._reply(200)
+
+        def do_HEAD(self):
+            self._route("HEAD")
+
+        def do_GET(self):
+            self._route("GET")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
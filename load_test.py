@@ -0,0 +1,311 @@
+# load_test.py
+# ---------------------------
+# Нагрузочный тест: N одновременных сессий Streamlit через streamlit.testing (AppTest, без браузера)
+# - сессия: открыть приложение -> розділ лейків -> лейк -> папка -> редагування -> додати запис
+# - Google Sheets заменён локальным стендом (SheetsStandIn): чтение CSV с задержкой сети,
+#   запись и дозапись — через sheets_scheduler, как настоящие вызовы API
+# - для каждого уровня конкурентности: p50/p95/p99 времени rerun, обращения к источнику, память процесса
+# - данные приложения — во временной папке: HOME подменяется до импорта knowledge_core
+#   python load_test.py --sessions 1 10 50 --rows 5000 --iterations 2
+# ---------------------------
+
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_transfer.py")
+PAGE_LAKES = "app_pages/lakes.py"
+PAGE_EDIT = "app_pages/edit.py"
+
+
+def rss_bytes() -> tuple:
+    """(текущий RSS, пиковый RSS) процесса; None, если платформа не сообщает."""
+    current = peak = None
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if peak is None:
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak *= 1 if sys.platform == "darwin" else 1024   # macOS — байты, Linux — килобайты
+        except ImportError:   # Windows
+            pass
+    return current, peak
+
+
+class SheetsStandIn:
+    """
+    Локальная замена Google Sheets для knowledge_core: read() вместо load_from_google_sheets,
+    write()/append() вместо write_google_sheets/append_row_google_sheets. Считает обращения.
+    """
+
+    def __init__(self, lakes_df: pd.DataFrame, reports_df: pd.DataFrame | None = None,
+                 read_latency: float = 0.3, write_latency: float = 0.2):
+        self.read_latency = read_latency
+        self.write_latency = write_latency
+        self._lock = threading.Lock()
+        self._lakes_csv = lakes_df.to_csv(index=False)
+        self._reports = reports_df if reports_df is not None else pd.DataFrame({'Report': []})
+        self.counts = {'reads': 0, 'writes': 0, 'appends': 0}
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {k: 0 for k in self.counts}
+
+    def read(self):
+        from schema import LAKE_COLUMN, normalize_lakes_frame
+
+        time.sleep(self.read_latency)
+        with self._lock:
+            self.counts['reads'] += 1
+            csv = self._lakes_csv
+        # тот же разбор, что у gviz CSV
+        lakes_df = normalize_lakes_frame(pd.read_csv(io.StringIO(csv)))
+        reports_df = self._reports.copy()
+        lakes_names = list(lakes_df[LAKE_COLUMN].dropna()) if LAKE_COLUMN in lakes_df.columns else []
+        reports_names = list(reports_df.iloc[:, 0].dropna()) if not reports_df.empty else []
+        return lakes_names, reports_names, lakes_df, reports_df
+
+    def _store(self, df, reports_df):
+        time.sleep(self.write_latency)
+        with self._lock:
+            self.counts['writes'] += 1
+            self._lakes_csv = df.to_csv(index=False)
+            if reports_df is not None:
+                self._reports = reports_df.copy()
+
+    def _append(self, row, columns):
+        time.sleep(self.write_latency)
+        with self._lock:
+            self.counts['appends'] += 1
+            self._lakes_csv += pd.DataFrame([{c: row.get(c, '') for c in columns}]).to_csv(index=False, header=False)
+
+    def write(self, df, reports_df=None, service_account_info=None):
+        import knowledge_core as core
+        core.sheets_scheduler().call(self._store, df, reports_df)
+
+    def append(self, row: dict, columns, service_account_info=None):
+        import knowledge_core as core
+        core.sheets_scheduler().call(self._append, row, columns)
+
+    def install(self):
+        import knowledge_core as core
+        core.load_from_google_sheets = self.read
+        core.write_google_sheets = self.write
+        core.append_row_google_sheets = self.append
+
+
+def allow_concurrent_app_tests():
+    """
+    AppTest рассчитан на один прогон за раз: на время run() он ставит глобальный Runtime._instance и
+    сбрасывает его в None в конце — параллельная сессия падала бы с "Runtime hasn't been created".
+    Между прогонами Runtime.instance() отдаёт последний mock, так что сессии могут идти одновременно,
+    как потоки одного сервера Streamlit. Байткод скрипта, как и на сервере, — один ScriptCache на процесс
+    (у каждого run() свой кэш — параллельная компиляция одного файла в 3.11 падает в ast.parse).
+    Опция global.appTest включается один раз на процесс: вложенные patch.object из параллельных run()
+    восстанавливают config.get_option не в том порядке.
+    """
+    import contextlib
+
+    import streamlit.testing.v1.app_test as app_test
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+    script_cache = ScriptCache()
+    script_cache.get_bytecode(APP_PATH)   # компиляция — до старта сессий
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last['runtime'] = cls._instance
+            return cls._instance
+        if 'runtime' in last:
+            return last['runtime']
+        raise RuntimeError("Runtime hasn't been created!")
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or 'runtime' in last)
+
+
+def _session(tag: str, iterations: int, seed: int, timings: list, errors: list, start: threading.Barrier):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    # без at.secrets: AppTest подменяет глобальный st.secrets на время run(), между сессиями это гонка —
+    # ключи лежат в secrets.toml временной домашней папки (main)
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+
+    def step(name, action):
+        t = time.perf_counter()
+        action()
+        timings.append((name, time.perf_counter() - t))
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    start.wait()
+    name = "open"
+    try:
+        step(name, at.run)
+        for it in range(iterations):
+            name = "section: lakes"
+            step(name, lambda: at.switch_page(PAGE_LAKES).run())
+            lake = rng.choice([o for o in at.selectbox[0].options if o.startswith("Lakehouse")])
+            name = "lake"
+            step(name, lambda: at.selectbox[0].set_value(lake).run())
+            folders = [b for b in at.button if b.key and b.key.startswith("folder_")]
+            if folders:
+                name = "folder"
+                step(name, lambda: rng.choice(folders).click().run())
+            name = "section: edit"
+            step(name, lambda: at.switch_page(PAGE_EDIT).run())
+            name = "edit: lake"
+            step(name, lambda: at.selectbox(key="edit_lake").set_value(lake).run())
+            # ключ записи уникален для сессии и уровня — иначе валидация отклонит дубликат
+            for key, value in (("form_LakeHouse", lake), ("form_Folder", f"load_test_{tag}"),
+                               ("form_Element", f"element_{tag}_{it:03d}")):
+                at.text_input(key=key).set_value(value)
+            name = "save"
+            step(name, lambda: at.button(key="FormSubmitter:add_new_record-➕ Додати запис").click().run())
+            if at.error or at.warning:
+                raise RuntimeError("; ".join(e.value for e in list(at.error) + list(at.warning)))
+    except Exception as e:
+        errors.append(f"{name}: {type(e).__name__}: {e}")
+
+
+def run_level(sessions: int, iterations: int, standin: SheetsStandIn, data_dir: str, warm_start: bool = False) -> dict:
+    import streamlit as st
+
+    import app_state
+    import knowledge_core as core
+
+    # каждый уровень — как свежий процесс сервера: пустые кэши, нет общего снапшота на диске
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    app_state.reset()
+    for name in ("shared_cache", "history", "exports"):
+        shutil.rmtree(os.path.join(data_dir, name), ignore_errors=True)
+    if warm_start:
+        # как serve.py: прогрев до первой сессии
+        app_state.warm_up()
+    standin.reset_counts()
+    calls_before = core.sheets_scheduler().metrics()['calls']
+
+    timings, errors = [], []
+    start = threading.Barrier(sessions)
+    threads = [threading.Thread(target=_session, daemon=True,
+                                args=(f"{sessions:03d}_{n:03d}", iterations, n, timings, errors, start))
+               for n in range(sessions)]
+    t = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - t
+    current, peak = rss_bytes()
+    saves = sum(1 for name, _ in timings if name == "save")
+    if standin.counts['appends'] < saves:
+        errors.append(f"save: до стенду дійшло {standin.counts['appends']} з {saves} записів")
+    latencies = np.array([d for _, d in timings]) if timings else np.zeros(1)
+    by_step = {}
+    for name, d in timings:
+        by_step.setdefault(name, []).append(d)
+    return {
+        'sessions': sessions, 'reruns': len(timings), 'elapsed': elapsed, 'errors': errors,
+        'p50': float(np.percentile(latencies, 50)), 'p95': float(np.percentile(latencies, 95)),
+        'p99': float(np.percentile(latencies, 99)), 'max': float(latencies.max()),
+        # первый rerun сессии после старта процесса (с прогревом должен совпадать с остальными)
+        'first': max(by_step.get('open', [0.0])),
+        'by_step': {k: float(np.percentile(v, 95)) for k, v in by_step.items()},
+        'upstream': dict(standin.counts), 'api_calls': core.sheets_scheduler().metrics()['calls'] - calls_before,
+        'rss': current, 'peak_rss': peak,
+    }
+
+
+def _mb(n) -> str:
+    return "—" if n is None else f"{n / 1024 / 1024:,.0f}"
+
+
+def print_report(results: list, by_step: bool = False):
+    print(f"{'sessions':>8}{'reruns':>8}{'first s':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'max s':>8}"
+          f"{'reads':>7}{'writes':>8}{'api':>6}{'rss MB':>8}{'peak MB':>9}{'errors':>8}")
+    for r in results:
+        up = r['upstream']
+        print(f"{r['sessions']:>8}{r['reruns']:>8}{r['first']:>8.2f}{r['p50']:>8.2f}{r['p95']:>8.2f}{r['p99']:>8.2f}{r['max']:>8.2f}"
+              f"{up['reads']:>7}{up['writes'] + up['appends']:>8}{r['api_calls']:>6}"
+              f"{_mb(r['rss']):>8}{_mb(r['peak_rss']):>9}{len(r['errors']):>8}")
+    if by_step:
+        for r in results:
+            print(f"p95 by step, sessions={r['sessions']}: "
+                  + ", ".join(f"{k} {v:.2f}s" for k, v in r['by_step'].items()))
+    for r in results:
+        for e in r['errors'][:3]:
+            print(f"  sessions={r['sessions']}: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Навантажувальний тест: одночасні сесії Streamlit (AppTest)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 25, 50],
+                        help="рівні конкурентності (кількість одночасних сесій)")
+    parser.add_argument("--iterations", type=int, default=1, help="скільки разів кожна сесія проходить сценарій")
+    parser.add_argument("--rows", type=int, default=5_000, help="рядків у таблиці Lakes на стенді")
+    parser.add_argument("--read-latency", type=float, default=0.3, help="затримка читання зі стенду, с")
+    parser.add_argument("--write-latency", type=float, default=0.2, help="затримка запису на стенд, с")
+    parser.add_argument("--by-step", action="store_true", help="p95 окремо для кожного кроку сценарію")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="прогрів процесу перед сесіями, як у serve.py (app_state.warm_up)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as home:
+        # knowledge_core строит пути от домашней папки — подменяем её до импорта
+        os.environ["HOME"] = os.environ["USERPROFILE"] = home
+        os.environ.pop("KT_API_PORT", None)
+        # ключ сервис-аккаунта для приложения (стенду он не нужен) — как при развёртывании со st.secrets
+        os.makedirs(os.path.join(home, ".streamlit"))
+        with open(os.path.join(home, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+            f.write('[gcp_service_account]\ntype = "service_account"\n')
+        import knowledge_core as core
+        from benchmarks import make_synthetic_lakes
+
+        lakes_df = make_synthetic_lakes(args.rows)
+        # без внешних ссылок: проверка URL измеряется отдельно (benchmarks.py links)
+        lakes_df['URL'] = None
+        standin = SheetsStandIn(lakes_df, read_latency=args.read_latency, write_latency=args.write_latency)
+        standin.install()
+        allow_concurrent_app_tests()
+        print(f"rows={args.rows:,} iterations={args.iterations} data={core.LOCAL_DATA_DIR}")
+        results = []
+        for n in args.sessions:
+            results.append(run_level(n, args.iterations, standin, core.LOCAL_DATA_DIR, args.warm_start))
+            print_report(results[-1:], by_step=False)
+        print()
+        print_report(results, by_step=args.by_step)
+    if any(r['errors'] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
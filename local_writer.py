@@ -0,0 +1,204 @@
+# local_writer.py
+# ---------------------------
+# Один писатель локальной книги Excel на процесс (и очередь к ней для всех сессий)
+# - сессия отдаёт не «свою таблицу целиком», а изменения: base — таблица, которую она редактировала,
+#   table — что получилось; разница (удалённые / изменённые ячейки / новые строки) накладывается
+#   на последнее состояние книги, а не на устаревший снапшот сессии
+# - строки сопоставляются по ключу LakeHouse / Folder / Element / Type (+ номер повтора ключа)
+# - поток-писатель забирает все ожидающие изменения разом: одно чтение книги, одна запись на пачку
+# - между процессами — файловая блокировка <книга>.lock; под ней же дозапись журнала (append_row_to_journal)
+#   и полная запись write_excel, поэтому журнал не теряет строки при перезаписи книги
+# - base=None — полная замена таблицы (запись снапшота, прочитанного из Google Sheets)
+# ---------------------------
+
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from shared_cache import FileLock
+from validation import KEY_COLUMNS, key_hashes
+
+
+@dataclass
+class TableChange:
+    deletes: list = field(default_factory=list)    # ключи удалённых строк
+    updates: dict = field(default_factory=dict)    # ключ -> {колонка: новое значение}
+    inserts: list = field(default_factory=list)    # (ключ строки выше или None, ключ, {колонка: значение})
+    columns: list = field(default_factory=list)    # колонки таблицы после правки (новые — в конец книги)
+
+
+@dataclass
+class LocalWriteResult:
+    table: pd.DataFrame            # таблица, записанная в книгу (вместе с правками других сессий из той же пачки)
+    previous: pd.DataFrame         # книга до записи
+    applied: int = 0               # изменённых / удалённых / добавленных строк этой правки
+    conflicts: int = 0             # правки строк, которых в книге уже нет (удалены другой сессией)
+    batch: int = 1                 # сколько правок записано одной записью
+
+
+def row_keys(df: pd.DataFrame) -> list:
+    """Ключ строки: (хэш ключевых колонок, номер повтора) — повторяющийся ключ не склеивает строки."""
+    hashes = key_hashes(df, KEY_COLUMNS)
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    return list(zip(hashes.tolist(), occurrence.tolist()))
+
+
+def table_changes(base: pd.DataFrame, table: pd.DataFrame) -> TableChange:
+    """Что правка сделала с base: удалённые строки, изменённые ячейки, новые строки (с местом вставки)."""
+    base_keys, new_keys = row_keys(base), row_keys(table)
+    base_pos = dict(zip(base_keys, range(len(base_keys))))
+    new_set = set(new_keys)
+    columns = list(table.columns)
+    change = TableChange(deletes=[k for k in base_keys if k not in new_set], columns=columns)
+
+    matched = [j for j, k in enumerate(new_keys) if k in base_pos]
+    old = base.reindex(columns=columns).astype(object).iloc[[base_pos[new_keys[j]] for j in matched]]
+    new = table.astype(object).iloc[matched]
+    old, new = old.reset_index(drop=True), new.reset_index(drop=True)
+    differs = ~((old == new) | (old.isna() & new.isna())).to_numpy()
+    for n, j in enumerate(matched):
+        if differs[n].any():
+            change.updates[new_keys[j]] = {c: v for c, v, d in zip(columns, new.iloc[n], differs[n]) if d}
+
+    # новая строка встаёт после ближайшей строки выше неё, которая была и в base
+    values = table.astype(object).to_numpy()
+    anchor = None
+    for j, k in enumerate(new_keys):
+        if k in base_pos:
+            anchor = k
+        else:
+            change.inserts.append((anchor, k, dict(zip(columns, values[j]))))
+    return change
+
+
+def apply_changes(latest: pd.DataFrame, change: TableChange) -> tuple:
+    """-> (новая таблица, применено строк, конфликтов)."""
+    out = latest.astype(object).reset_index(drop=True)
+    for c in change.columns:
+        if c not in out.columns:
+            out[c] = None
+    pos = dict(zip(row_keys(out), range(len(out))))
+    applied = conflicts = 0
+
+    def update(i, cells):
+        for c, v in cells.items():
+            out.iat[i, out.columns.get_loc(c)] = v
+
+    for k, cells in change.updates.items():
+        if k in pos:
+            update(pos[k], cells)
+            applied += 1
+        else:
+            conflicts += 1
+    deleted = {pos[k] for k in change.deletes if k in pos}
+    applied += len(deleted)
+
+    # порядок: (позиция, 0) — строка книги; (позиция якоря, 1) — новая строка после якоря
+    # (якорь удалён в книге — на его месте; якоря в книге нет — в конец; сортировка устойчивая)
+    keep = [i for i in range(len(out)) if i not in deleted]
+    order = [(i, 0) for i in keep]
+    inserts = []
+    for anchor, k, row in change.inserts:
+        if k in pos:
+            # та же строка уже есть в книге (добавлена другой сессией) — обновляется, а не дублируется
+            update(pos[k], row)
+        else:
+            order.append((-1 if anchor is None else pos.get(anchor, len(out)), 1))
+            inserts.append(row)
+        applied += 1
+    frames = [out.iloc[keep]]
+    if inserts:
+        frames.append(pd.DataFrame(inserts).reindex(columns=out.columns).astype(object))
+    combined = pd.concat(frames, ignore_index=True)
+    ranking = sorted(range(len(order)), key=order.__getitem__)
+    return combined.iloc[ranking].reset_index(drop=True), applied, conflicts
+
+
+class LocalWriter:
+    """
+    load() -> (lakes_df, reports_df) — текущее состояние книги (с журналом дозаписи);
+    write(lakes_df, reports_df) — полная запись книги. Обе вызываются только потоком-писателем под блокировкой.
+    on_flush(table, previous, notes) — после записи (история версий); ошибка в нём запись не отменяет.
+    """
+
+    def __init__(self, path, load, write, on_flush=None):
+        self.path = path
+        self.load = load
+        self.write = write
+        self.on_flush = on_flush
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.flushes = 0
+        self.changes_written = 0
+
+    def locked(self) -> FileLock:
+        """Блокировка книги между процессами — для записей мимо очереди (журнал, kt_cli)."""
+        return FileLock(f"{self.path}.lock")
+
+    def submit(self, table: pd.DataFrame, reports=None, base: pd.DataFrame | None = None, note: str = "") -> Future:
+        future = Future()
+        change = None if base is None else table_changes(base, table)
+        self._queue.put((change, table, reports, note, future))
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="kt-local-writer", daemon=True)
+                self._thread.start()
+        return future
+
+    def save(self, table: pd.DataFrame, reports=None, base: pd.DataFrame | None = None, note: str = "") -> LocalWriteResult:
+        return self.submit(table, reports, base, note).result()
+
+    def metrics(self) -> dict:
+        return {'queue_depth': self._queue.qsize(), 'flushes': self.flushes, 'changes_written': self.changes_written}
+
+    # ----------------- поток-писатель -----------------
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=5.0)]
+            except queue.Empty:
+                # без работы поток завершается; следующий submit запустит новый
+                with self._thread_lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            # всё, что накопилось, пока шла прошлая запись, — одной записью
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            with self.locked():
+                previous, reports = self.load()
+                table, results = previous, []
+                for change, full, change_reports, _, _ in batch:
+                    if change is None:
+                        table, applied, conflicts = full.astype(object).reset_index(drop=True), len(full), 0
+                    else:
+                        table, applied, conflicts = apply_changes(table, change)
+                    if change_reports is not None and not change_reports.empty:
+                        reports = change_reports
+                    results.append((applied, conflicts))
+                self.write(table, reports)
+                self.flushes += 1
+                self.changes_written += len(batch)
+        except BaseException as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        if self.on_flush is not None:
+            try:
+                self.on_flush(table, previous, [note for _, _, _, note, _ in batch if note])
+            except Exception:
+                pass   # история — не условие записи
+        for (applied, conflicts), (*_, future) in zip(results, batch):
+            future.set_result(LocalWriteResult(table, previous, applied, conflicts, len(batch)))
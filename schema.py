@@ -0,0 +1,147 @@
+# schema.py
+# ---------------------------
+# Описание колонок таблицы Lakes: каноническое имя, синонимы в таблице, тип значения
+# Колонки приводятся к схеме один раз при загрузке (normalize_lakes_frame):
+# - синонимы ('name', 'Назва', 'lake_name', ...) переименовываются в каноническое имя
+# - типы: text — строка без пробелов по краям; category — повторяющиеся значения; url — ссылка;
+#   date — datetime; long_text — длинный текст (хранится отдельно, см. compact_frame.py)
+# - пустые строки -> NaN
+# Дальше все разделы приложения работают с каноническими именами, без перебора вариантов.
+# ---------------------------
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+TEXT, CATEGORY, URL, DATE, LONG_TEXT = 'text', 'category', 'url', 'date', 'long_text'
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    kind: str = TEXT
+    aliases: tuple = ()
+    folder_view: bool = False   # колонка таблицы элементов папки
+
+
+LAKES_SCHEMA = (
+    Field('LakeHouse', CATEGORY, aliases=('Lakehouse', 'Lake House', 'name', 'Name', 'назва', 'Назва',
+                                          'lake_name', 'Lake Name')),
+    Field('Загальна інформація про лейк', LONG_TEXT, aliases=('Загальна інформація', 'Lake info')),
+    Field('Folder', CATEGORY, aliases=('Папка', 'folder_name'), folder_view=True),
+    Field('Element', TEXT, aliases=('Елемент', 'element_name', 'Item'), folder_view=True),
+    Field('URL', URL, aliases=('Url', 'Link', 'Посилання'), folder_view=True),
+    Field('Type', CATEGORY, aliases=('Тип', 'Item type'), folder_view=True),
+    Field('Опис', TEXT, aliases=('Description', 'Описание'), folder_view=True),
+    Field('Оновлення', CATEGORY, aliases=('Update', 'Refresh'), folder_view=True),
+    Field('Особливості', TEXT, aliases=('Notes', 'Примітки'), folder_view=True),
+    Field('Внесення змін', LONG_TEXT, aliases=('Changes', 'Зміни')),
+    Field('Status', CATEGORY, aliases=('Статус',)),
+    Field('Workspace', CATEGORY, aliases=('WorkSpace', 'Робоча область')),
+    Field('Update_Frequency', CATEGORY, aliases=('Update Frequency', 'Частота оновлення')),
+    Field('Дата оновлення', DATE, aliases=('Last_Update', 'Last Update', 'Updated', 'Дата')),
+    # таблица отдела, из которой пришла строка (federation.py); в источник не записывается
+    Field('Джерело', CATEGORY, folder_view=True),
+)
+
+FIELDS = {f.name: f for f in LAKES_SCHEMA}
+# доля уникальных значений, ниже которой текст хранится как category (здесь — длинный текст при загрузке,
+# в compact_frame — любая текстовая колонка); одна на оба места
+CATEGORY_MAX_RATIO = 0.5
+LAKE_COLUMN = 'LakeHouse'
+
+
+def _norm(name) -> str:
+    return re.sub(r'[\s_]+', ' ', str(name)).strip().casefold()
+
+
+_ALIASES = {_norm(a): f.name for f in LAKES_SCHEMA for a in (f.name,) + f.aliases}
+
+
+def columns_of_kind(*kinds) -> tuple:
+    return tuple(f.name for f in LAKES_SCHEMA if f.kind in kinds)
+
+
+def folder_view_columns(available) -> list:
+    """Колонки таблицы элементов папки — в порядке схемы, только те, что есть в данных."""
+    available = set(available)
+    return [f.name for f in LAKES_SCHEMA if f.folder_view and f.name in available]
+
+
+def resolve_columns(columns) -> dict:
+    """{имя в таблице: каноническое имя}. Первое совпадение побеждает; неизвестные колонки остаются как есть."""
+    mapping, taken = {}, set()
+    for c in columns:
+        target = _ALIASES.get(_norm(c))
+        if target is not None and target not in taken and target != c:
+            mapping[c] = target
+        if target is not None:
+            taken.add(target)
+    # без колонки лейка ни один раздел не работает — берём первую колонку таблицы, если она сама ничья
+    if LAKE_COLUMN not in taken and len(columns) and _ALIASES.get(_norm(columns[0])) is None:
+        mapping[columns[0]] = LAKE_COLUMN
+    return mapping
+
+
+def _stripped_codes(s: pd.Series):
+    """Коды + уникальные значения без пробелов по краям; пустое -> код -1.
+    Строки обрабатываются по уникальным значениям — длинные тексты повторяются на каждой строке папки."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    stripped = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    norm, norm_uniques = pd.factorize(stripped.where(stripped != '', None), use_na_sentinel=True)
+    if len(norm):
+        codes = np.where(codes >= 0, norm[np.maximum(codes, 0)], -1)
+    return codes, pd.Index(norm_uniques, dtype=object)
+
+
+def _blank_to_na(s: pd.Series) -> pd.Series:
+    codes, uniques = _stripped_codes(s)
+    return pd.Series(pd.Categorical.from_codes(codes, uniques), index=s.index).astype(object)
+
+
+def _parse_dates(s: pd.Series) -> pd.Series:
+    values = _blank_to_na(s)
+    # ISO (из Google Sheets / Excel) — как есть, остальное — день.месяц.год, как пишут в таблице
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    rest = parsed.isna() & values.notna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest], errors='coerce', dayfirst=True, format='mixed')
+    return parsed
+
+
+def coerce_column(s: pd.Series, kind: str) -> pd.Series:
+    if kind == DATE:
+        return s if pd.api.types.is_datetime64_any_dtype(s) else _parse_dates(s)
+    if pd.api.types.is_float_dtype(s) and s.dropna().mod(1).eq(0).all():
+        s = s.astype('Int64')   # 2024.0 из Excel -> '2024'
+    codes, uniques = _stripped_codes(s)
+    filled = int((codes >= 0).sum())
+    if kind == CATEGORY or (kind == LONG_TEXT and filled and len(uniques) <= filled * CATEGORY_MAX_RATIO):
+        # category из кодов: каждое значение в памяти один раз
+        return pd.Series(pd.Categorical.from_codes(codes, uniques), index=s.index)
+    if not filled:
+        return pd.Series(None, index=s.index, dtype=object)
+    # text / url / long_text: строка (pandas str dtype), числа из CSV/Excel тоже становятся строками;
+    # пустые — NaN и после astype (pandas 2 превратил бы их в 'nan')
+    text = pd.Series(pd.Categorical.from_codes(codes, uniques), index=s.index).astype('str')
+    return text.mask(codes < 0)
+
+
+def normalize_lakes_frame(df: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Переименовать синонимы и привести типы по LAKES_SCHEMA — один раз на загрузку."""
+    if df is None:
+        return None
+    df = df.loc[:, [c for c in df.columns if not str(c).startswith('Unnamed:') or df[c].notna().any()]]
+    df = df.rename(columns=resolve_columns(list(df.columns)))
+    return coerce_frame(df.loc[:, ~df.columns.duplicated()])
+
+
+def coerce_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Только типы по LAKES_SCHEMA — колонки уже названы канонически (например, ответ на запрос колонок)."""
+    out = {}
+    for c in df.columns:
+        field = FIELDS.get(c)
+        out[c] = coerce_column(df[c], field.kind if field else TEXT)
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
@@ -0,0 +1,37 @@
+# serve.py
+# ---------------------------
+# Запуск сервера с прогревом: сначала app_state.warm_up() (данные, снапшот, индексы, аналитика, графики),
+# затем Streamlit в том же процессе — первая сессия получает уже готовый снапшот
+#   python serve.py                                  — как `streamlit run knowledge_transfer.py`
+#   python serve.py --server.port 8501 --server.headless true   — аргументы передаются Streamlit как есть
+#   KT_API_PORT=8765 python serve.py                 — JSON API поднимается до прогрева: /ready = 503, пока он идёт
+# ---------------------------
+
+import os
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_transfer.py")
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    import app_state
+
+    # JSON API — до прогрева: балансировщик видит /ready = 503, пока снапшот не построен
+    app_state.start_json_api()
+    status = app_state.warm_up()
+    steps = ", ".join(f"{k} {v:.2f}s" for k, v in status['steps'].items())
+    if status['ready']:
+        print(f"Прогрів: {status['seconds']:.2f} s ({steps}), версія даних {status['version']}")
+    else:
+        # приложение всё равно стартует: первый rerun повторит прогрев
+        print(f"Прогрів не вдався: {status['error']} ({steps})", file=sys.stderr)
+
+    # Streamlit — в этом же процессе: app_state и его снапшот общие с приложением
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", APP_PATH, *argv]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# shared_cache.py
+# ---------------------------
+# Общий для всех процессов Streamlit на одном сервере кэш снапшота (несколько процессов за reverse proxy)
+# - снапшот лежит в папке кэша: таблицы в Arrow IPC (читаются через memory map, без разбора CSV/Excel),
+#   meta.json — источник, ошибки, порядок колонок, время загрузки
+# - загрузка из источника — под файловой блокировкой: Google Sheets читает один процесс на сервер за TTL,
+#   остальные берут уже записанный снапшот
+# - файл generation — счётчик поколений: после записи в Sheets/Excel invalidate() увеличивает его,
+#   и каждый процесс при следующем запросе перечитывает снапшот (SharedDataStore(generation=...))
+# - publish(): после записи снапшотом становится записанная таблица (новое поколение, без чтения источника);
+#   источник перечитывается, когда истечёт её короткий срок свежести (fresh_until в meta.json);
+#   до тех пор она не сверена с источником (written_until) — процессы знают, что лист может отдать старое
+# - append(): дописанная строка — в хвост снапшота в meta.json (таблицы не переписываются); после перечитывания
+#   источника хвост остаётся, пока источник не вернёт строку (не дольше tail_until)
+# - длинные тексты Lakes процесс не читает целиком: LongTextStore берёт из Arrow-файла только строки
+#   открытого лейка / папки (select + take по memory map); пропуски по колонкам и отпечаток — в meta.json
+# Без pyarrow таблицы сохраняются pickle — тот же протокол, только без memory map.
+# ---------------------------
+
+import json
+import os
+import pickle
+import tempfile
+import time
+
+import pandas as pd
+
+from compact_frame import LongTextStore
+from data_store import unconfirmed_rows
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+FRAME_KEYS = ('lakes_df', 'lakes_text', 'reports_df')
+
+
+class FileLock:
+    """Эксклюзивная блокировка между процессами (flock / msvcrt.locking)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:   # LK_LOCK сдаётся через ~10 секунд — ждём дальше
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+def _atomic_write(path, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_frame(df: pd.DataFrame, path_stem: str) -> str:
+    if ARROW_AVAILABLE:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            path = path_stem + ".arrow"
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            return path
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass   # смешанные типы в колонке — pickle
+    path = path_stem + ".pkl"
+    with open(path, "wb") as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_frame(path: str) -> pd.DataFrame:
+    if path.endswith(".arrow"):
+        with pa.memory_map(path, "r") as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class _ArrowTextReader:
+    """read(positions, columns) для LongTextStore: строки из Arrow-файла по memory map, без чтения всего файла."""
+
+    def __init__(self, path: str):
+        self._source = pa.memory_map(path, "r")
+        self._table = pa.ipc.open_file(self._source).read_all()   # буферы — в отображённом файле, не в памяти процесса
+
+    def __call__(self, positions, columns) -> pd.DataFrame:
+        part = self._table.select(list(columns)).take(pa.array(positions, type=pa.int64()))
+        return part.to_pandas()
+
+    def null_counts(self) -> dict:
+        return {name: self._table.column(name).null_count for name in self._table.column_names
+                if not name.startswith("__index_level_")}
+
+
+def _read_text_store(path: str, index, digest) -> LongTextStore:
+    if not path.endswith(".arrow"):
+        frame = _read_frame(path)
+        frame.index = index
+        store = LongTextStore.from_frame(frame)
+        store._digest = digest
+        return store
+    reader = _ArrowTextReader(path)
+    counts = reader.null_counts()
+    return LongTextStore(index, list(counts), reader, digest, counts)
+
+
+class SharedSnapshotCache:
+    """
+    Обёртка над loader() (knowledge_core.load_data_sources): load() возвращает тот же dict,
+    но источник вызывается не чаще раза в ttl на весь сервер. Подходит как loader для SharedDataStore.
+    """
+
+    def __init__(self, directory, loader, ttl: float = 300):
+        self.directory = directory
+        self.loader = loader
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, "lock")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._generation_path = os.path.join(directory, "generation")
+        self.fetch_count = 0   # сколько раз этот процесс сам ходил в источник
+
+    # ----------------- поколение -----------------
+    def generation(self) -> int:
+        """Дёшево (маленький файл) — вызывается на каждый get() хранилища."""
+        try:
+            with open(self._generation_path, "rb") as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _bump_generation(self) -> int:
+        gen = self.generation() + 1
+        _atomic_write(self._generation_path, str(gen).encode())
+        return gen
+
+    def invalidate(self):
+        """После записи в источник: следующий load() в любом процессе перечитает источник."""
+        with FileLock(self._lock_path):
+            meta = self._read_meta()
+            if meta is not None:
+                meta['stale'] = True
+                _atomic_write(self._meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+            self._bump_generation()
+
+    def publish(self, data: dict, ttl: float | None = None) -> dict:
+        """
+        Write-through после записи в источник: data (как от loader()) — то, что записано. Процессы берут его
+        из кэша без чтения источника; через ttl секунд следующий load() перечитает источник и сверит.
+        """
+        with FileLock(self._lock_path):
+            return self._read_snapshot(self._write_snapshot(data, ttl, written=True))
+
+    def append(self, row: dict, ttl: float, keep: float | None = None) -> int:
+        """
+        Дописанная строка -> хвост снапшота: процессы видят её на следующем get(), без чтения источника.
+        Через ttl секунд load() перечитает источник; строку, которой там ещё нет, хвост держит до keep секунд
+        (по умолчанию self.ttl). -> новое поколение.
+        """
+        with FileLock(self._lock_path):
+            meta = self._read_meta()
+            gen = self._bump_generation()
+            if meta is None:
+                return gen   # снапшота ещё нет — строку вернёт первая загрузка
+            now = time.time()
+            meta['tail'] = meta.get('tail', []) + [json.loads(json.dumps(row, ensure_ascii=False, default=str))]
+            meta['tail_until'] = now + (self.ttl if keep is None else keep)
+            meta['tail_ttl'] = ttl
+            meta['fresh_until'] = min(meta.get('fresh_until', now + ttl), now + ttl)
+            meta['generation'] = gen
+            _atomic_write(self._meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+            return gen
+
+    # ----------------- снапшот -----------------
+    def _read_meta(self):
+        try:
+            with open(self._meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_fresh(self, meta) -> bool:
+        return (meta is not None and not meta.get('stale')
+                and time.time() < meta.get('fresh_until', meta.get('saved_at', 0) + self.ttl)
+                and all(os.path.exists(p) for p in meta.get('files', {}).values()))
+
+    def _read_snapshot(self, meta) -> dict:
+        data = {k: v for k, v in meta['data'].items()}
+        for key, path in meta['files'].items():
+            if key != 'lakes_text':
+                data[key] = _read_frame(path)
+        if 'lakes_text' in meta['files']:
+            # строки store = строки lakes_df (тот же индекс); сами тексты читаются по запросу
+            data['lakes_text'] = _read_text_store(meta['files']['lakes_text'], data['lakes_df'].index,
+                                                  meta.get('text_digest'))
+        data['generation'] = meta['generation']
+        data['lakes_tail'] = tuple(meta.get('tail', ()))
+        data['tail_until'] = meta.get('tail_until', 0.0)
+        data['written_until'] = meta.get('written_until', 0.0)
+        return data
+
+    def _write_snapshot(self, data: dict, ttl: float | None = None, written: bool = False) -> dict:
+        gen = self._bump_generation()
+        saved_at = time.time()
+        fresh_until = saved_at + (self.ttl if ttl is None else ttl)
+        files = {}
+        text = data.get('lakes_text')
+        for key in FRAME_KEYS:
+            frame = data.get(key)
+            if isinstance(frame, LongTextStore):
+                # RangeIndex: позиция в файле = позиция строки в lakes_df
+                frame = frame.frame().reset_index(drop=True)
+            if frame is not None:
+                files[key] = _write_frame(frame, os.path.join(self.directory, f"{gen}-{key}"))
+        meta = {
+            'generation': gen,
+            'saved_at': saved_at,
+            'fresh_until': fresh_until,
+            'written_until': fresh_until if written else 0.0,
+            'tail': list(data.get('lakes_tail', ())),
+            'tail_until': data.get('tail_until', 0.0),
+            'tail_ttl': data.get('tail_ttl'),
+            'pid': os.getpid(),
+            'files': files,
+            'text_digest': text.digest if isinstance(text, LongTextStore) else None,
+            'data': {'source': data.get('source'), 'errors': list(data.get('errors', ())),
+                     'lakes_names': [str(x) for x in data.get('lakes_names', ())],
+                     'reports_names': [str(x) for x in data.get('reports_names', ())],
+                     'lakes_columns': [str(c) for c in data.get('lakes_columns', ())]},
+        }
+        _atomic_write(self._meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        self._prune(gen)
+        return meta
+
+    def _prune(self, current: int):
+        # предыдущее поколение оставляем: его может дочитывать другой процесс
+        for name in os.listdir(self.directory):
+            head = name.split("-", 1)[0]
+            if head.isdigit() and int(head) < current - 1:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass   # Windows: файл ещё открыт (memory map) — удалится в следующий раз
+
+    def load(self) -> dict:
+        with FileLock(self._lock_path):
+            meta = self._read_meta()
+            if self._is_fresh(meta):
+                return self._read_snapshot(meta)
+            self.fetch_count += 1
+            data = self.loader()
+            if data.get('lakes_df') is None:
+                # источник недоступен: последний удачный снапшот лучше, чем ничего
+                if meta is not None and all(os.path.exists(p) for p in meta.get('files', {}).values()):
+                    old = self._read_snapshot(meta)
+                    old['errors'] = list(data.get('errors', ())) + list(old.get('errors', ()))
+                    return old
+                return data
+            ttl = None
+            if meta is not None and meta.get('tail') and time.time() < meta.get('tail_until', 0.0):
+                # дописанные строки, которых источник ещё не вернул, — снова в хвост, и сверка снова скоро
+                tail = unconfirmed_rows(meta['tail'], data['lakes_df'])
+                if tail:
+                    data = dict(data, lakes_tail=tail, tail_until=meta['tail_until'], tail_ttl=meta.get('tail_ttl'))
+                    ttl = meta.get('tail_ttl')
+            # читаем обратно то, что записали: у всех процессов одни и те же dtypes (сравнение версий в SharedDataStore)
+            return self._read_snapshot(self._write_snapshot(data, ttl))
@@ -0,0 +1,173 @@
+# sheets_scheduler.py
+# ---------------------------
+# Все вызовы Google Sheets API (запись) идут через SheetsScheduler:
+# - бюджет запросов в минуту (скользящее окно 60 с); общий для процессов сервера, если задан state_path
+#   (отметки времени запросов в JSON под файловой блокировкой)
+# - нет бюджета — вызов ждёт в очереди (пик нагрузки = медленнее, а не ошибка и не откат в локальный Excel)
+# - 429 и 5xx (и обрывы соединения) — повтор с экспоненциальной задержкой и случайным разбросом (full jitter),
+#   Retry-After от сервера учитывается
+# - metrics(): длина очереди, запас квоты, повторы, время ожидания
+# ---------------------------
+
+import json
+import random
+import threading
+import time
+
+from shared_cache import FileLock, _atomic_write
+
+try:
+    import requests
+    TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)
+except ImportError:
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+# квота Sheets API по умолчанию — 60 запросов записи в минуту на пользователя (сервис-аккаунт)
+SHEETS_REQUESTS_PER_MINUTE = 60
+SHEETS_MAX_RETRIES = 6
+SHEETS_BACKOFF_BASE = 1.0
+SHEETS_BACKOFF_MAX = 64.0
+# дольше ждать бюджет не имеет смысла — вызывающий получит SheetsQuotaTimeout
+SHEETS_MAX_WAIT = 300.0
+QUOTA_WINDOW = 60.0
+
+
+class SheetsQuotaTimeout(Exception):
+    pass
+
+
+def error_status(e) -> int | None:
+    """HTTP-статус ошибки API: gspread.APIError.code или response.status_code."""
+    code = getattr(e, 'code', None)
+    if isinstance(code, int) and code > 0:
+        return code
+    response = getattr(e, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_retryable(e) -> bool:
+    status = error_status(e)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    return isinstance(e, TRANSIENT_ERRORS)
+
+
+def _retry_after(e) -> float | None:
+    headers = getattr(getattr(e, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class SheetsScheduler:
+    def __init__(self, requests_per_minute: int = SHEETS_REQUESTS_PER_MINUTE, state_path=None,
+                 max_retries: int = SHEETS_MAX_RETRIES, backoff_base: float = SHEETS_BACKOFF_BASE,
+                 backoff_max: float = SHEETS_BACKOFF_MAX, max_wait: float = SHEETS_MAX_WAIT,
+                 clock=time.time, sleep=time.sleep):
+        self.budget = requests_per_minute
+        self.state_path = state_path
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()          # очередь внутри процесса — по одному к окну бюджета
+        self._window = []                      # отметки времени запросов (без state_path)
+        self._waiting = 0
+        self._stats = {'calls': 0, 'retries': 0, 'failures': 0, 'throttled': 0, 'wait_seconds': 0.0,
+                       'last_error': None}
+
+    # ----------------- бюджет -----------------
+    def _read_window(self, now) -> list:
+        if self.state_path is None:
+            stamps = self._window
+        else:
+            try:
+                with open(self.state_path, encoding="utf-8") as f:
+                    stamps = json.load(f)
+            except (OSError, ValueError):
+                stamps = []
+        return sorted(t for t in stamps if now - t < QUOTA_WINDOW)
+
+    def _write_window(self, stamps):
+        if self.state_path is None:
+            self._window = stamps
+        else:
+            _atomic_write(self.state_path, json.dumps(stamps).encode("utf-8"))
+
+    def _try_take(self, cost: int) -> float:
+        """Взять cost запросов из окна. 0 — взято, иначе сколько секунд подождать."""
+        now = self._clock()
+        stamps = self._read_window(now)
+        if len(stamps) + cost <= self.budget:
+            self._write_window(stamps + [now] * cost)
+            return 0.0
+        self._write_window(stamps)
+        # освободится, когда из окна выйдут лишние отметки
+        excess = len(stamps) + cost - self.budget
+        return max(0.01, stamps[min(excess, len(stamps)) - 1] + QUOTA_WINDOW - now) if stamps else 0.01
+
+    def acquire(self, cost: int = 1):
+        cost = min(cost, self.budget)
+        started = self._clock()
+        with self._lock:
+            self._waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    if self.state_path is None:
+                        wait = self._try_take(cost)
+                    else:
+                        with FileLock(self.state_path + ".lock"):
+                            wait = self._try_take(cost)
+                if not wait:
+                    return
+                waited = self._clock() - started
+                if waited + wait > self.max_wait:
+                    raise SheetsQuotaTimeout(f"Квота Google Sheets API вичерпана: очікування понад {self.max_wait:.0f} с")
+                with self._lock:
+                    self._stats['throttled'] += 1
+                    self._stats['wait_seconds'] += wait
+                self._sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    # ----------------- вызов -----------------
+    def call(self, fn, *args, cost: int = 1, **kwargs):
+        """fn(*args, **kwargs) в пределах бюджета; 429/5xx — повтор с задержкой."""
+        attempt = 0
+        while True:
+            self.acquire(cost)
+            with self._lock:
+                self._stats['calls'] += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    with self._lock:
+                        self._stats['failures'] += 1
+                        self._stats['last_error'] = f"{type(e).__name__}: {e}"
+                    raise
+                # full jitter: случайная задержка от 0 до base * 2^attempt
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                delay = max(delay, _retry_after(e) or 0.0)
+                attempt += 1
+                with self._lock:
+                    self._stats['retries'] += 1
+                    self._stats['last_error'] = f"{type(e).__name__}: {e}"
+                self._sleep(delay)
+
+    # ----------------- метрики -----------------
+    def metrics(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            if self.state_path is None:
+                used = len(self._read_window(now))
+            else:
+                with FileLock(self.state_path + ".lock"):
+                    used = len(self._read_window(now))
+            return {'queue_depth': self._waiting, 'budget': self.budget, 'used': used,
+                    'headroom': max(0, self.budget - used), **self._stats}
@@ -0,0 +1,52 @@
+import io
+
+import pandas as pd
+import pytest
+
+from bulk_import import import_file, import_key_columns, merge_import
+
+
+def make_table():
+    return pd.DataFrame({
+        'LakeHouse': ['A', 'A', 'B'],
+        'Folder': ['f1', 'f1', 'g1'],
+        'Element': ['e0', 'e1', 'e2'],
+        'Type': ['table', 'view', 'table'],
+        'Опис': ['o0', 'o1', 'o2'],
+    })
+
+
+def csv_file(df):
+    return io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+
+
+def test_upsert_matches_on_type_when_file_has_it():
+    incoming = pd.DataFrame({'LakeHouse': ['A', 'C'], 'Folder': ['f1', 'h1'], 'Element': ['e1', 'new'],
+                             'Type': ['view', 'table'], 'Опис': ['змінено', 'x']})
+    result = merge_import(make_table(), [incoming])
+    assert (result.inserted, result.updated) == (1, 1)
+    assert result.table['Опис'].tolist() == ['o0', 'змінено', 'o2', 'x']
+
+
+def test_file_without_type_updates_existing_rows_instead_of_duplicating():
+    incoming = pd.DataFrame({'LakeHouse': ['A', 'B'], 'Folder': ['f1', 'g1'], 'Element': ['e0', 'e2'],
+                             'Опис': ['n0', 'n2']})
+    result = import_file(make_table(), csv_file(incoming), 'no_type.csv', 'update')
+    assert (result.inserted, result.updated) == (0, 2)
+    assert result.table['Element'].tolist() == ['e0', 'e1', 'e2']
+    assert result.table['Опис'].tolist() == ['n0', 'o1', 'n2']
+    assert result.table['Type'].tolist() == ['table', 'view', 'table']
+    # insert по тому же ключу — рядки вже є, дублів немає
+    assert not merge_import(make_table(), [incoming], mode='insert').changed
+
+
+def test_upsert_without_base_key_column_is_rejected():
+    incoming = pd.DataFrame({'LakeHouse': ['A'], 'Folder': ['f1'], 'Element': ['e0'], 'Опис': ['n0']})
+    with pytest.raises(ValueError, match='Type'):
+        import_file(make_table(), csv_file(incoming), 'no_type.csv', 'upsert')
+
+
+def test_key_columns():
+    assert import_key_columns(['LakeHouse', 'Folder', 'Element'], ['LakeHouse', 'Folder', 'Element', 'Type']) == \
+        ['LakeHouse', 'Folder', 'Element']
+    assert import_key_columns(make_table().columns, make_table().columns) == ['LakeHouse', 'Folder', 'Element', 'Type']
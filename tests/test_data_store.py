@@ -0,0 +1,52 @@
+import pandas as pd
+
+from compact_frame import compact_lakes_table
+from data_store import SharedDataStore
+from shared_cache import SharedSnapshotCache
+from validation import validate_lakes_table
+
+
+def loader():
+    compact = compact_lakes_table(pd.DataFrame({
+        'LakeHouse': ['A', 'A', 'B'], 'Folder': ['f1', 'f1', 'g1'], 'Element': ['e0', 'e1', 'e2'],
+        'Type': ['table', 'view', None],
+    }))
+    return {'lakes_df': compact.main, 'lakes_text': compact.text, 'lakes_columns': compact.columns, 'source': 'local'}
+
+
+def test_known_keys_cover_base_and_tail_without_expanding_the_table():
+    store = SharedDataStore(loader)
+    first = store.get()
+    store.append_row({'LakeHouse': 'C', 'Folder': 'h1', 'Element': 'new', 'Type': 'table'})
+    snap = store.append_row({'LakeHouse': 'C', 'Folder': 'h1', 'Element': 'other', 'Type': 'table'})
+    rows = pd.DataFrame({'LakeHouse': [' a', 'C', 'C', 'B'], 'Folder': ['F1', 'h1', 'h1', 'g1'],
+                         'Element': ['e0', 'new', 'fresh', 'e2'], 'Type': ['TABLE', 'table', 'table', '']})
+    assert snap.known_keys(rows).tolist() == [True, True, False, True]
+    # множество ключей базы — одно на базу: дозаписи его не перестраивают, таблица не разворачивается
+    assert snap.base_cache is first.base_cache and 'keys' in first.base_cache
+    assert '_lakes_frames' not in snap.__dict__
+
+
+def test_form_row_duplicate_is_found_through_known_keys():
+    snap = SharedDataStore(loader).get()
+    row = pd.DataFrame([{'LakeHouse': 'A', 'Folder': 'f1', 'Element': 'e1', 'Type': 'view'}], index=[3])
+    violations = validate_lakes_table(row, rules=['duplicate_key'], known_keys=snap.known_keys)
+    assert violations['rule'].tolist() == ['duplicate_key']
+    assert validate_lakes_table(row.assign(Element='e9'), rules=['duplicate_key'], known_keys=snap.known_keys).empty
+
+
+def test_written_and_appended_data_stays_unconfirmed_until_the_source_returns_it(tmp_path):
+    cache = SharedSnapshotCache(str(tmp_path), loader, ttl=300)
+    store = SharedDataStore(cache.load, ttl=300, generation=cache.generation)
+    assert not store.get().unconfirmed
+    assert store.append_row({'LakeHouse': 'C', 'Folder': 'h1', 'Element': 'new', 'Type': 'table'}).unconfirmed
+    # запись в другом процессе: её снапшот приходит из общего кэша тоже несверенным
+    cache.publish(loader(), ttl=30)
+    other = SharedDataStore(cache.load, ttl=300, generation=cache.generation)
+    assert other.get().unconfirmed
+    # источник вернул то же — версия та же, но записанное уже сверено
+    fresh = SharedDataStore(loader, ttl=300)
+    fresh.get()
+    published = fresh.publish(loader(), confirm_after=30)
+    assert published.unconfirmed
+    assert not fresh.refresh().unconfirmed and fresh.version == published.version
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+import app_state
+import knowledge_core as core
+from compact_frame import expand_lakes_table
+from data_store import SharedDataStore
+from federation import (PRIMARY_SOURCE, SOURCE_COLUMN, Source, SourceResult, merge_sources, own_mask, own_rows,
+                        with_other_sources)
+from shared_cache import SharedSnapshotCache
+
+
+def primary_table():
+    return pd.DataFrame({'LakeHouse': ['A', 'A'], 'Folder': ['f1', 'f1'], 'Element': ['e0', 'e1'], 'Опис': ['o0', 'o1']})
+
+
+def department_table():
+    return pd.DataFrame({'LakeHouse': ['HR'], 'Folder': ['h1'], 'Element': ['d0'], 'Опис': ['d']})
+
+
+def federated_data():
+    lakes = merge_sources(primary_table(), [SourceResult(Source('HR', 'excel', 'hr.xlsx'), department_table(), 1.0)])
+    return core.snapshot_data(list(lakes['LakeHouse']), [], lakes, None, 'local')
+
+
+def test_untagged_and_empty_source_rows_are_own():
+    df = pd.DataFrame({'Element': ['a', 'b', 'c', 'd'], SOURCE_COLUMN: [PRIMARY_SOURCE, None, '', 'HR']})
+    assert own_mask(df).tolist() == [True, True, True, False]
+    assert own_rows(df)['Element'].tolist() == ['a', 'b', 'c']
+    assert with_other_sources(own_rows(df), df)[SOURCE_COLUMN].tolist() == [PRIMARY_SOURCE] * 3 + ['HR']
+
+
+@pytest.fixture
+def federated_store(tmp_path, monkeypatch):
+    cache = SharedSnapshotCache(str(tmp_path), federated_data, ttl=300)
+    store = SharedDataStore(cache.load, ttl=300, generation=cache.generation)
+    monkeypatch.setattr(app_state, '_shared_cache', cache)
+    monkeypatch.setattr(app_state, '_data_store', store)
+    store.get()
+    return store
+
+
+def test_appended_row_survives_the_next_save(federated_store):
+    # форма не показывает «Джерело», но строка с пустой меткой тоже своя
+    for row in ({'LakeHouse': 'A', 'Folder': 'f1', 'Element': 'new', 'Опис': 'x'},
+                {'LakeHouse': 'A', 'Folder': 'f1', 'Element': 'blank', 'Опис': 'y', SOURCE_COLUMN: ''}):
+        app_state.publish_append(row)
+    snap = federated_store.get()
+    table = expand_lakes_table(snap.lakes_df, snap.lakes_text, snap.lakes_columns)
+    # редактор показывает её вместе со строками основной таблицы
+    assert table.loc[own_mask(table).to_numpy(dtype=bool), 'Element'].tolist() == ['e0', 'e1', 'new', 'blank']
+    # полная запись (own_rows — то, что уходит в источник) её не теряет, строки отделов — не пишутся
+    assert own_rows(table)['Element'].tolist() == ['e0', 'e1', 'new', 'blank']
+    written = app_state.publish_write(table, table, None, 'local')
+    rewritten = expand_lakes_table(written.lakes_df, written.lakes_text, written.lakes_columns)
+    assert rewritten['Element'].tolist() == ['e0', 'e1', 'new', 'blank', 'd0']
+    assert rewritten[SOURCE_COLUMN].tolist() == [PRIMARY_SOURCE] * 4 + ['HR']
@@ -0,0 +1,25 @@
+import urllib.parse
+
+import pytest
+
+from gviz_query import GvizLakeQueries
+
+
+def test_failed_query_does_not_block_other_queries():
+    calls = []
+
+    def fetch(url, timeout):
+        tq = urllib.parse.unquote(url.split("tq=", 1)[1])
+        calls.append(tq)
+        if "where" in tq:
+            raise TimeoutError("slow query")
+        return b"LakeHouse,Folder\nA,f1\n"
+
+    queries = GvizLakeQueries("http://sheet?tqx=out:csv", fetch=fetch)
+    with pytest.raises(TimeoutError):
+        queries.query("select * where B = 'A'")
+    # тот же запрос RETRY_AFTER секунд не повторяется, остальные читаются как обычно
+    with pytest.raises(TimeoutError):
+        queries.query("select * where B = 'A'")
+    assert list(queries.query("select *").columns) == ["LakeHouse", "Folder"]
+    assert calls == ["select * where B = 'A'", "select *"]
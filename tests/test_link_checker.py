@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from link_checker import LinkChecker
+from link_test_server import start_link_test_server
+
+
+@pytest.fixture(scope="module")
+def base():
+    server = start_link_test_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def checker():
+    checker = LinkChecker(timeout=1.0, workers=8, per_host=8, rate_per_host=1000)
+    yield checker
+    checker.close()
+
+
+@pytest.mark.parametrize("path, state, status", [
+    ("/ok", "ok", 200),
+    ("/redirect", "ok", 200),
+    ("/nohead", "ok", 200),
+    ("/login", "auth", 401),
+    ("/dead", "broken", 404),
+    ("/gone", "broken", 410),
+    ("/loop", "error", 302),
+])
+def test_status(base, checker, path, state, status):
+    result = checker.check(base + path)
+    assert (result.state, result.status) == (state, status)
+
+
+def test_slow_link_times_out(base, checker):
+    assert checker.check(base + "/slow").state == "timeout"
+
+
+def test_invalid_and_closed(checker):
+    assert checker.check("not a url").state == "invalid"
+    assert checker.check("http://127.0.0.1:1/closed").state == "error"
+
+
+def test_check_many_wait_skips_slow_links(base, checker):
+    started = time.monotonic()
+    results = checker.check_many([base + "/ok", base + "/slow"], wait=0.5)
+    assert time.monotonic() - started < 0.9
+    assert base + "/ok" in results and base + "/slow" not in results
+    # недождавшаяся ссылка проверяется дальше и попадает в кэш
+    assert checker.check(base + "/slow").state == "timeout"
+    assert base + "/slow" in checker.peek_many([base + "/slow"])
+
+
+def test_same_url_checked_once(base, checker):
+    # /once/slow отвечает дольше таймаута — все submit приходят, пока первая проверка идёт
+    futures = [checker.submit(base + "/once/slow") for _ in range(5)]
+    assert len({id(f) for f in futures}) == 1
+    assert checker.check(base + "/once/slow") is futures[0].result()
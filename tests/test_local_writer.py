@@ -0,0 +1,90 @@
+import threading
+
+import pandas as pd
+
+from local_writer import LocalWriter, apply_changes, table_changes
+
+
+def make_table():
+    return pd.DataFrame({
+        'LakeHouse': ['A', 'A', 'B', 'B'],
+        'Folder': ['f1', 'f1', 'g1', 'g1'],
+        'Element': ['e0', 'e1', 'e2', 'e3'],
+        'Опис': ['o0', 'o1', 'o2', 'o3'],
+    })
+
+
+def test_changes_round_trip():
+    base = make_table()
+    table = base.drop(index=[1]).copy()
+    table.loc[2, 'Опис'] = 'new'
+    table = pd.concat([table.iloc[:1], pd.DataFrame([{'LakeHouse': 'A', 'Folder': 'f1', 'Element': 'ins', 'Опис': 'x'}]),
+                       table.iloc[1:]], ignore_index=True)
+    change = table_changes(base, table)
+    assert len(change.deletes) == 1 and len(change.updates) == 1 and len(change.inserts) == 1
+    out, applied, conflicts = apply_changes(base, change)
+    assert (applied, conflicts) == (3, 0)
+    assert out.astype(object).equals(table.astype(object))
+
+
+def test_edits_of_two_sessions_both_survive():
+    base = make_table()
+    first = base.copy()
+    first.loc[0, 'Опис'] = 'from first'
+    second = base.copy()
+    second.loc[3, 'Опис'] = 'from second'
+    latest, _, _ = apply_changes(base, table_changes(base, first))
+    out, applied, conflicts = apply_changes(latest, table_changes(base, second))
+    assert (applied, conflicts) == (1, 0)
+    assert out['Опис'].tolist() == ['from first', 'o1', 'o2', 'from second']
+
+
+def test_edit_of_row_deleted_elsewhere_is_a_conflict():
+    base = make_table()
+    latest = base.drop(index=[2]).reset_index(drop=True)
+    edited = base.copy()
+    edited.loc[2, 'Опис'] = 'too late'
+    out, applied, conflicts = apply_changes(latest, table_changes(base, edited))
+    assert (applied, conflicts) == (0, 1)
+    assert out['Element'].tolist() == ['e0', 'e1', 'e3']
+
+
+def test_insert_lands_after_its_anchor_and_is_not_duplicated():
+    base = make_table()
+    row = {'LakeHouse': 'A', 'Folder': 'f1', 'Element': 'ins', 'Опис': 'x'}
+    edited = pd.concat([base.iloc[:1], pd.DataFrame([row]), base.iloc[1:]], ignore_index=True)
+    change = table_changes(base, edited)
+    # в книге перед якорем уже появилась чужая строка — вставка всё равно после e0
+    latest = pd.concat([pd.DataFrame([{'LakeHouse': 'Z', 'Folder': 'z', 'Element': 'z0', 'Опис': ''}]), base],
+                       ignore_index=True)
+    out, _, _ = apply_changes(latest, change)
+    assert out['Element'].tolist() == ['z0', 'e0', 'ins', 'e1', 'e2', 'e3']
+    # та же вставка второй раз (строка уже в книге) — обновление, а не дубль
+    again, _, _ = apply_changes(out, change)
+    assert again['Element'].tolist() == out['Element'].tolist()
+
+
+def test_writer_batches_pending_changes_into_one_write():
+    book = {'lakes': make_table(), 'writes': 0}
+    gate = threading.Event()
+
+    def load():
+        gate.wait(5)
+        return book['lakes'], None
+
+    def write(df, reports):
+        book['lakes'], book['writes'] = df, book['writes'] + 1
+
+    writer = LocalWriter('unused.xlsx', load, write)
+    writer.locked = lambda: threading.Lock()   # без файловой блокировки
+    base = make_table()
+    futures = []
+    for i in range(4):
+        edited = base.copy()
+        edited.loc[i, 'Опис'] = f'edit {i}'
+        futures.append(writer.submit(edited, base=base, note=f'n{i}'))
+    gate.set()
+    results = [f.result(timeout=10) for f in futures]
+    assert book['lakes']['Опис'].tolist() == ['edit 0', 'edit 1', 'edit 2', 'edit 3']
+    assert book['writes'] <= 2 and sum(r.applied for r in results) == 4
+    assert max(r.batch for r in results) >= 3
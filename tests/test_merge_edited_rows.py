@@ -0,0 +1,72 @@
+import pandas as pd
+
+from compact_frame import compact_lakes_table, editor_rows, expand_lakes_table, merge_edited_rows
+
+
+def make_full():
+    return pd.DataFrame({
+        'LakeHouse': ['A', 'A', 'A', 'B', 'B', 'B', 'C'],
+        'Folder': ['f1', 'f1', 'f2', 'g1', 'g1', 'g2', 'h1'],
+        'Element': [f'e{i}' for i in range(7)],
+        'Опис': [f'опис {i}' for i in range(7)],
+    })
+
+
+def slice_of(full, labels):
+    return full.loc[labels].copy()
+
+
+def test_edit_changes_only_the_edited_cell():
+    full = make_full()
+    original = slice_of(full, [3, 4])
+    edited = original.copy()
+    edited.loc[4, 'Опис'] = 'нове'
+    out = merge_edited_rows(full, original, edited)
+    assert out['Опис'].tolist() == ['опис 0', 'опис 1', 'опис 2', 'опис 3', 'нове', 'опис 5', 'опис 6']
+    assert out.index.tolist() == list(range(7))
+
+
+def test_delete_removes_only_the_slice_row():
+    full = make_full()
+    original = slice_of(full, [3, 4])
+    out = merge_edited_rows(full, original, original.drop(index=[3]))
+    assert out['Element'].tolist() == ['e0', 'e1', 'e2', 'e4', 'e5', 'e6']
+
+
+def test_insert_with_label_of_a_row_outside_the_slice():
+    # редактор даёт новой строке метку max+1 среза — это метка существующей строки e5 другой папки
+    full = make_full()
+    original = slice_of(full, [3, 4])
+    new_row = pd.DataFrame({'LakeHouse': ['B'], 'Folder': ['g1'], 'Element': ['new'], 'Опис': ['x']}, index=[5])
+    out = merge_edited_rows(full, original, pd.concat([original, new_row]))
+    # новая строка — сразу после среза, строка e5 не перезаписана
+    assert out['Element'].tolist() == ['e0', 'e1', 'e2', 'e3', 'e4', 'new', 'e5', 'e6']
+    assert out.loc[out['Element'] == 'e5', 'Опис'].item() == 'опис 5'
+
+
+def test_edit_delete_and_insert_together():
+    full = make_full()
+    original = slice_of(full, [0, 1, 2])
+    edited = original.drop(index=[1])
+    edited.loc[2, 'Folder'] = 'f9'
+    edited = pd.concat([edited, pd.DataFrame({'LakeHouse': ['A'], 'Folder': ['f2'], 'Element': ['new']}, index=[3])])
+    out = merge_edited_rows(full, original, edited)
+    assert out['Element'].tolist() == ['e0', 'e2', 'new', 'e3', 'e4', 'e5', 'e6']
+    assert out.loc[1, 'Folder'] == 'f9'
+    assert pd.isna(out.loc[2, 'Опис'])
+
+
+def test_readonly_preview_columns_keep_full_text():
+    long_text = 'довгий текст ' * 50
+    full = make_full().assign(Опис=[long_text] * 7)
+    compact = compact_lakes_table(full)
+    index = full.index[full['LakeHouse'] == 'B']
+    original, readonly = editor_rows(compact.main, compact.text, compact.columns, index, preview_chars=20)
+    assert readonly == ['Опис']
+    edited = original.copy()
+    edited.loc[index[0], 'Element'] = 'renamed'
+    table = expand_lakes_table(compact.main, compact.text, compact.columns)
+    out = merge_edited_rows(table, original, edited, readonly)
+    # обрезанный текст из редактора не попадает в запись
+    assert (out['Опис'] == long_text).all()
+    assert out.loc[3, 'Element'] == 'renamed'
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from schema import TEXT, coerce_column, resolve_columns
+
+
+def test_first_column_becomes_lakehouse_only_when_it_is_unmapped():
+    assert resolve_columns(['Озеро', 'Folder', 'Element']) == {'Озеро': 'LakeHouse'}
+    # первая колонка — сама папка: её не переименовать в лейк, лейка просто нет
+    assert resolve_columns(['Папка', 'Element']) == {'Папка': 'Folder'}
+    assert resolve_columns(['Folder', 'Element']) == {}
+    assert resolve_columns(['x', 'Назва']) == {'Назва': 'LakeHouse'}
+
+
+def test_text_column_keeps_blanks_as_nan():
+    values = pd.Series(['a ', None, '', 3], dtype=object)
+    assert coerce_column(values, TEXT).isna().tolist() == [False, True, True, False]
+    with pd.option_context('future.infer_string', False):
+        # pandas 2: astype('str') сделал бы из пропуска строку 'nan'
+        coerced = coerce_column(values, TEXT)
+    assert coerced.isna().tolist() == [False, True, True, False]
+    assert coerced.dropna().tolist() == ['a', '3']
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from version_history import VersionHistory, history_text
+
+
+def make_table(n=10):
+    return pd.DataFrame({
+        'LakeHouse': ['A'] * (n // 2) + ['B'] * (n - n // 2),
+        'Folder': [f'f{i % 3}' for i in range(n)],
+        'Element': [f'e{i}' for i in range(n)],
+        'Опис': [f'опис {i}' for i in range(n)],
+        'Date': pd.to_datetime(['2024-01-02'] * n),
+    })
+
+
+def as_text(df):
+    return history_text(df).reset_index(drop=True)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return VersionHistory(str(tmp_path), checkpoint_every=5)
+
+
+def test_delta_round_trip(history):
+    v1 = make_table()
+    v2 = v1.drop(index=[3]).copy()
+    v2.loc[5, 'Опис'] = 'змінено'
+    v2 = pd.concat([v2, pd.DataFrame([{'LakeHouse': 'B', 'Folder': 'f9', 'Element': 'new', 'Опис': 'x'}])],
+                   ignore_index=True)
+    history.record(v1, 'local', 'v1')
+    entry = history.record(v2, 'local', 'v2')
+    assert entry['kind'] == 'delta'
+    assert (entry['inserted'], entry['updated'], entry['deleted']) == (1, 1, 1)
+    assert history.table(1).equals(as_text(v1))
+    assert history.table(2).equals(as_text(v2))
+    changes = history.diff(1, 2)
+    assert sorted(changes['change']) == ['added', 'changed', 'removed']
+
+
+def test_unchanged_table_is_not_a_version(history):
+    history.record(make_table(), 'local')
+    assert history.record(make_table(), 'local') is None
+    assert history.head() == 1
+
+
+def test_restore_through_checkpoints(history):
+    tables = []
+    table = make_table()
+    for i in range(12):
+        table = table.copy()
+        table.loc[i % len(table), 'Опис'] = f'версія {i}'
+        tables.append(table)
+        history.record(table, 'local', f'v{i + 1}')
+    kinds = history.versions().sort_values('version')['kind'].tolist()
+    assert kinds.count('checkpoint') >= 2
+    for version, expected in enumerate(tables, start=1):
+        assert history.table(version).equals(as_text(expected))
+
+
+def test_duplicate_keys_are_kept_apart(history):
+    v1 = pd.concat([make_table(4), make_table(4).iloc[[0]]], ignore_index=True)
+    v2 = v1.copy()
+    v2.loc[4, 'Опис'] = 'другий повтор'
+    history.record(v1, 'local')
+    history.record(v2, 'local')
+    restored = history.table(2)
+    assert restored['Опис'].tolist() == as_text(v2)['Опис'].tolist()
+
+
+def test_record_rows_appends_on_top_of_head(history):
+    v1 = make_table(4)
+    history.record(v1, 'local')
+    entry = history.record_rows([{'LakeHouse': 'C', 'Folder': 'h', 'Element': 'added', 'Нова': 'x'}], 'local', 'form')
+    assert (entry['kind'], entry['inserted'], entry['updated'], entry['deleted']) == ('delta', 1, 0, 0)
+    table = history.table(2)
+    assert table['Element'].tolist() == ['e0', 'e1', 'e2', 'e3', 'added']
+    assert table['Нова'].tolist() == ['', '', '', '', 'x']
+    # «версія до додавання» — рівно таблиця без рядка
+    assert history.table(1).equals(as_text(v1))
+
+
+def test_record_rows_without_history_is_noop(history):
+    assert history.record_rows([{'LakeHouse': 'C', 'Folder': 'h', 'Element': 'x'}]) is None
+    assert history.head() is None
+
+
+def test_record_rows_is_a_delta_on_top_of_the_remembered_head(history, tmp_path, monkeypatch):
+    v1 = make_table(4)
+    history.record(v1, 'local')
+    # повтор ключа e0 — номер повтора продолжает нумерацию таблицы
+    rows = [{'LakeHouse': 'A', 'Folder': 'f0', 'Element': 'e0', 'Опис': 'повтор'},
+            {'LakeHouse': 'C', 'Folder': 'h', 'Element': 'added'}]
+    monkeypatch.setattr(history, '_text_table', lambda *a: pytest.fail("голова відновлюється"))
+    for row in rows:
+        history.record_rows([row], 'local', 'form')
+    monkeypatch.undo()
+    expected = pd.concat([v1, pd.DataFrame(rows)], ignore_index=True)
+    assert VersionHistory(str(tmp_path)).table(3).equals(as_text(expected))
+    # та сама таблиця повним записом — не нова версія: ідентифікатори рядків збігаються
+    assert history.record(expected, 'local') is None
+    assert VersionHistory(str(tmp_path)).record(expected, 'local') is None
+
+
+def test_record_rows_never_takes_a_checkpoint(history, tmp_path):
+    v1 = make_table(4)
+    history.record(v1, 'local')
+    added = [{'LakeHouse': 'C', 'Folder': 'h', 'Element': f'x{i}', **({'Нова': 'n'} if i == 3 else {})} for i in range(8)]
+    for row in added:
+        history.record_rows([row], 'local')
+    kinds = history.versions().sort_values('version')['kind'].tolist()
+    assert kinds == ['checkpoint'] + ['delta'] * 8
+    expected = pd.concat([v1, pd.DataFrame(added)], ignore_index=True)
+    cold = VersionHistory(str(tmp_path), checkpoint_every=5)
+    for version in (5, 9):
+        assert cold.table(version).equals(as_text(expected.iloc[:version + 3].dropna(axis=1, how='all')))
+    # полная запись после серии дозаписей — уже копия
+    changed = expected.copy()
+    changed.loc[0, 'Опис'] = 'змінено'
+    assert cold.record(changed, 'local')['kind'] == 'checkpoint'
@@ -0,0 +1,344 @@
+# ui_common.py
+# ---------------------------
+# Общее для страниц приложения (app_pages/*): вывод картинок и нарушений, обёртки записи с сообщениями в UI,
+# экспорт, общий снапшот с сообщениями о нём в сайдбаре (load_snapshot)
+# Модуль импортируется один раз на процесс — на rerun страницы выполняется только код самой страницы.
+# ---------------------------
+
+import streamlit as st
+from datetime import datetime
+import os
+import pandas as pd
+from PIL import Image
+import base64
+
+import app_state
+import knowledge_core as core
+from knowledge_core import EXCEL_FILE_PATH, LOCAL_DATA_DIR, CREDENTIALS_FILE_NAME
+from asset_store import asset_hash, decode_inline_image
+from data_store import Snapshot
+from federation import SOURCE_COLUMN
+from sheets_scheduler import SheetsQuotaTimeout
+from compact_frame import expand_lakes_table
+from export_engine import EXPORT_FORMATS, ExportCache
+from validation import ERROR, validate_lakes_table
+from link_checker import LinkChecker
+
+# ----------------- Утилиты отображения -----------------
+def display_image_from_path(image_path, caption=None, width=None):
+    try:
+        if image_path.startswith(('http://', 'https://')):
+            st.image(image_path, caption=caption, width=width)
+        elif os.path.exists(image_path):
+            image = Image.open(image_path)
+            st.image(image, caption=caption, width=width)
+        else:
+            st.warning(f"⚠️ Зображення не знайдено: {image_path}")
+    except Exception as e:
+        st.error(f"❌ Помилка при завантаженні зображення: {e}")
+
+def display_image_from_base64(base64_string, caption=None, width=None):
+    try:
+        image_data = base64.b64decode(base64_string)
+        st.image(image_data, caption=caption, width=width)
+    except Exception as e:
+        st.error(f"❌ Помилка при декодуванні зображення: {e}")
+
+def process_text_with_images(text: str):
+    if not text:
+        return text
+    import re
+    image_pattern = r'\[IMAGE:(.*?)\]'
+    matches = re.findall(image_pattern, text)
+    if matches:
+        parts = re.split(image_pattern, text)
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                if part.strip():
+                    st.markdown(part)
+            else:
+                image_path = part.strip()
+                digest = asset_hash(image_path)
+                inline = None if digest else decode_inline_image(image_path)
+                if digest:
+                    # картинка из хранилища (asset_store.py): байты из LRU процесса
+                    data = core.asset_store().get(digest)
+                    if data is None:
+                        st.warning(f"⚠️ Зображення не знайдено: {image_path}")
+                    else:
+                        st.image(data, width=600)
+                elif inline is not None:
+                    st.image(inline, width=600)
+                elif image_path.startswith('C:\\') and 'PL-notebook.png' in image_path:
+                    github_url = "https://raw.githubusercontent.com/AleksandraFilatova/knowledge-transfer-app/main/Image/Sac-notebook.PNG"
+                    display_image_from_path(github_url, width=600)
+                elif 'github.com' in image_path and '/blob/' in image_path:
+                    raw_url = image_path.replace('github.com', 'raw.githubusercontent.com').replace('/blob/', '/')
+                    display_image_from_path(raw_url, width=600)
+                elif image_path.startswith('http'):
+                    # Будь-який URL (Google Drive, OneDrive, тощо)
+                    display_image_from_path(image_path, width=600)
+                else:
+                    display_image_from_path(image_path, width=600)
+    else:
+        st.markdown(text)
+
+def show_violations(violations: pd.DataFrame, title: str):
+    errors = violations[violations['severity'] == ERROR]
+    if not errors.empty:
+        st.error(f"❌ {title}: {len(errors)} помилок")
+    warnings = violations[violations['severity'] != ERROR]
+    if not warnings.empty:
+        st.warning(f"⚠️ {title}: {len(warnings)} попереджень")
+    st.dataframe(violations.head(200), use_container_width=True, hide_index=True)
+
+# ----------------- Чтение/запись: обёртки над knowledge_core с сообщениями в UI -----------------
+@st.cache_data(ttl=300)
+def load_lakes_and_reports(excel_path):
+    try:
+        return core.load_lakes_and_reports(excel_path)
+    except Exception as e:
+        st.error(f"❌ Помилка при завантаженні файлу: {e}")
+        st.warning("💡 Закрийте файл в Excel, дочекайтесь синхронізації OneDrive, оновіть сторінку.")
+        return [], [], None, None
+
+def create_default_excel_file(local_path):
+    try:
+        core.write_default_excel(local_path)
+        return True
+    except Exception as e:
+        st.error(f"❌ Помилка створення файлу: {e}")
+        return False
+
+def save_data_to_excel(df, filename, reports_table=None, base=None, note=""):
+    try:
+        st.info(f"💾 Резервне локальне збереження: {filename}")
+        # через чергу писаря книги: зміни лягають на її останній стан, а не на застарілий знімок сесії
+        result = core.save_excel(df, filename, reports_table, base=base, note=note)
+        st.success(f"✅ Локальний файл збережено: {os.path.abspath(filename)}")
+        if result.conflicts:
+            st.warning(f"⚠️ Пропущено змін: {result.conflicts} — ці рядки вже видалено в іншій сесії")
+        if result.batch > 1:
+            st.caption(f"Записано одним збереженням разом зі змінами інших сесій: {result.batch - 1}")
+        return True, result
+    except PermissionError as e:
+        st.error(f"❌ Доступ до файлу: {e}")
+        return False, None
+    except Exception as e:
+        st.error(f"❌ Помилка при локальному збереженні: {type(e).__name__}: {e}")
+        return False, None
+
+def append_row_to_local_store(row: dict, filename):
+    try:
+        journal = core.append_row_to_journal(row, filename)
+        st.success(f"✅ Запис додано локально: {os.path.abspath(journal)}")
+        return True, journal
+    except PermissionError as e:
+        st.error(f"❌ Доступ до файлу: {e}")
+        return False, None
+    except Exception as e:
+        st.error(f"❌ Помилка при локальному збереженні: {type(e).__name__}: {e}")
+        return False, None
+
+def load_from_google_sheets():
+    try:
+        return core.load_from_google_sheets()
+    except Exception as e:
+        st.error(f"❌ Помилка завантаження з Google Sheets (читання): {e}")
+        return [], [], None, None
+
+def _service_account_info():
+    # через st.secrets (рекомендовано для Streamlit Cloud); иначе core ищет JSON-файл
+    return st.secrets["gcp_service_account"] if "gcp_service_account" in st.secrets else None
+
+def _report_sheets_error(e):
+    if isinstance(e, core.SheetsAPIError):
+        st.error(f"❌ Google API error: {e}")
+        st.info("🔎 Перевір: 1) сервіс-акаунт має доступ (Editor) до таблиці; 2) ID таблиці вірний; 3) назви листів 'Lakes'/'Reports'.")
+    elif isinstance(e, SheetsQuotaTimeout):
+        st.error(f"❌ {e}")
+    elif isinstance(e, FileNotFoundError):
+        st.error(f"❌ Креденшіали: {e}")
+    else:
+        st.error(f"❌ Несподівана помилка запису в Google Sheets: {e}")
+
+def save_to_google_sheets(df: pd.DataFrame, reports_table: pd.DataFrame | None = None) -> bool:
+    try:
+        # у пік запис чекає квоту API в черзі, а не падає в локальний Excel
+        with st.spinner("☁️ Запис у Google Sheets…"):
+            core.write_google_sheets(df, reports_table, _service_account_info())
+        st.success("✅ Дані успішно збережено в Google Sheets!")
+        return True
+    except Exception as e:
+        _report_sheets_error(e)
+        return False
+
+def save_lakes_table(df: pd.DataFrame, reports_table, previous: pd.DataFrame, note: str) -> bool:
+    """
+    Вся таблиця: Google Sheets, інакше локальний Excel (резерв). Успішний запис — нова версія в історії
+    і одразу нова версія спільного знімка (publish_written), без перечитування джерела.
+    """
+    if not save_to_google_sheets(df, reports_table):
+        # книга пишеться різницею від previous; знімок із Google Sheets — інша таблиця, тоді заміна цілком
+        # (версію в історію записує писар книги — одну на пачку збережень)
+        base = previous if app_state.data_store().peek().source == 'local' else None
+        ok, result = save_data_to_excel(df, EXCEL_FILE_PATH, reports_table, base=base, note=note)
+        if ok:
+            # у книзі — і зміни інших сесій з тієї ж пачки: знімок бере записану таблицю, а не df
+            if result.conflicts:
+                note = f"{note}; пропущено змін: {result.conflicts} — рядки вже видалено в іншій сесії"
+            publish_written(result.table, df, reports_table, 'local', note)
+        return ok
+    try:
+        core.record_version(df, 'google_sheets', note, previous=previous)
+    except Exception as e:
+        st.warning(f"⚠️ Дані збережено, але версію в історію не записано: {e}")
+    publish_written(df, df, reports_table, 'google_sheets', note)
+    return True
+
+def publish_written(written, df, reports_table, source, note):
+    """Записане — одразу у спільний знімок (read-your-writes); повідомлення показує сторінка після rerun."""
+    try:
+        snapshot = app_state.publish_write(written, df, reports_table, source)
+        st.session_state['save_notice'] = f"✅ Збережено ({note}) — версія даних {snapshot.version}"
+    except Exception as e:
+        # запис уже в джерелі — знімок просто перечитається
+        refresh_data()
+        st.session_state['save_notice'] = f"✅ Збережено ({note}); знімок перечитано з джерела ({type(e).__name__})"
+
+def record_appended_row(row: dict, source: str, snap):
+    """
+    Доданий запис — теж збереження: окрема версія в історії (без неї він потрапив би в дельту наступного запису).
+    snap — знімок до додавання: повна таблиця з нього розгортається, лише якщо історії ще немає.
+    """
+    note = "додано запис: " + " / ".join(str(row.get(c, '')) for c in ('LakeHouse', 'Folder', 'Element'))
+    try:
+        core.record_appended_row(row, source, note, previous=lambda: full_lakes_table(snap))
+    except Exception as e:
+        st.warning(f"⚠️ Запис додано, але версію в історію не записано: {e}")
+
+def append_row_to_google_sheets(row: dict, columns) -> bool:
+    try:
+        core.append_row_google_sheets(row, columns, _service_account_info())
+        st.success("✅ Запис додано в Google Sheets!")
+        return True
+    except Exception as e:
+        _report_sheets_error(e)
+        return False
+
+# ----------------- Картка лейка -----------------
+def create_lake_details_card(lake_row: pd.Series):
+    if lake_row is None or lake_row.empty:
+        return "Немає даних про лейк"
+    card_html = f"""
+    <div style="
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 20px; border-radius: 10px; color: white; margin: 10px 0;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    ">
+        <h3 style="margin: 0 0 15px 0; color: white;">🏞️ {lake_row.get('LakeHouse', 'Невідомий лейк')}</h3>
+    """
+    for col in lake_row.index:
+        if pd.notna(lake_row[col]) and col not in ['LakeHouse', 'Folder', 'Element', 'Загальна інформація про лейк', 'Внесення змін']:
+            display_col_name = {'Type': 'Тип', 'Опис': 'Опис', 'Оновлення': 'Оновлення', 'Особливості': 'Особливості'}.get(col, col)
+            card_html += f'<p style="margin:5px 0;"><strong>{display_col_name}:</strong> {lake_row[col]}</p>'
+    card_html += "</div>"
+    return card_html
+
+# ----------------- Общий кэш данных (один на процесс, снапшот — один на сервер; см. app_state.py) -----------------
+def refresh_data():
+    """Перечитать источник: остальные процессы сервера тоже перечитают данные, этот — сразу."""
+    app_state.shared_cache().invalidate()
+    return app_state.data_store().refresh()
+
+@st.cache_resource
+def get_link_checker():
+    # один пул соединений и кэш статусов ссылок на процесс, общий для всех сессий
+    return LinkChecker()
+
+# снапшот неизменяем, версия растёт при любом изменении — ключом служит номер версии
+# (тексты снапшота читаются из файла по запросу и не хэшируются); хранится только последняя версия —
+# развёрнутая таблица в object-dtype в разы больше компактного снапшота
+@st.cache_resource(hash_funcs={Snapshot: lambda snap: snap.version}, max_entries=1)
+def full_lakes_table(snap):
+    """Полная таблица в исходном виде (без category, все колонки) — для записи, импорта и проверок по всей таблице."""
+    return expand_lakes_table(snap.lakes_df, snap.lakes_text, snap.lakes_columns)
+
+@st.cache_resource
+def get_export_cache():
+    # номера версий у каждого процесса свои — и папка экспорта своя
+    return ExportCache(os.path.join(LOCAL_DATA_DIR, "exports", str(os.getpid())))
+
+def export_download_button(label, snap, fmt, scope, key):
+    """Файл строится только по нажатию (в отдельном потоке) и кэшируется по версии данных и фильтру.
+    snap — снапшот или функция, которая его вернёт (тоже по нажатию)."""
+    cache = get_export_cache()
+
+    def build():
+        s = snap() if callable(snap) else snap
+        return cache.read(s.version, fmt, scope, s.lakes_df, s.lakes_text, s.lakes_columns)
+
+    st.download_button(
+        label,
+        data=build,
+        file_name=f"{scope.file_stem()}_{datetime.now().strftime('%Y%m%d')}.{EXPORT_FORMATS[fmt]['ext']}",
+        mime=EXPORT_FORMATS[fmt]['mime'], key=key, on_click="ignore",
+    )
+
+# ----------------- Данные страницы -----------------
+def credentials_hint():
+    """Подсказка по кредам (если нет st.secrets и файла) — на страницах, которые пишут в Google Sheets."""
+    if not ("gcp_service_account" in st.secrets):
+        CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), CREDENTIALS_FILE_NAME)
+        if not os.path.exists(CREDENTIALS_FILE):
+            st.sidebar.markdown("---")
+            st.sidebar.warning("⚠️ Google Sheets credentials не знайдено")
+            uploaded_credentials = st.sidebar.file_uploader("Завантажте service_account_credentials.json", type=['json'], key='credentials_upload')
+            if uploaded_credentials is not None:
+                with open(CREDENTIALS_FILE, "wb") as f:
+                    f.write(uploaded_credentials.getbuffer())
+                st.sidebar.success("✅ Credentials завантажено!")
+                st.rerun()
+
+def load_snapshot():
+    """
+    Общий снапшот процесса (Google Sheets, затем локальный fallback) и сообщения о нём.
+    Прогрев уже сделан при старте (serve.py); при `streamlit run` его делает первый rerun процесса.
+    """
+    app_state.ensure_warm()
+    snapshot = app_state.data_store().get()
+    lakes_table = snapshot.lakes_df
+    # сессия узнаёт о новых данных по номеру версии, без повторной загрузки
+    prev_version = st.session_state.get('data_version')
+    if prev_version is not None and prev_version != snapshot.version:
+        st.toast(f"🔄 Дані оновлено (версія {snapshot.version})")
+    st.session_state['data_version'] = snapshot.version
+
+    for err in snapshot.errors:
+        st.error(f"❌ {err}")
+
+    if snapshot.source == 'google_sheets':
+        st.sidebar.success(f"✅ Дані завантажено з Google Sheets ({len(lakes_table)} рядків)")
+    elif snapshot.source == 'local':
+        st.sidebar.info(f"📂 Використовую локальний файл: `{os.path.abspath(EXCEL_FILE_PATH)}`")
+    if lakes_table is not None and SOURCE_COLUMN in lakes_table.columns:
+        per_source = lakes_table[SOURCE_COLUMN].value_counts(sort=False)
+        st.sidebar.caption("🗂️ Джерела: " + " · ".join(f"{name} ({n})" for name, n in per_source.items() if n))
+    if snapshot.source not in ('google_sheets', 'local'):
+        st.warning("⚠️ Файл LakeHouse.xlsx не знайдено. Завантажте Excel файл:")
+        uploaded_file = st.file_uploader("Завантажте Excel файл", type=['xlsx', 'xls'])
+        if uploaded_file is not None:
+            with open(EXCEL_FILE_PATH, "wb") as f:
+                f.write(uploaded_file.getbuffer())
+            st.success("✅ Файл завантажено! Оновлюємо дані...")
+            snapshot = refresh_data()
+            if snapshot.lakes_df is not None:
+                upload_violations = validate_lakes_table(full_lakes_table(snapshot), asset_dir=core.ASSETS_DIR)
+                if not upload_violations.empty:
+                    show_violations(upload_violations, "Перевірка завантаженого файлу")
+            st.session_state['data_version'] = snapshot.version
+            st.sidebar.info(f"📂 Локальний файл: `{os.path.abspath(EXCEL_FILE_PATH)}`")
+        else:
+            st.info("👆 Завантажте Excel файл або підключіть Google Sheets у сайдбарі")
+    st.sidebar.caption(f"🔢 Версія даних: {snapshot.version}")
+    return snapshot
@@ -0,0 +1,258 @@
+# validation.py
+# ---------------------------
+# Векторная проверка таблицы Lakes перед записью (и из CLI)
+# Правила работают по колонкам целиком, длинные тексты проверяются по уникальным значениям:
+# - required        — пустые LakeHouse / Folder / Element
+# - duplicate_key   — повтор ключа (LakeHouse, Folder, Element, Type), по кодам значений
+# - url             — URL не похож на http(s)-ссылку
+# - image_ref       — [IMAGE:...] указывает на файл, которого нет
+# - lake_info       — у одного лейка разные 'Загальна інформація про лейк'
+# Результат — датафрейм нарушений: row, rule, severity, column, value, message.
+# ---------------------------
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ('LakeHouse', 'Folder', 'Element')
+# один элемент Fabric может быть и ноутбуком, и конвейером с тем же именем — тип входит в ключ
+KEY_COLUMNS = ('LakeHouse', 'Folder', 'Element', 'Type')
+URL_COLUMN = 'URL'
+LAKE_INFO_COLUMN = 'Загальна інформація про лейк'
+IMAGE_TEXT_COLUMNS = ('Загальна інформація про лейк', 'Внесення змін')
+
+URL_PATTERN = r'^https?://[^\s/?#]+\.[^\s/?#]+(?:[/?#]\S*)?$'
+IMAGE_PATTERN = re.compile(r'\[IMAGE:(.*?)\]')
+ASSET_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+INLINE_BASE64_PATTERN = re.compile(r'^[A-Za-z0-9+/=\s]{64,}$')
+
+VIOLATION_COLUMNS = ['row', 'rule', 'severity', 'column', 'value', 'message']
+ERROR, WARNING = 'error', 'warning'
+
+
+def _factorize(s: pd.Series, lower: bool = False):
+    """Коды + уникальные значения без пробелов по краям; пустые строки и NaN -> -1.
+    Строки (особенно длинные тексты) повторяются — str-операции идут по уникальным значениям."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    stripped = pd.Series(uniques, dtype='str').str.strip()
+    if lower:
+        stripped = stripped.str.lower()
+    norm, norm_uniques = pd.factorize(stripped)
+    if len(norm):
+        norm = np.where(norm_uniques.to_numpy()[norm] == '', -1, norm)
+        codes = np.where(codes >= 0, norm[np.maximum(codes, 0)], -1)
+    return codes, norm_uniques
+
+
+def _blank(s: pd.Series) -> np.ndarray:
+    return _factorize(s)[0] < 0
+
+
+def _violations(index, rule, severity, column, values, message) -> pd.DataFrame:
+    n = len(index)
+    return pd.DataFrame({
+        'row': np.asarray(index),
+        'rule': [rule] * n,
+        'severity': [severity] * n,
+        'column': [column] * n,
+        'value': list(values) if values is not None else [None] * n,
+        'message': list(message) if isinstance(message, (list, pd.Series, np.ndarray)) else [message] * n,
+    })
+
+
+# ----------------- правила -----------------
+def check_required(df: pd.DataFrame, **_):
+    out = []
+    for c in REQUIRED_COLUMNS:
+        if c not in df.columns:
+            out.append(_violations(df.index, 'required', ERROR, c, None, f"Немає колонки '{c}'"))
+            continue
+        bad = _blank(df[c])
+        if bad.any():
+            out.append(_violations(df.index[bad], 'required', ERROR, c, None, f"Порожнє обов'язкове поле '{c}'"))
+    return out
+
+
+def key_columns(df: pd.DataFrame) -> list:
+    return [c for c in KEY_COLUMNS if c in df.columns]
+
+
+def normalized_keys(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Колонки ключа без регистра и пробелов, пустое -> ''. Колонки, которой нет в df, — пустая."""
+    out = {}
+    for c in columns:
+        if c not in df.columns:
+            out[c] = np.full(len(df), '', dtype=object)
+            continue
+        codes, uniques = _factorize(df[c], lower=True)
+        values = uniques.to_numpy(dtype=object)
+        out[c] = values[np.maximum(codes, 0)] if len(values) else np.full(len(df), '', dtype=object)
+        out[c][codes < 0] = ''
+    return pd.DataFrame(out, index=df.index)
+
+
+def key_hashes(df: pd.DataFrame, columns) -> np.ndarray:
+    """uint64-хэш ключа строки — одинаков для одной строки в разных таблицах и чанках."""
+    return pd.util.hash_pandas_object(normalized_keys(df, columns), index=False).to_numpy()
+
+
+def _key_codes(df: pd.DataFrame, existing: pd.DataFrame | None = None) -> np.ndarray:
+    """Ключ строки одним int64: коды (без регистра и пробелов) колонок ключа, общие для df и existing."""
+    frames = [df] if existing is None else [df, existing]
+    key = np.zeros(sum(len(f) for f in frames), dtype=np.int64)
+    for c in key_columns(df):
+        codes, uniques = _factorize(pd.concat([f[c].astype(object) if c in f.columns else pd.Series([None] * len(f))
+                                               for f in frames], ignore_index=True)
+                                    if existing is not None else df[c], lower=True)
+        # перекодируем после каждой колонки — число не растёт больше количества строк
+        key = pd.factorize(key * (len(uniques) + 1) + (codes + 1))[0].astype(np.int64)
+    return key
+
+
+def check_duplicate_keys(df: pd.DataFrame, existing: pd.DataFrame | None = None, known_keys=None, **_):
+    if not set(REQUIRED_COLUMNS) <= set(df.columns):
+        return []
+    with_existing = existing is not None and not existing.empty and set(REQUIRED_COLUMNS) <= set(existing.columns)
+    keys = _key_codes(df, existing if with_existing else None)
+    own = pd.Series(keys[:len(df)])
+    # ключи с пустыми частями уже отмечены правилом required
+    complete = ~np.logical_or.reduce([_blank(df[c]) for c in REQUIRED_COLUMNS])
+    dup = own.duplicated(keep=False).to_numpy() & complete
+    if with_existing:
+        dup |= own.isin(keys[len(df):]).to_numpy() & complete
+    if known_keys is not None:
+        dup |= np.asarray(known_keys(df), dtype=bool) & complete
+    if not dup.any():
+        return []
+    cols = key_columns(df)
+    rows = df.loc[dup, cols].astype(object).fillna('').astype(str).agg(' / '.join, axis=1)
+    return [_violations(df.index[dup], 'duplicate_key', ERROR, 'Element', rows.to_numpy(),
+                        f"Повторюється ключ {' / '.join(cols)}")]
+
+
+def check_urls(df: pd.DataFrame, **_):
+    if URL_COLUMN not in df.columns:
+        return []
+    codes, uniques = _factorize(df[URL_COLUMN])
+    bad_unique = ~pd.Series(uniques, dtype='str').str.match(URL_PATTERN).to_numpy(dtype=bool)
+    bad = (codes >= 0) & bad_unique[np.maximum(codes, 0)] if len(uniques) else np.zeros(len(df), dtype=bool)
+    if not bad.any():
+        return []
+    return [_violations(df.index[bad], 'url', ERROR, URL_COLUMN, uniques.to_numpy()[codes[bad]],
+                        "Некоректне посилання (очікується http(s)://...)")]
+
+
+def image_ref_resolves(ref: str, base_dir: str | None = None, asset_dir: str | None = None) -> bool:
+    """Та же логика, что и при показе картинок в приложении (process_text_with_images)."""
+    ref = ref.strip()
+    if ref.startswith(('http://', 'https://')):
+        return True
+    if ref.startswith('asset:'):
+        # картинка в хранилище (asset_store.py); без asset_dir проверяется только формат ссылки
+        digest = ref[len('asset:'):]
+        if not ASSET_HASH_PATTERN.match(digest):
+            return False
+        return asset_dir is None or os.path.exists(os.path.join(asset_dir, digest[:2], digest))
+    if ref.startswith('data:image/') or INLINE_BASE64_PATTERN.match(ref):
+        return True   # встроенная картинка; при записи уходит в хранилище
+    if ref.startswith('C:\\') and 'PL-notebook.png' in ref:
+        return True   # подменяется на картинку из репозитория
+    if base_dir and not os.path.isabs(ref) and os.path.exists(os.path.join(base_dir, ref)):
+        return True
+    return os.path.exists(ref)
+
+
+def check_image_refs(df: pd.DataFrame, image_base_dir: str | None = None, asset_dir: str | None = None, **_):
+    out = []
+    for c in IMAGE_TEXT_COLUMNS:
+        if c not in df.columns:
+            continue
+        s = df[c]
+        # тексты повторяются на строках лейка/папки — разбираем каждый уникальный текст один раз
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+        broken_by_text = {}
+        resolved = {}
+        for i, text in enumerate(uniques):
+            if not isinstance(text, str) or '[IMAGE:' not in text:
+                continue
+            broken = []
+            for ref in IMAGE_PATTERN.findall(text):
+                if ref not in resolved:
+                    resolved[ref] = image_ref_resolves(ref, image_base_dir, asset_dir)
+                if not resolved[ref]:
+                    broken.append(ref)
+            if broken:
+                broken_by_text[i] = ', '.join(broken)
+        if not broken_by_text:
+            continue
+        bad = np.isin(codes, list(broken_by_text))
+        refs = [broken_by_text[code] for code in codes[bad]]
+        out.append(_violations(df.index[bad], 'image_ref', WARNING, c, refs, "Зображення не знайдено"))
+    return out
+
+
+def check_lake_info_consistency(df: pd.DataFrame, **_):
+    if LAKE_INFO_COLUMN not in df.columns or 'LakeHouse' not in df.columns:
+        return []
+    info, _ = _factorize(df[LAKE_INFO_COLUMN])
+    lake, lake_names = _factorize(df['LakeHouse'])
+    filled = (info >= 0) & (lake >= 0)
+    if not filled.any():
+        return []
+    pairs = pd.DataFrame({'lake': lake[filled], 'info': info[filled]})
+    counts = pairs.value_counts()   # (лейк, текст) -> число строк, по убыванию
+    per_lake = counts.groupby(level='lake').size()
+    if not (per_lake > 1).any():
+        return []
+    # эталон — самый частый текст лейка; отмечаем строки, которые от него отличаются
+    reference = counts.reset_index().drop_duplicates('lake').set_index('lake')['info']
+    ref = np.full(len(lake_names), -1)
+    ref[reference.index.to_numpy()] = reference.to_numpy()
+    bad = filled & (info != ref[np.maximum(lake, 0)])
+    return [_violations(df.index[bad], 'lake_info', WARNING, LAKE_INFO_COLUMN, lake_names.to_numpy()[lake[bad]],
+                        "Опис лейка відрізняється від інших рядків цього лейка")]
+
+
+RULES = {
+    'required': check_required,
+    'duplicate_key': check_duplicate_keys,
+    'url': check_urls,
+    'image_ref': check_image_refs,
+    'lake_info': check_lake_info_consistency,
+}
+
+
+def validate_lakes_table(df: pd.DataFrame | None, rules=None, existing: pd.DataFrame | None = None,
+                         image_base_dir: str | None = None, asset_dir: str | None = None,
+                         known_keys=None) -> pd.DataFrame:
+    """
+    Проверить таблицу (полную, с длинными текстами). existing — уже сохранённые строки:
+    дубликаты ключей ищутся и против них (для новых строк из формы/импорта).
+    known_keys(df) -> bool на строку: ключ уже сохранён (Snapshot.known_keys) — то же без всей таблицы.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    parts = []
+    for name in (rules or RULES):
+        parts.extend(RULES[name](df, existing=existing, image_base_dir=image_base_dir, asset_dir=asset_dir,
+                                 known_keys=known_keys))
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    return pd.concat(parts, ignore_index=True).sort_values(['row', 'rule'], kind='stable').reset_index(drop=True)
+
+
+def has_errors(violations: pd.DataFrame) -> bool:
+    return not violations.empty and (violations['severity'] == ERROR).any()
+
+
+def new_violations(after: pd.DataFrame, before: pd.DataFrame) -> pd.DataFrame:
+    """Нарушения, которых не было до правки (по row, rule, column): старые огрехи таблицы не блокируют запись."""
+    if after.empty or before.empty:
+        return after
+    keys = ['row', 'rule', 'column']
+    seen = pd.MultiIndex.from_frame(before[keys].astype(str))
+    mask = ~pd.MultiIndex.from_frame(after[keys].astype(str)).isin(seen)
+    return after[mask].reset_index(drop=True)
@@ -0,0 +1,304 @@
+# version_history.py
+# ---------------------------
+# История версий таблицы Lakes: каждое сохранение (редактор, импорт, CLI) — новая версия
+# - версия хранится как дельта к предыдущей: удалённые строки, изменённые ячейки, вставленные строки с позицией
+# - строка опознаётся по ключу (LakeHouse, Folder, Element, Type) + номеру повтора ключа
+# - каждая checkpoint_every-я версия (и версия, где строки переставлены или изменена большая часть) — полная копия:
+#   восстановление любой версии = копия + не больше checkpoint_every-1 дельт
+# - значения хранятся текстом — так, как они уходят в Google Sheets
+# - дописанная формой строка (record_rows) — дельта из одной вставки в конец, без восстановления таблицы головы;
+#   такие дельты копию не вызывают (её сделает следующая полная запись), а подряд идущие восстанавливаются
+#   одной вставкой
+# Файлы: <папка>/index.json (список версий) и <версия>.json.gz; запись — под файловой блокировкой.
+# ---------------------------
+
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from shared_cache import FileLock, _atomic_write
+from validation import KEY_COLUMNS, key_hashes
+
+HISTORY_CHECKPOINT_EVERY = 20
+# если дельта затрагивает больше этой доли строк — дешевле сохранить полную копию
+HISTORY_DELTA_MAX_RATIO = 0.5
+
+
+def history_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Таблица как текст (как её пишет knowledge_core.sheet_values): NaN -> '', даты -> ГГГГ-ММ-ДД."""
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            s = s.dt.strftime('%Y-%m-%d')
+        # по уникальным значениям: длинный текст лейка — один объект str на все его строки
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+        texts = np.array([str(v) for v in uniques] + [''], dtype=object)
+        out[str(c)] = texts[codes]
+    # dtype=object: str dtype pandas 3 создавал бы отдельную строку на каждую ячейку при to_numpy()
+    frame = pd.DataFrame(out, columns=[str(c) for c in df.columns], dtype=object)
+    frame.index = row_ids(df)
+    return frame
+
+
+def row_ids(df: pd.DataFrame, seen: dict | None = None) -> pd.Index:
+    """
+    Идентификатор строки: хэш ключа + номер повтора этого ключа (повторы ключа в таблице бывают).
+    seen — {хэш: число строк} таблицы, к концу которой дописываются строки df: нумерация повторов продолжается.
+    """
+    hashes = key_hashes(df, KEY_COLUMNS)
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    if seen:
+        occurrence = occurrence + np.array([seen.get(h, 0) for h in hashes.tolist()], dtype=np.int64)
+    return pd.Index([f"{h:016x}.{n}" for h, n in zip(hashes.tolist(), occurrence.tolist())], dtype=object)
+
+
+def _key_counts(ids: pd.Index) -> dict:
+    """{хэш ключа: число строк} по идентификаторам row_ids."""
+    return {int(h, 16): n for h, n in pd.Series(ids.str[:16]).value_counts(sort=False).items()}
+
+
+def _dictionary(s: pd.Series) -> list:
+    # полная копия по колонкам: уникальные значения + коды (длинные тексты повторяются на каждой строке)
+    codes, uniques = pd.factorize(s)
+    return [[str(v) for v in uniques], codes.tolist()]
+
+
+def _delta(old: pd.DataFrame, new: pd.DataFrame) -> dict:
+    """Разница двух текстовых таблиц (history_text). reordered — уцелевшие строки поменяли порядок."""
+    columns = list(new.columns)
+    loc = old.index.get_indexer(new.index)
+    kept = loc >= 0
+    reordered = bool((np.diff(loc[kept]) <= 0).any())
+
+    old_values = old.reindex(columns=columns, fill_value='').to_numpy(dtype=object)[loc[kept]]
+    new_values = new.to_numpy(dtype=object)
+    kept_ids, kept_values = new.index[kept], new_values[kept]
+    differs = old_values != kept_values
+    # только изменённые ячейки: длинные тексты лейка в неизменённых колонках в дельту не попадают
+    updated = [[kept_ids[i], np.flatnonzero(differs[i]).tolist(), kept_values[i][differs[i]].tolist()]
+               for i in np.flatnonzero(differs.any(axis=1))]
+    inserted = [[int(p), new.index[p], new_values[p].tolist()] for p in np.flatnonzero(~kept)]
+    deleted = old.index[~old.index.isin(new.index)].tolist()
+    return {'columns': columns, 'deleted': deleted, 'updated': updated, 'inserted': inserted,
+            'reordered': reordered}
+
+
+def _apply(old: pd.DataFrame, delta: dict) -> pd.DataFrame:
+    columns = delta['columns']
+    frame = old.drop(index=delta['deleted']).reindex(columns=columns, fill_value='')
+    values = frame.to_numpy(dtype=object, copy=True)
+    if delta['updated']:
+        positions = frame.index.get_indexer([u[0] for u in delta['updated']])
+        for pos, (_, cols, vals) in zip(positions, delta['updated']):
+            values[pos, cols] = vals
+    if not delta['inserted']:
+        return pd.DataFrame(values, index=frame.index, columns=columns, dtype=object)
+    n = len(frame) + len(delta['inserted'])
+    at = np.zeros(n, dtype=bool)
+    at[[i[0] for i in delta['inserted']]] = True
+    out = np.empty((n, len(columns)), dtype=object)
+    ids = np.empty(n, dtype=object)
+    out[~at], ids[~at] = values, frame.index.to_numpy(dtype=object)
+    out[at] = np.array([i[2] for i in delta['inserted']], dtype=object).reshape(-1, len(columns))
+    ids[at] = [i[1] for i in delta['inserted']]
+    return pd.DataFrame(out, index=pd.Index(ids, dtype=object), columns=columns, dtype=object)
+
+
+def _appends_to(current: dict, n_rows: int, delta: dict) -> bool:
+    """delta только дописывает строки в конец таблицы current (n_rows строк + вставки current), колонки — тоже в конец."""
+    start = n_rows + len(current['inserted'])
+    return (not delta['deleted'] and not delta['updated'] and delta['columns'][:len(current['columns'])] == current['columns']
+            and [i[0] for i in delta['inserted']] == list(range(start, start + len(delta['inserted']))))
+
+
+def _join_appends(appended: dict | None, delta: dict) -> dict:
+    if appended is None:
+        return delta
+    pad = [''] * (len(delta['columns']) - len(appended['columns']))
+    inserted = [[p, row_id, values + pad] for p, row_id, values in appended['inserted']] + delta['inserted']
+    return {'columns': delta['columns'], 'deleted': [], 'updated': [], 'inserted': inserted}
+
+
+class VersionHistory:
+    def __init__(self, directory, checkpoint_every: int = HISTORY_CHECKPOINT_EVERY):
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock_path = os.path.join(directory, "lock")
+        self._head = None   # (версия, текстовая таблица) — чтобы следующая запись не восстанавливала голову
+        self._tip = None    # (версия, колонки, число строк, {хэш ключа: число строк}) головы — для record_rows
+
+    # ----------------- список версий -----------------
+    def _read_index(self) -> list:
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def versions(self) -> pd.DataFrame:
+        """Версии от новых к старым: version, at, kind, source, note, rows, inserted, updated, deleted, bytes."""
+        entries = self._read_index()
+        columns = ['version', 'at', 'kind', 'source', 'note', 'rows', 'inserted', 'updated', 'deleted', 'bytes']
+        return pd.DataFrame(entries[::-1], columns=columns)
+
+    def head(self) -> int | None:
+        entries = self._read_index()
+        return entries[-1]['version'] if entries else None
+
+    def storage_bytes(self) -> int:
+        return sum(e['bytes'] for e in self._read_index())
+
+    # ----------------- файлы версий -----------------
+    def _path(self, version: int) -> str:
+        return os.path.join(self.directory, f"{version:06d}.json.gz")
+
+    def _write(self, version: int, payload: dict) -> int:
+        data = gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        _atomic_write(self._path(version), data)
+        return len(data)
+
+    def _read(self, version: int) -> dict:
+        with open(self._path(version), "rb") as f:
+            return json.loads(gzip.decompress(f.read()))
+
+    # ----------------- восстановление -----------------
+    def _text_table(self, version: int, entries: list) -> pd.DataFrame:
+        if self._head is not None and self._head[0] == version:
+            return self._head[1]
+        # от ближайшей копии назад; запомненная голова (до дописанных строк) — та же копия, только ближе
+        chain, frame = [], None
+        for e in reversed([e for e in entries if e['version'] <= version]):
+            if self._head is not None and self._head[0] == e['version']:
+                frame = self._head[1]
+                break
+            chain.append(e['version'])
+            if e['kind'] == 'checkpoint':
+                break
+        if not chain or chain[0] != version:
+            raise KeyError(f"Версію {version} не знайдено")
+        appended = None   # идущие подряд дельты record_rows — одной вставкой: таблица копируется раз на серию
+        for v in reversed(chain):
+            payload = self._read(v)
+            if payload['kind'] == 'checkpoint':
+                frame = pd.DataFrame({c: np.array(uniques, dtype=object)[np.asarray(codes, dtype=np.int64)]
+                                      for c, (uniques, codes) in zip(payload['columns'], payload['values'])},
+                                     index=pd.Index(payload['ids'], dtype=object), columns=payload['columns'], dtype=object)
+            elif _appends_to(appended or {'columns': list(frame.columns), 'inserted': []}, len(frame), payload):
+                appended = _join_appends(appended, payload)
+            else:
+                if appended is not None:
+                    frame, appended = _apply(frame, appended), None
+                frame = _apply(frame, payload)
+        return frame if appended is None else _apply(frame, appended)
+
+    def table(self, version: int) -> pd.DataFrame:
+        """Таблица версии (текст, индекс 0..n-1) — в том виде, в каком её записали."""
+        return self._text_table(version, self._read_index()).reset_index(drop=True)
+
+    def diff(self, a: int, b: int) -> pd.DataFrame:
+        """Что изменилось от версии a к версии b: по строке на изменённую ячейку и на добавленную/удалённую строку."""
+        entries = self._read_index()
+        old, new = self._text_table(a, entries), self._text_table(b, entries)
+        delta = _delta(old, new)
+        keys = [c for c in KEY_COLUMNS if c in new.columns or c in old.columns]
+
+        def key_of(frame, row_id):
+            return {c: frame.at[row_id, c] if c in frame.columns else '' for c in keys}
+
+        rows = []
+        for row_id in delta['deleted']:
+            rows.append({'change': 'removed', **key_of(old, row_id), 'column': '', 'before': '', 'after': ''})
+        for row_id, cols, vals in delta['updated']:
+            for ci, value in zip(cols, vals):
+                column = delta['columns'][ci]
+                before = old.at[row_id, column] if column in old.columns else ''
+                rows.append({'change': 'changed', **key_of(new, row_id), 'column': column,
+                             'before': before, 'after': value})
+        for _, row_id, _ in delta['inserted']:
+            rows.append({'change': 'added', **key_of(new, row_id), 'column': '', 'before': '', 'after': ''})
+        return pd.DataFrame(rows, columns=['change', *keys, 'column', 'before', 'after'])
+
+    # ----------------- запись -----------------
+    def record(self, df: pd.DataFrame, source: str = "", note: str = "") -> dict | None:
+        """Записать df как новую версию. Без изменений относительно головы — None."""
+        new = history_text(df)
+        with FileLock(self._lock_path):
+            return self._record(new, self._read_index(), source, note)
+
+    def record_rows(self, rows, source: str = "", note: str = "") -> dict | None:
+        """
+        Дописанные строки (форма «Додати запис») — версия «голова истории + строки в конце», без всей таблицы
+        у вызывающего. Истории ещё нет — None: строки войдут в первую полную запись.
+        Версия — всегда дельта из одних вставок: таблица головы не восстанавливается, нужны только её колонки,
+        число строк и счётчики ключей (запоминаются в процессе; восстанавливаются один раз на чужую запись).
+        Полную копию сделает следующая полная запись; серия таких дельт при восстановлении — одна вставка.
+        """
+        added = pd.DataFrame(list(rows))
+        with FileLock(self._lock_path):
+            entries = self._read_index()
+            if not entries or added.empty:
+                return None
+            version, columns, n_rows, seen = self._tip_of(entries)
+            columns = columns + [str(c) for c in added.columns if str(c) not in columns]
+            added = added.rename(columns=str).reindex(columns=columns).astype(object)
+            text = history_text(added)
+            ids = row_ids(added, seen)
+            payload = {'kind': 'delta', 'columns': columns, 'deleted': [], 'updated': [],
+                       'inserted': [[n_rows + i, ids[i], values] for i, values in enumerate(text.to_numpy().tolist())]}
+            entry = {'version': version + 1, 'at': time.strftime('%Y-%m-%d %H:%M:%S'), 'source': source,
+                     'note': note, 'rows': n_rows + len(added), 'inserted': len(added), 'updated': 0, 'deleted': 0,
+                     'kind': 'delta', 'bytes': self._write(version + 1, payload)}
+            entries.append(entry)
+            _atomic_write(self._index_path, json.dumps(entries, ensure_ascii=False, indent=1).encode("utf-8"))
+            seen = dict(seen)
+            for h in ids.str[:16]:
+                seen[int(h, 16)] = seen.get(int(h, 16), 0) + 1
+            self._tip = (version + 1, columns, entry['rows'], seen)
+            return entry
+
+    def _tip_of(self, entries: list) -> tuple:
+        """(версия, колонки, число строк, {хэш ключа: число строк}) головы истории."""
+        version = entries[-1]['version']
+        if self._tip is None or self._tip[0] != version:
+            # после полной записи голова уже в памяти; после чужой записи — восстанавливается один раз
+            if self._head is None or self._head[0] != version:
+                self._head = (version, self._text_table(version, entries))
+            head = self._head[1]
+            self._tip = (version, list(head.columns), len(head), _key_counts(head.index))
+        return self._tip
+
+    def _record(self, new: pd.DataFrame, entries: list, source: str, note: str) -> dict | None:
+        # вызывается под блокировкой истории
+        version = entries[-1]['version'] + 1 if entries else 1
+        entry = {'version': version, 'at': time.strftime('%Y-%m-%d %H:%M:%S'), 'source': source,
+                 'note': note, 'rows': len(new), 'inserted': len(new), 'updated': 0, 'deleted': 0}
+        payload = None
+        if entries:
+            head = self._text_table(entries[-1]['version'], entries)
+            delta = _delta(head, new)
+            if not (delta['deleted'] or delta['updated'] or delta['inserted']) and list(head.columns) == list(new.columns):
+                self._head = (entries[-1]['version'], head)
+                return None
+            entry.update(inserted=len(delta['inserted']), updated=len(delta['updated']),
+                         deleted=len(delta['deleted']))
+            since_checkpoint = next(i for i, e in enumerate(reversed(entries)) if e['kind'] == 'checkpoint') + 1
+            touched = len(delta['updated']) + len(delta['inserted'])
+            if (not delta['reordered'] and since_checkpoint < self.checkpoint_every
+                    and touched <= max(1, len(new)) * HISTORY_DELTA_MAX_RATIO):
+                payload = {'kind': 'delta', **{k: delta[k] for k in ('columns', 'deleted', 'updated', 'inserted')}}
+        if payload is None:
+            payload = {'kind': 'checkpoint', 'columns': list(new.columns), 'ids': new.index.tolist(),
+                       'values': [_dictionary(new[c]) for c in new.columns]}
+        entry['kind'] = payload['kind']
+        entry['bytes'] = self._write(version, payload)
+        entries.append(entry)
+        _atomic_write(self._index_path, json.dumps(entries, ensure_ascii=False, indent=1).encode("utf-8"))
+        self._head = (version, new)
+        return entry